@@ -0,0 +1,153 @@
+"""
+Academy scoring benchmark: the original per-player loop against the
+vectorized engine on synthetic players.
+
+Run from the backend directory:
+
+    python -m benchmarks.academy_scoring [sizes...]
+"""
+
+import random
+import sys
+import time
+from typing import Dict
+
+from cobblemon_academy_tracker_api.academy import (
+    DEFAULT_WEIGHTS,
+    METRICS,
+    score_academy,
+)
+from cobblemon_academy_tracker_api.schemas import AcademyRankEntry
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+
+def synthetic_scores(players: int, seed: int = 42) -> Dict[str, Dict[str, float]]:
+    rnd = random.Random(seed)
+    scores: Dict[str, Dict[str, float]] = {metric: {} for metric in METRICS}
+    for i in range(players):
+        uuid = f"00000000-0000-0000-0000-{i:012d}"
+        # Not every player has a document in every collection
+        if rnd.random() < 0.9:
+            scores["pokedex"][uuid] = rnd.randint(0, 722)
+        if rnd.random() < 0.95:
+            scores["shiny"][uuid] = int(rnd.expovariate(0.5))
+        scores["battles"][uuid] = float(int(rnd.expovariate(0.02)))
+        scores["eggs"][uuid] = float(int(rnd.expovariate(0.2)))
+    return scores
+
+
+def legacy_score_academy(scores: Dict[str, Dict[str, float]], weights=DEFAULT_WEIGHTS):
+    """The scoring loop calculate_academy_ranks used before the engine."""
+    pokedex_scores = scores["pokedex"]
+    shiny_scores = scores["shiny"]
+    battle_scores = scores["battles"]
+    egg_scores = scores["eggs"]
+
+    all_uuids = (
+        set(pokedex_scores.keys())
+        | set(shiny_scores.keys())
+        | set(battle_scores.keys())
+        | set(egg_scores.keys())
+    )
+    total_players = len(all_uuids)
+
+    def compute_ranks(scores: Dict[str, float]) -> Dict[str, int]:
+        sorted_uuid = sorted(all_uuids, key=lambda u: scores.get(u, 0), reverse=True)
+        ranks = {}
+        current_rank = 1
+        for i, uuid in enumerate(sorted_uuid):
+            if i > 0 and scores.get(uuid, 0) < scores.get(sorted_uuid[i - 1], 0):
+                current_rank = i + 1
+            ranks[uuid] = current_rank
+        return ranks
+
+    rank_pokedex = compute_ranks(pokedex_scores)
+    rank_shiny = compute_ranks(shiny_scores)
+    rank_battles = compute_ranks(battle_scores)
+    rank_eggs = compute_ranks(egg_scores)
+
+    academy_entries = []
+    for uuid in all_uuids:
+
+        def get_norm(rank: int, raw_val: float) -> float:
+            if raw_val == 0:
+                return 0.0
+            if total_players <= 1:
+                return 1.0
+            return 1.0 - (rank - 1) / (total_players - 1)
+
+        norm_pokedex = get_norm(rank_pokedex[uuid], pokedex_scores.get(uuid, 0))
+        norm_shiny = get_norm(rank_shiny[uuid], shiny_scores.get(uuid, 0))
+        norm_battles = get_norm(rank_battles[uuid], battle_scores.get(uuid, 0))
+        norm_eggs = get_norm(rank_eggs[uuid], egg_scores.get(uuid, 0))
+
+        raw_score = (
+            weights["pokedex"] * norm_pokedex
+            + weights["shiny"] * norm_shiny
+            + weights["battles"] * norm_battles
+            + weights["eggs"] * norm_eggs
+        )
+        academy_entries.append(
+            {
+                "uuid": uuid,
+                "score": round(raw_score * 100, 2),
+                "ranks": {
+                    "pokedex": rank_pokedex[uuid],
+                    "shiny": rank_shiny[uuid],
+                    "battles": rank_battles[uuid],
+                    "eggs": rank_eggs[uuid],
+                },
+                "normalized": {
+                    "pokedex": norm_pokedex,
+                    "shiny": norm_shiny,
+                    "battles": norm_battles,
+                    "eggs": norm_eggs,
+                },
+            }
+        )
+
+    academy_entries.sort(key=lambda x: x["score"], reverse=True)
+
+    final_results = []
+    for i, entry in enumerate(academy_entries, start=1):
+        final_results.append(
+            AcademyRankEntry(
+                uuid=entry["uuid"],
+                username=None,
+                academyRank=i,
+                academyScore=entry["score"],
+                ranks=entry["ranks"],
+                normalized=entry["normalized"],
+                totalPlayers=total_players,
+            )
+        )
+    return final_results
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def main(sizes=DEFAULT_SIZES):
+    print(f"{'players':>10} {'legacy (s)':>12} {'engine (s)':>12} {'speedup':>8}")
+    for size in sizes:
+        scores = synthetic_scores(size)
+        legacy, legacy_seconds = timed(legacy_score_academy, scores)
+        engine, engine_seconds = timed(score_academy, scores)
+
+        if [e.model_dump_json() for e in legacy] != [
+            e.model_dump_json() for e in engine
+        ]:
+            raise SystemExit(f"Engine output differs from legacy at {size} players")
+
+        print(
+            f"{size:>10} {legacy_seconds:>12.3f} {engine_seconds:>12.3f} "
+            f"{legacy_seconds / engine_seconds:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,62 @@
+"""
+Rank engine benchmark: single-player metric updates applied incrementally
+against re-ranking the whole board after each change.
+
+Run from the backend directory:
+
+    python -m benchmarks.rank_engine [sizes...]
+"""
+
+import random
+import sys
+import time
+
+from cobblemon_academy_tracker_api.academy import (
+    METRICS,
+    AcademyMetrics,
+    AcademyRankEngine,
+)
+from benchmarks.academy_scoring import synthetic_scores
+
+DEFAULT_SIZES = (10_000, 100_000)
+UPDATES = 1_000
+
+
+def main(sizes=DEFAULT_SIZES):
+    print(
+        f"{'players':>10} {'re-rank (ms)':>13} {'update (ms)':>12} "
+        f"{'changed':>9} {'speedup':>8}"
+    )
+    for size in sizes:
+        scores = synthetic_scores(size)
+        engine = AcademyRankEngine(scores)
+        rnd = random.Random(7)
+        uuids = list(engine.values)
+
+        started = time.perf_counter()
+        AcademyMetrics(scores).weigh(engine.weights)
+        rerank_ms = (time.perf_counter() - started) * 1000
+
+        changed = 0
+        started = time.perf_counter()
+        for _ in range(UPDATES):
+            uuid = rnd.choice(uuids)
+            metric = rnd.choice(METRICS)
+            scores[metric][uuid] = scores[metric].get(uuid, 0) + 1
+            changed += len(
+                engine.update(uuid, {m: scores[m].get(uuid, 0) for m in METRICS})
+            )
+        update_ms = (time.perf_counter() - started) * 1000 / UPDATES
+
+        reference = AcademyMetrics(scores).weigh(engine.weights)
+        if any(engine.scores[e.uuid] != e.academyScore for e in reference):
+            raise SystemExit(f"Engine scores drifted from a full re-rank at {size}")
+
+        print(
+            f"{size:>10} {rerank_ms:>13.1f} {update_ms:>12.3f} "
+            f"{changed / UPDATES:>9.0f} {rerank_ms / update_ms:>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,109 @@
+"""
+Response serialization benchmark: FastAPI's response_model pass against
+ModelResponse on a full 1,500-Pokemon PC and a 10k-player academy board.
+
+Run from the backend directory:
+
+    python -m benchmarks.serialization [repeats]
+"""
+
+import asyncio
+import random
+import sys
+import time
+from typing import List, Tuple
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from cobblemon_academy_tracker_api.academy import DEFAULT_WEIGHTS, AcademyMetrics
+from cobblemon_academy_tracker_api.responses import ModelResponse
+from cobblemon_academy_tracker_api.schemas import AcademyRankResponse, Pokemon
+from benchmarks.academy_scoring import synthetic_scores
+
+DEFAULT_REPEATS = 5
+STATS = ("hp", "attack", "defence", "special_attack", "special_defence", "speed")
+
+
+def synthetic_pc(size: int = 1_500, seed: int = 42) -> List[Pokemon]:
+    rnd = random.Random(seed)
+    pokemon = []
+    for i in range(size):
+        p = Pokemon(
+            Species=f"cobblemon:species{rnd.randint(1, 722)}",
+            Level=rnd.randint(1, 100),
+            Experience=rnd.randint(0, 1_000_000),
+            Gender=rnd.choice(["MALE", "FEMALE", "GENDERLESS"]),
+            Shiny=rnd.random() < 0.02,
+            Nature="cobblemon:hardy",
+            Ability={"AbilityName": "overgrow", "AbilityIndex": 0},
+            IVs={f"cobblemon:{stat}": rnd.randint(0, 31) for stat in STATS},
+            EVs={f"cobblemon:{stat}": rnd.randint(0, 252) for stat in STATS},
+            MoveSet=[
+                {"MoveName": f"move{i % 900}", "MovePP": 20, "RaisedPPStages": 0}
+                for _ in range(4)
+            ],
+            Health=rnd.randint(1, 300),
+            Friendship=rnd.randint(0, 255),
+            CaughtBall="cobblemon:poke_ball",
+            PokemonOriginalTrainer="00000000-0000-0000-0000-000000000000",
+        )
+        p.boxIndex, p.slotIndex = divmod(i, 30)
+        pokemon.append(p)
+    return pokemon
+
+
+def synthetic_academy(players: int = 10_000) -> AcademyRankResponse:
+    entries = AcademyMetrics(synthetic_scores(players)).weigh(DEFAULT_WEIGHTS)
+    return AcademyRankResponse(
+        totalPlayers=len(entries),
+        limit=len(entries),
+        offset=0,
+        weights=DEFAULT_WEIGHTS,
+        entries=entries,
+    )
+
+
+async def response_model_body(field, content) -> bytes:
+    return JSONResponse(
+        await serialize_response(field=field, response_content=content)
+    ).body
+
+
+async def timed(render, repeats: int) -> Tuple[float, bytes]:
+    started = time.perf_counter()
+    for _ in range(repeats):
+        body = await render()
+    return (time.perf_counter() - started) * 1000 / repeats, body
+
+
+async def main(repeats: int = DEFAULT_REPEATS):
+    cases = [
+        ("PC, 1,500 Pokemon", List[Pokemon], synthetic_pc()),
+        ("academy, 10k players", AcademyRankResponse, synthetic_academy()),
+    ]
+    print(
+        f"{'response':>22} {'response_model (ms)':>20} "
+        f"{'ModelResponse (ms)':>19} {'speedup':>8}"
+    )
+    for name, annotation, content in cases:
+        field = create_model_field("Response", annotation, mode="serialization")
+        slow_ms, slow_body = await timed(
+            lambda: response_model_body(field, content), repeats
+        )
+
+        async def fast():
+            return ModelResponse(content, annotation).body
+
+        fast_ms, fast_body = await timed(fast, repeats)
+        if slow_body != fast_body:
+            raise SystemExit(f"ModelResponse output differs for {name}")
+
+        print(
+            f"{name:>22} {slow_ms:>20.1f} {fast_ms:>19.1f} {slow_ms / fast_ms:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:2])))
@@ -0,0 +1,475 @@
+from bisect import bisect_left, bisect_right, insort
+from functools import reduce
+from operator import or_
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from cobblemon_academy_tracker_api.constants import ACADEMY_WEIGHT_PRESETS
+from cobblemon_academy_tracker_api.schemas import AcademyRankEntry
+
+METRICS = ("pokedex", "shiny", "battles", "eggs")
+
+DEFAULT_WEIGHTS = ACADEMY_WEIGHT_PRESETS["default"]
+
+# Largest metric value the rank engine indexes. Its indexes are sized by the
+# largest value, so a corrupt counter would otherwise allocate that many
+# buckets; anything above this ties with it, anything negative counts as 0.
+MAX_METRIC_VALUE = 1 << 20
+
+
+def competition_ranks(values: np.ndarray) -> np.ndarray:
+    """
+    1-based competition ranks (1, 1, 3) for a descending ordering: tied
+    values share the rank of the first of them.
+    """
+    n = len(values)
+    order = np.argsort(-values, kind="stable")
+    sorted_values = values[order]
+
+    starts = np.empty(n, dtype=bool)
+    starts[:1] = True
+    np.less(sorted_values[1:], sorted_values[:-1], out=starts[1:])
+    positions = np.where(starts, np.arange(1, n + 1), 0)
+
+    ranks = np.empty(n, dtype=np.int64)
+    ranks[order] = np.maximum.accumulate(positions)
+    return ranks
+
+
+def normalize_ranks(ranks: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Map rank 1 to 1.0 and last place to 0.0; players with no score get 0."""
+    total = len(ranks)
+    if total <= 1:
+        normalized = np.ones(total)
+    else:
+        normalized = 1.0 - (ranks - 1) / (total - 1)
+    return np.where(values == 0, 0.0, normalized)
+
+
+class AcademyMetrics:
+    """
+    Per-metric ranks and normalized scores of every player. This is the
+    expensive, weight-independent half of the academy ranking; weigh() turns
+    it into a board for any weight profile. Entries carry no usernames, those
+    are resolved per returned page.
+    """
+
+    def __init__(self, scores: Dict[str, Dict[str, float]]):
+        # Same union expression as the original loop: set iteration order (and
+        # therefore the order of tied players) depends on how the set was built
+        all_uuids = reduce(or_, (set(scores.get(m, {}).keys()) for m in METRICS))
+        self.uuids = list(all_uuids)
+        self.total_players = len(self.uuids)
+
+        self.ranks: Dict[str, List[int]] = {}
+        self.normalized: Dict[str, np.ndarray] = {}
+        for metric in METRICS:
+            metric_scores = scores.get(metric, {})
+            values = np.array(
+                [metric_scores.get(u, 0) for u in self.uuids], dtype=np.float64
+            )
+            metric_ranks = competition_ranks(values)
+            self.ranks[metric] = metric_ranks.tolist()
+            self.normalized[metric] = normalize_ranks(metric_ranks, values)
+
+    @classmethod
+    def from_columns(
+        cls,
+        uuids: List[str],
+        ranks: Dict[str, List[int]],
+        normalized: Dict[str, np.ndarray],
+    ) -> "AcademyMetrics":
+        """Rebuild previously computed metrics, keeping their player order."""
+        metrics = cls.__new__(cls)
+        metrics.uuids = uuids
+        metrics.total_players = len(uuids)
+        metrics.ranks = ranks
+        metrics.normalized = normalized
+        return metrics
+
+    def weigh(self, weights: Dict[str, float]) -> List[AcademyRankEntry]:
+        total_players = self.total_players
+        if total_players == 0:
+            return []
+
+        raw_score = np.zeros(total_players)
+        for metric in METRICS:
+            raw_score = raw_score + weights[metric] * self.normalized[metric]
+
+        # Python's round() is correctly rounded, np.round is not
+        final_scores = [round(v, 2) for v in (raw_score * 100).tolist()]
+        order = np.argsort(-np.array(final_scores), kind="stable").tolist()
+
+        uuids = self.uuids
+        rank_p, rank_s, rank_b, rank_e = (self.ranks[m] for m in METRICS)
+        norm_p, norm_s, norm_b, norm_e = (self.normalized[m].tolist() for m in METRICS)
+
+        # Every value is already typed, so skip validation and fields_set inference
+        fields_set = set(AcademyRankEntry.model_fields)
+        return [
+            AcademyRankEntry.model_construct(
+                fields_set,
+                uuid=uuids[i],
+                username=None,
+                academyRank=position,
+                academyScore=final_scores[i],
+                ranks={
+                    "pokedex": rank_p[i],
+                    "shiny": rank_s[i],
+                    "battles": rank_b[i],
+                    "eggs": rank_e[i],
+                },
+                normalized={
+                    "pokedex": norm_p[i],
+                    "shiny": norm_s[i],
+                    "battles": norm_b[i],
+                    "eggs": norm_e[i],
+                },
+                totalPlayers=total_players,
+            )
+            for position, i in enumerate(order, start=1)
+        ]
+
+
+def score_academy(
+    scores: Dict[str, Dict[str, float]],
+    weights: Dict[str, float] = DEFAULT_WEIGHTS,
+) -> List[AcademyRankEntry]:
+    """
+    Academy ranking of every player appearing in any metric of `scores`
+    (metric -> uuid -> raw value), without usernames.
+
+    The ranking is computed column-wise: one argsort per metric for the
+    ranks, one for the final order. Results match the original per-player
+    loop exactly, including ties, which keep the player iteration order.
+    """
+    return AcademyMetrics(scores).weigh(weights)
+
+
+class AcademySnapshot:
+    """
+    Rank-ordered academy entries with the lookup indexes built once when the
+    ranks are materialized, so per-request queries never scan the board.
+    """
+
+    def __init__(self, entries: List[AcademyRankEntry]):
+        self.entries = entries
+        self.by_uuid: Dict[str, AcademyRankEntry] = {e.uuid: e for e in entries}
+        # Negated scores are ascending, which is what bisect expects
+        self._neg_scores = [-e.academyScore for e in entries]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, uuid: str) -> Optional[AcademyRankEntry]:
+        return self.by_uuid.get(uuid)
+
+    def around(self, uuid: str, window: int) -> List[AcademyRankEntry]:
+        """The player's entry with up to `window` neighbours on each side."""
+        entry = self.by_uuid.get(uuid)
+        if entry is None:
+            return []
+        index = entry.academyRank - 1
+        return self.entries[max(0, index - window) : index + window + 1]
+
+    def rank_for_score(self, score: float) -> int:
+        """Academy rank a player with this score would currently hold."""
+        return bisect_left(self._neg_scores, -score) + 1
+
+    def percentile(self, score: float) -> float:
+        """Percentage of players with a strictly lower academy score."""
+        if not self.entries:
+            return 0.0
+        below = len(self.entries) - bisect_right(self._neg_scores, -score)
+        return round(below / len(self.entries) * 100, 2)
+
+
+class CountIndex:
+    """
+    Order-statistic index over non-negative integer values: a Fenwick tree
+    over value buckets, so counting the values above any threshold is
+    O(log V). Grows as larger values are added.
+    """
+
+    def __init__(self, size: int = 1024):
+        self.size = size
+        self.tree = [0] * (size + 1)
+        self.counts = [0] * size
+        self.total = 0
+
+    def _grow(self, value: int) -> None:
+        size = self.size
+        while size <= value:
+            size *= 2
+        self._build(self.counts + [0] * (size - self.size))
+
+    def _build(self, counts: List[int]) -> None:
+        # Linear-time Fenwick build from the bucket counts
+        size = len(counts)
+        tree = [0] + counts
+        for i in range(1, size + 1):
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        self.size, self.counts, self.tree = size, counts, tree
+
+    @classmethod
+    def from_counts(cls, counts: List[int]) -> "CountIndex":
+        """Index holding counts[v] times each value v."""
+        index = cls.__new__(cls)
+        index._build(list(counts))
+        index.total = sum(index.counts)
+        return index
+
+    def add(self, value: int, delta: int = 1) -> None:
+        if value < 0:
+            raise ValueError(f"CountIndex values must be non-negative, got {value}")
+        if value >= self.size:
+            self._grow(value)
+        self.counts[value] += delta
+        self.total += delta
+        i = value + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def count_at_most(self, value: int) -> int:
+        if value < 0:
+            return 0
+        i = min(value + 1, self.size)
+        count = 0
+        while i > 0:
+            count += self.tree[i]
+            i -= i & -i
+        return count
+
+    def count_above(self, value: int) -> int:
+        return self.total - self.count_at_most(value)
+
+
+# Academy scores are indexed in cents, 0.00 to 100.00
+SCORE_BUCKETS = 10_001
+
+
+def _index_value(value: Optional[float]) -> int:
+    return min(max(int(value or 0), 0), MAX_METRIC_VALUE)
+
+
+class AcademyRankEngine:
+    """
+    Academy ranks maintained incrementally for one weight profile.
+
+    Every metric keeps a CountIndex of player values (all metrics are counts)
+    plus the players holding each value, and academy scores are indexed in
+    cents. A player's update adjusts the indexes in O(log n), then rescores
+    only the players whose rank in a changed metric moved, i.e. those whose
+    value lies between the old and new one. Players joining or leaving
+    change everyone's normalization, so those only mark the board pending,
+    and settle() rescores it column-wise once for any number of them.
+
+    Ranks are competition ranks: tied players share the best rank.
+    """
+
+    def __init__(
+        self,
+        scores: Dict[str, Dict[str, float]],
+        weights: Dict[str, float] = DEFAULT_WEIGHTS,
+    ):
+        self.weights = dict(weights)
+        self.values: Dict[str, Tuple[int, ...]] = {}
+        self.indexes = {metric: CountIndex() for metric in METRICS}
+        # metric -> value -> players holding it, plus the sorted distinct values
+        self.holders: Dict[str, Dict[int, Set[str]]] = {m: {} for m in METRICS}
+        self.distinct: Dict[str, List[int]] = {m: [] for m in METRICS}
+        self.scores: Dict[str, float] = {}
+        self.score_index = CountIndex(SCORE_BUCKETS)
+        # Players joined or left since the last full rescore
+        self.pending = False
+
+        all_uuids = reduce(or_, (set(scores.get(m, {}).keys()) for m in METRICS))
+        for uuid in all_uuids:
+            self._insert(
+                uuid, tuple(_index_value(scores.get(m, {}).get(uuid)) for m in METRICS)
+            )
+        self._rescore_all()
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _insert(self, uuid: str, values: Tuple[int, ...]) -> None:
+        self.values[uuid] = values
+        for metric, value in zip(METRICS, values):
+            self.indexes[metric].add(value)
+            holders = self.holders[metric].get(value)
+            if holders is None:
+                holders = self.holders[metric][value] = set()
+                insort(self.distinct[metric], value)
+            holders.add(uuid)
+
+    def _remove(self, uuid: str) -> Tuple[int, ...]:
+        values = self.values.pop(uuid)
+        for metric, value in zip(METRICS, values):
+            self.indexes[metric].add(value, -1)
+            holders = self.holders[metric][value]
+            holders.discard(uuid)
+            if not holders:
+                del self.holders[metric][value]
+                distinct = self.distinct[metric]
+                del distinct[bisect_left(distinct, value)]
+        return values
+
+    def rank(self, uuid: str, metric: str) -> int:
+        value = self.values[uuid][METRICS.index(metric)]
+        return self.indexes[metric].count_above(value) + 1
+
+    def normalized(self, uuid: str, metric: str) -> float:
+        return self._normalized(metric, self.values[uuid][METRICS.index(metric)])
+
+    def _normalized(self, metric: str, value: int) -> float:
+        """Same mapping as normalize_ranks, from the index instead of a sort."""
+        if value == 0:
+            return 0.0
+        total = len(self.values)
+        if total <= 1:
+            return 1.0
+        return 1.0 - self.indexes[metric].count_above(value) / (total - 1)
+
+    def _rescore(self, uuids) -> Dict[str, float]:
+        # Players sharing a value share its normalized score, look it up once
+        memo: Dict[Tuple[str, int], float] = {}
+        weights = [self.weights[metric] for metric in METRICS]
+        changed = {}
+        for uuid in uuids:
+            # Accumulated in the same order as AcademyMetrics.weigh
+            raw_score = 0.0
+            for metric, weight, value in zip(METRICS, weights, self.values[uuid]):
+                normalized = memo.get((metric, value))
+                if normalized is None:
+                    normalized = memo[metric, value] = self._normalized(metric, value)
+                raw_score = raw_score + weight * normalized
+            score = round(raw_score * 100, 2)
+
+            previous = self.scores.get(uuid)
+            if previous == score:
+                continue
+            if previous is not None:
+                self.score_index.add(round(previous * 100), -1)
+            self.score_index.add(round(score * 100))
+            self.scores[uuid] = score
+            changed[uuid] = score
+        return changed
+
+    def _rescore_all(self) -> Dict[str, float]:
+        """_rescore() of every player, with one sort per metric."""
+        uuids = list(self.values)
+        total = len(uuids)
+        values = np.array(list(self.values.values()), dtype=np.int64)
+        raw_score = np.zeros(total)
+        for column, metric in enumerate(METRICS):
+            metric_values = values[:, column] if total else np.zeros(0, np.int64)
+            if total <= 1:
+                normalized = np.ones(total)
+            else:
+                ascending = np.sort(metric_values)
+                above = total - np.searchsorted(ascending, metric_values, "right")
+                normalized = 1.0 - above / (total - 1)
+            normalized = np.where(metric_values == 0, 0.0, normalized)
+            # Same operations, in the same order, as _rescore
+            raw_score = raw_score + self.weights[metric] * normalized
+
+        scores = [round(v, 2) for v in (raw_score * 100).tolist()]
+        counts = np.bincount(
+            [round(score * 100) for score in scores], minlength=SCORE_BUCKETS
+        )
+        self.score_index = CountIndex.from_counts(counts.tolist())
+
+        previous = self.scores
+        self.scores = dict(zip(uuids, scores))
+        return {u: s for u, s in self.scores.items() if previous.get(u) != s}
+
+    def settle(self) -> Dict[str, float]:
+        """
+        Rescore the whole board if players joined or left since the last
+        call. Returns the new academy score of every player whose score
+        changed.
+        """
+        if not self.pending:
+            return {}
+        self.pending = False
+        return self._rescore_all()
+
+    def update(
+        self, uuid: str, metrics: Optional[Dict[str, float]]
+    ) -> Optional[Dict[str, float]]:
+        """
+        Set a player's raw metric values, or remove the player with None.
+        Returns the new academy score of every player whose score changed,
+        or None when the player joined or left and the board is pending.
+        """
+        return self.update_many({uuid: metrics})
+
+    def update_many(
+        self, changes: Dict[str, Optional[Dict[str, float]]]
+    ) -> Optional[Dict[str, float]]:
+        """update() for several players, rescoring each affected player once."""
+        moves = []
+        membership_changed = False
+        for uuid, metrics in changes.items():
+            previous = self.values.get(uuid)
+            if previous is not None:
+                self._remove(uuid)
+            if metrics is None:
+                if previous is not None:
+                    score = self.scores.pop(uuid)
+                    self.score_index.add(round(score * 100), -1)
+                    membership_changed = True
+                continue
+            values = tuple(_index_value(metrics.get(m)) for m in METRICS)
+            self._insert(uuid, values)
+            if previous is None:
+                membership_changed = True
+            else:
+                moves.append((uuid, previous, values))
+
+        if membership_changed or self.pending:
+            # Every score moves, settle() rescores them all at once
+            self.pending = True
+            return None
+
+        affected = set()
+        for uuid, previous, values in moves:
+            affected.add(uuid)
+            for metric, old, new in zip(METRICS, previous, values):
+                if old == new:
+                    continue
+                # Players valued in [low, high) gained or lost a player above
+                # them. Zero stays at 0.0 whatever the rank.
+                low, high = min(old, new), max(old, new)
+                distinct = self.distinct[metric]
+                start = bisect_left(distinct, max(low, 1))
+                for value in distinct[start : bisect_left(distinct, high, start)]:
+                    affected |= self.holders[metric][value]
+        return self._rescore(affected)
+
+    def entry(self, uuid: str) -> Optional[AcademyRankEntry]:
+        if uuid not in self.values:
+            return None
+        self.settle()
+        score = self.scores[uuid]
+        return AcademyRankEntry(
+            uuid=uuid,
+            academyRank=self.score_index.count_above(round(score * 100)) + 1,
+            academyScore=score,
+            ranks={metric: self.rank(uuid, metric) for metric in METRICS},
+            normalized={metric: self.normalized(uuid, metric) for metric in METRICS},
+            totalPlayers=len(self.values),
+        )
+
+    def percentile(self, score: float) -> float:
+        """Percentage of players with a strictly lower academy score."""
+        if not self.values:
+            return 0.0
+        self.settle()
+        below = self.score_index.count_at_most(round(score * 100) - 1)
+        return round(below / len(self.values) * 100, 2)
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger("uvicorn")
+
+
+class SingleFlightCache:
+    """
+    Stale-while-revalidate cache around an expensive async loader.
+
+    At most one load runs at a time and every caller waiting on it shares its
+    result. Once a value exists, expired reads return it immediately and
+    trigger a background refresh instead of blocking.
+    """
+
+    def __init__(
+        self, name: str, loader: Callable[[], Awaitable[Any]], ttl_seconds: float
+    ):
+        self.name = name
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.value: Any = None
+        self.loaded_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.failures = 0
+        self.last_refresh_seconds = 0.0
+        self.total_refresh_seconds = 0.0
+
+    def is_stale(self) -> bool:
+        return (
+            self.loaded_at is None
+            or time.monotonic() - self.loaded_at >= self.ttl_seconds
+        )
+
+    async def get(self) -> Any:
+        if self.loaded_at is None:
+            self.misses += 1
+            return await asyncio.shield(self._start_refresh())
+
+        if self.is_stale():
+            self.stale_hits += 1
+            self._start_refresh()
+        else:
+            self.hits += 1
+        return self.value
+
+    async def refresh(self) -> Any:
+        """Force a reload, joining the one already in flight if any."""
+        return await asyncio.shield(self._start_refresh())
+
+    def prime(self, value: Any) -> None:
+        """
+        Seed the cache with a value loaded from elsewhere, already expired so
+        the first read serves it while a refresh replaces it.
+        """
+        self.value = value
+        self.loaded_at = time.monotonic() - self.ttl_seconds
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._load())
+        return self._task
+
+    async def _load(self) -> Any:
+        started = time.monotonic()
+        try:
+            value = await self.loader()
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Cache refresh failed for {self.name}: {e}")
+            if self.loaded_at is None:
+                raise
+            return self.value
+
+        duration = time.monotonic() - started
+        self.value = value
+        self.loaded_at = time.monotonic()
+        self.refreshes += 1
+        self.last_refresh_seconds = duration
+        self.total_refresh_seconds += duration
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        age = None if self.loaded_at is None else time.monotonic() - self.loaded_at
+        return {
+            "hits": self.hits,
+            "staleHits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "refreshing": self._task is not None and not self._task.done(),
+            "ageSeconds": age,
+            "lastRefreshSeconds": self.last_refresh_seconds,
+            "totalRefreshSeconds": self.total_refresh_seconds,
+        }
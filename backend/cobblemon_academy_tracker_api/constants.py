@@ -1 +1,8 @@
-TOTAL_COBBLEMON_SPECIES = 722
+# Academy score weights per profile, selectable with ?profile= on
+# /leaderboards/academy. Seasonal events add their own entry here.
+ACADEMY_WEIGHT_PRESETS = {
+    "default": {"pokedex": 0.35, "shiny": 0.30, "battles": 0.25, "eggs": 0.10},
+    "shiny-hunt": {"pokedex": 0.20, "shiny": 0.55, "battles": 0.15, "eggs": 0.10},
+    "battle-season": {"pokedex": 0.20, "shiny": 0.15, "battles": 0.55, "eggs": 0.10},
+    "breeding-week": {"pokedex": 0.20, "shiny": 0.20, "battles": 0.15, "eggs": 0.45},
+}
@@ -1,5 +1,10 @@
 import os
+import threading
+from typing import Dict
+
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReadPreference
+from pymongo.monitoring import ConnectionPoolListener
 
 from dotenv import load_dotenv
 
@@ -10,6 +15,118 @@ load_dotenv(
 MONGO_URL = os.environ["MONGO_URL"]
 DB_NAME = os.environ["DB_NAME"]
 
+# Environment variable -> (client option, type). Unset variables leave the
+# option to MONGO_URL or the driver default.
+MONGO_CLIENT_SETTINGS = {
+    "MONGO_MAX_POOL_SIZE": ("maxPoolSize", int),
+    "MONGO_MIN_POOL_SIZE": ("minPoolSize", int),
+    "MONGO_MAX_IDLE_TIME_MS": ("maxIdleTimeMS", int),
+    "MONGO_WAIT_QUEUE_TIMEOUT_MS": ("waitQueueTimeoutMS", int),
+    "MONGO_CONNECT_TIMEOUT_MS": ("connectTimeoutMS", int),
+    "MONGO_SOCKET_TIMEOUT_MS": ("socketTimeoutMS", int),
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS": ("serverSelectionTimeoutMS", int),
+    # e.g. "zstd,snappy,zlib"; zstd and snappy need the zstandard and
+    # python-snappy packages, the driver skips them otherwise
+    "MONGO_COMPRESSORS": ("compressors", str),
+}
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+# Read preference of the whole-collection scans (leaderboards, stats), e.g.
+# "secondaryPreferred" to keep them off the primary. Point reads always use
+# the client's read preference.
+SCAN_READ_PREFERENCE = READ_PREFERENCES.get(
+    os.environ.get("MONGO_SCAN_READ_PREFERENCE", "")
+)
+
+
+def client_options() -> Dict:
+    options = {}
+    for variable, (option, kind) in MONGO_CLIENT_SETTINGS.items():
+        value = os.environ.get(variable)
+        if value:
+            options[option] = kind(value)
+    return options
+
+
+class PoolStatsListener(ConnectionPoolListener):
+    """
+    Per-server connection pool counters. The driver calls these from its own
+    threads, hence the lock.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.servers: Dict[str, Dict[str, float]] = {}
+
+    def _server(self, address) -> Dict[str, float]:
+        key = f"{address[0]}:{address[1]}"
+        server = self.servers.get(key)
+        if server is None:
+            server = self.servers[key] = {
+                "open": 0,
+                "inUse": 0,
+                "checkouts": 0,
+                "checkoutFailures": 0,
+                "checkoutWaitMs": 0.0,
+                "cleared": 0,
+            }
+        return server
+
+    def _add(self, address, **deltas) -> None:
+        with self.lock:
+            server = self._server(address)
+            for field, delta in deltas.items():
+                server[field] += delta
+
+    def pool_created(self, event):
+        self._add(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._add(event.address, cleared=1)
+
+    def pool_closed(self, event):
+        with self.lock:
+            self.servers.pop(f"{event.address[0]}:{event.address[1]}", None)
+
+    def connection_created(self, event):
+        self._add(event.address, open=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add(event.address, open=-1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._add(event.address, checkoutFailures=1)
+
+    def connection_checked_out(self, event):
+        waited = (getattr(event, "duration", None) or 0) * 1000
+        self._add(event.address, inUse=1, checkouts=1, checkoutWaitMs=waited)
+
+    def connection_checked_in(self, event):
+        self._add(event.address, inUse=-1)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self.lock:
+            return {key: dict(server) for key, server in self.servers.items()}
+
+
+POOL_STATS = PoolStatsListener()
+
 
 class Database:
     client: AsyncIOMotorClient = None
@@ -23,7 +140,9 @@ async def get_database() -> AsyncIOMotorClient:
 
 
 async def connect_to_mongo():
-    db.client = AsyncIOMotorClient(MONGO_URL)
+    db.client = AsyncIOMotorClient(
+        MONGO_URL, event_listeners=[POOL_STATS], **client_options()
+    )
     print("Connected to MongoDB")
 
 
@@ -32,5 +151,21 @@ async def close_mongo_connection():
     print("Closed MongoDB connection")
 
 
-def get_collection(collection_name: str):
-    return db.client[DB_NAME][collection_name]
+def get_collection(collection_name: str, scan: bool = False):
+    """`scan` marks whole-collection reads, sent per SCAN_READ_PREFERENCE."""
+    collection = db.client[DB_NAME][collection_name]
+    if scan and SCAN_READ_PREFERENCE is not None:
+        return collection.with_options(read_preference=SCAN_READ_PREFERENCE)
+    return collection
+
+
+def pool_status() -> Dict:
+    options = db.client.options.pool_options if db.client is not None else None
+    return {
+        "maxPoolSize": options.max_pool_size if options else None,
+        "minPoolSize": options.min_pool_size if options else None,
+        "scanReadPreference": (
+            SCAN_READ_PREFERENCE.mongos_mode if SCAN_READ_PREFERENCE else "client"
+        ),
+        "servers": POOL_STATS.snapshot(),
+    }
@@ -0,0 +1,140 @@
+"""
+Index bootstrap and query-plan checks for the collections the API reads.
+
+Runs from the lifespan hook, or by hand:
+
+    python -m cobblemon_academy_tracker_api.indexes
+
+which exits non-zero when a hot query is not served by an index.
+"""
+
+import asyncio
+import logging
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import PyMongoError
+
+from cobblemon_academy_tracker_api import database
+from cobblemon_academy_tracker_api.database import get_collection
+
+logger = logging.getLogger("uvicorn")
+
+SOURCE_COLLECTIONS = (
+    "PlayerDataCollection",
+    "PlayerPartyCollection",
+    "PCCollection",
+    "PokeDexCollection",
+)
+
+
+def _uuid_index(unique: bool = False) -> IndexModel:
+    return IndexModel([("uuid", ASCENDING)], name="uuid", unique=unique)
+
+
+# The source collections are written by the game server, so their uuid
+# indexes are not unique: a duplicate there must not keep indexes from being
+# built. Leaderboards are ranked from the stats table and need no sort index.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "PlayerDataCollection": [_uuid_index()],
+    "PlayerPartyCollection": [_uuid_index()],
+    "PCCollection": [_uuid_index()],
+    "PokeDexCollection": [_uuid_index()],
+    "UserCache": [_uuid_index(unique=True)],
+}
+
+# Any uuid does, explain() only needs the shape of the query
+SAMPLE_UUID = "00000000-0000-0000-0000-000000000000"
+
+# (description, collection, filter, sort) of the queries on the request path.
+# The stats refresh reads whole collections by design and is not listed.
+HOT_QUERIES: List[Tuple[str, str, Dict, Optional[List[Tuple[str, int]]]]] = [
+    *(
+        (f"{name} by uuid", name, {"uuid": SAMPLE_UUID}, None)
+        for name in SOURCE_COLLECTIONS
+    ),
+    ("UserCache by uuids", "UserCache", {"uuid": {"$in": [SAMPLE_UUID]}}, None),
+]
+
+
+async def ensure_indexes() -> Dict[str, List[str]]:
+    """
+    Create every index in INDEXES. Existing identical indexes are a no-op;
+    failures (conflicting options, missing privileges) are logged and skipped.
+    """
+    created: Dict[str, List[str]] = {}
+    for name, models in INDEXES.items():
+        try:
+            created[name] = await get_collection(name).create_indexes(models)
+        except PyMongoError as e:
+            logger.error(f"Could not create indexes on {name}: {e}")
+    return created
+
+
+def _plan_stages(plan) -> List[str]:
+    """Every stage name in an explain() plan, whatever its nesting format."""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages += _plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            stages += _plan_stages(value)
+    return stages
+
+
+async def verify_query_plans() -> List[str]:
+    """
+    explain() each hot query and log the ones the planner would answer with
+    a collection scan or an in-memory sort. Returns their descriptions.
+    """
+    problems = []
+    for description, name, query, sort in HOT_QUERIES:
+        cursor = get_collection(name).find(query, {"_id": 0, "uuid": 1}).limit(10)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            explain = await cursor.explain()
+        except PyMongoError as e:
+            logger.error(f"Could not explain {description}: {e}")
+            continue
+
+        stages = _plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+        if "COLLSCAN" in stages:
+            logger.warning(f"Query plan check: {description} uses a COLLSCAN")
+            problems.append(description)
+        elif "SORT" in stages:
+            logger.warning(f"Query plan check: {description} sorts in memory")
+            problems.append(description)
+
+    if not problems:
+        logger.info(f"Query plan check: all {len(HOT_QUERIES)} hot queries use indexes")
+    return problems
+
+
+async def bootstrap_indexes() -> None:
+    await ensure_indexes()
+    await verify_query_plans()
+
+
+async def main() -> int:
+    logging.basicConfig(level=logging.INFO)
+    await database.connect_to_mongo()
+    try:
+        created = await ensure_indexes()
+        for name, indexes in created.items():
+            print(f"{name}: {', '.join(indexes)}")
+        problems = await verify_query_plans()
+    finally:
+        await database.close_mongo_connection()
+
+    for description in problems:
+        print(f"not index-backed: {description}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,284 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, Optional, Set
+
+from cobblemon_academy_tracker_api.database import get_database
+from cobblemon_academy_tracker_api.stats import (
+    SOURCES,
+    STATS_REFRESH_INTERVAL_SECONDS,
+    STATS_STATE,
+    apply_change,
+    player_metrics,
+    refresh_player_stats,
+    resync_source,
+)
+
+logger = logging.getLogger("uvicorn")
+
+# "changestream" (falls back to polling when unavailable), "poll" or "off"
+LIVE_UPDATES_MODE = os.environ.get("LIVE_UPDATES", "changestream")
+LIVE_BATCH_MILLISECONDS = 500
+LIVE_RETRY_SECONDS = 60
+SUBSCRIBER_QUEUE_SIZE = 256
+# Batches touching more players only announce a leaderboard change
+MAX_PLAYER_EVENTS_PER_BATCH = 500
+
+LIVE_STATE: Dict = {
+    "mode": "off",
+    "task": None,
+    "batches": 0,
+    "changes": 0,
+    "last_batch_at": None,
+    "error": None,
+}
+SUBSCRIBERS: Set[asyncio.Queue] = set()
+
+
+@dataclass(slots=True)
+class ChangeEvent:
+    """
+    One change to a source collection. `uuid` is None when the change can't
+    be attributed to a player (deletes without a pre-image, drops), in which
+    case the whole collection is resynced. `collection` is None for changes
+    affecting every source.
+    """
+
+    collection: Optional[str]
+    uuid: Optional[str] = None
+    document: Optional[Dict] = None
+
+
+async def apply_event(event: ChangeEvent) -> Set[str]:
+    """Apply one change to the stats table, returning the uuids it touched."""
+    if event.collection is None:
+        return await refresh_player_stats(force=True)
+    if event.collection not in SOURCES:
+        return set()
+    if event.uuid is None:
+        return await resync_source(event.collection)
+    apply_change(event.collection, event.uuid, event.document)
+    return {event.uuid}
+
+
+# --- Event sources ---
+#
+# A source yields batches of uuids whose stats it has just updated. Each one
+# starts with a full refresh so the table is complete before deltas apply.
+
+
+class PollingSource:
+    """Fingerprint refresh on an interval, for servers without change streams."""
+
+    name = "poll"
+
+    def __init__(self, interval: float = STATS_REFRESH_INTERVAL_SECONDS):
+        self.interval = interval
+
+    async def batches(self) -> AsyncIterator[Set[str]]:
+        while True:
+            changed = await refresh_player_stats(force=True)
+            if changed:
+                yield changed
+            await asyncio.sleep(self.interval)
+
+
+class ChangeStreamSource:
+    """MongoDB change stream over the source collections (replica sets only)."""
+
+    name = "changestream"
+
+    def __init__(self, batch_milliseconds: int = LIVE_BATCH_MILLISECONDS):
+        self.batch_milliseconds = batch_milliseconds
+
+    @staticmethod
+    def to_event(change: Dict) -> ChangeEvent:
+        collection = change.get("ns", {}).get("coll")
+        doc = change.get("fullDocument")
+        if doc is None or "uuid" not in doc:
+            return ChangeEvent(collection)
+        return ChangeEvent(collection, doc["uuid"], doc)
+
+    async def batches(self) -> AsyncIterator[Set[str]]:
+        pipeline = [{"$match": {"ns.coll": {"$in": list(SOURCES)}}}]
+        database = await get_database()
+        async with database.watch(
+            pipeline,
+            full_document="updateLookup",
+            max_await_time_ms=self.batch_milliseconds,
+        ) as stream:
+            # Opening the cursor before the full refresh means nothing written
+            # in between is missed, at worst it is applied twice.
+            change = await stream.try_next()
+            yield await refresh_player_stats(force=True)
+
+            batch: Set[str] = set()
+            while stream.alive:
+                if change is not None:
+                    batch |= await apply_event(self.to_event(change))
+                change = await stream.try_next()
+                if change is None and batch:
+                    yield batch
+                    batch = set()
+            if batch:
+                yield batch
+
+
+class LocalEventSource:
+    """
+    In-process stand-in for a change stream. Whoever writes to the source
+    collections calls publish() with the new document (None once deleted).
+    """
+
+    name = "local"
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    def publish(
+        self, collection: str, uuid: str, document: Optional[Dict] = None
+    ) -> None:
+        self.queue.put_nowait(ChangeEvent(collection, uuid, document))
+
+    async def batches(self) -> AsyncIterator[Set[str]]:
+        yield await refresh_player_stats(force=True)
+        while True:
+            batch = await apply_event(await self.queue.get())
+            while not self.queue.empty():
+                batch |= await apply_event(self.queue.get_nowait())
+            if batch:
+                yield batch
+
+
+SOURCE_MODES: Dict[str, Callable[[], object]] = {
+    "changestream": ChangeStreamSource,
+    "poll": PollingSource,
+}
+
+
+# --- Fan-out ---
+
+
+def subscribe() -> asyncio.Queue:
+    queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+    SUBSCRIBERS.add(queue)
+    return queue
+
+
+def unsubscribe(queue: asyncio.Queue) -> None:
+    SUBSCRIBERS.discard(queue)
+
+
+def publish(event: Dict) -> None:
+    for queue in SUBSCRIBERS:
+        if queue.full():
+            # A slow client loses its oldest events rather than blocking others
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+
+def player_delta(uuid: str) -> Dict:
+    metrics = player_metrics(uuid)
+    if metrics is None:
+        return {"uuid": uuid, "removed": True}
+    return {"uuid": uuid, **metrics}
+
+
+def announce(changed: Set[str]) -> None:
+    LIVE_STATE["batches"] += 1
+    LIVE_STATE["changes"] += len(changed)
+    LIVE_STATE["last_batch_at"] = time.time()
+
+    if len(changed) <= MAX_PLAYER_EVENTS_PER_BATCH:
+        for uuid in changed:
+            publish({"event": "player", "data": player_delta(uuid)})
+    publish(
+        {
+            "event": "leaderboards",
+            "data": {"version": STATS_STATE["version"], "players": len(changed)},
+        }
+    )
+
+
+async def consume(source) -> None:
+    """Run one source until it ends, announcing every batch it applies."""
+    LIVE_STATE["mode"] = source.name
+    STATS_STATE["live"] = True
+    try:
+        async for changed in source.batches():
+            if changed:
+                announce(changed)
+    finally:
+        STATS_STATE["live"] = False
+
+
+async def run_live_updates(make_source: Callable[[], object]) -> None:
+    """
+    Keep the stats table current from `make_source()`. When it fails (e.g.
+    change streams on a standalone server) poll for LIVE_RETRY_SECONDS
+    before trying it again.
+    """
+    while True:
+        source = make_source()
+        try:
+            await consume(source)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            LIVE_STATE["error"] = repr(e)
+            logger.warning(
+                f"Live updates from {source.name} stopped ({e!r}), "
+                f"polling for {LIVE_RETRY_SECONDS}s"
+            )
+            try:
+                await asyncio.wait_for(consume(PollingSource()), LIVE_RETRY_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            except Exception as e:
+                LIVE_STATE["error"] = repr(e)
+                logger.error(f"Live polling fallback failed: {e!r}")
+                await asyncio.sleep(LIVE_RETRY_SECONDS)
+
+
+def start_live_updates(
+    make_source: Optional[Callable[[], object]] = None,
+) -> Optional[asyncio.Task]:
+    """
+    Start the background updater. `make_source` overrides the LIVE_UPDATES
+    setting, e.g. to feed it from a LocalEventSource.
+    """
+    if make_source is None:
+        make_source = SOURCE_MODES.get(LIVE_UPDATES_MODE)
+    if make_source is None:
+        logger.info("Live updates disabled")
+        return None
+
+    LIVE_STATE["task"] = asyncio.create_task(run_live_updates(make_source))
+    return LIVE_STATE["task"]
+
+
+async def stop_live_updates() -> None:
+    task = LIVE_STATE["task"]
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    LIVE_STATE["task"] = None
+    LIVE_STATE["mode"] = "off"
+
+
+def live_status() -> Dict:
+    return {
+        "mode": LIVE_STATE["mode"],
+        "subscribers": len(SUBSCRIBERS),
+        "batches": LIVE_STATE["batches"],
+        "changes": LIVE_STATE["changes"],
+        "lastBatchAt": LIVE_STATE["last_batch_at"],
+        "error": LIVE_STATE["error"],
+        "statsVersion": STATS_STATE["version"],
+    }
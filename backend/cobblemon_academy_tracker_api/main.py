@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -5,13 +6,48 @@ from cobblemon_academy_tracker_api.database import (
     connect_to_mongo,
     close_mongo_connection,
 )
-from cobblemon_academy_tracker_api.routers import players, leaderboards
+from cobblemon_academy_tracker_api.indexes import bootstrap_indexes
+from cobblemon_academy_tracker_api.live import start_live_updates, stop_live_updates
+from cobblemon_academy_tracker_api.routers import (
+    export,
+    leaderboards,
+    live,
+    players,
+    stats,
+)
+from cobblemon_academy_tracker_api.scheduler import start_scheduler, stop_scheduler
+from cobblemon_academy_tracker_api.services import (
+    close_http_client,
+    open_http_client,
+    start_username_worker,
+    stop_username_worker,
+)
+from cobblemon_academy_tracker_api.snapshots import load_snapshot, save_snapshot
+from cobblemon_academy_tracker_api.workers import elect_leader, release_leadership
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await connect_to_mongo()
+    open_http_client()
+    start_username_worker()
+    # In the background: a first index build must not hold up startup
+    index_task = asyncio.create_task(bootstrap_indexes())
+    # Serve the previous run's results until the first refresh lands
+    load_snapshot()
+    # With several workers only the leader reads the sources, the others
+    # follow its snapshots
+    if elect_leader() != "follower":
+        start_live_updates()
+    start_scheduler()
     yield
+    await stop_scheduler()
+    index_task.cancel()
+    await stop_live_updates()
+    await save_snapshot(force=True)
+    release_leadership()
+    await stop_username_worker()
+    await close_http_client()
     await close_mongo_connection()
 
 
@@ -34,6 +70,9 @@ app.add_middleware(
 
 app.include_router(players.router)
 app.include_router(leaderboards.router)
+app.include_router(live.router)
+app.include_router(stats.router)
+app.include_router(export.router)
 
 
 @app.get("/")
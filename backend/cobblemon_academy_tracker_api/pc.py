@@ -0,0 +1,232 @@
+import logging
+import re
+from typing import Dict, List, Optional, Tuple
+
+from pymongo.errors import OperationFailure
+
+from cobblemon_academy_tracker_api.database import get_collection
+from cobblemon_academy_tracker_api.schemas import Pokemon
+
+logger = logging.getLogger("uvicorn")
+
+DEFAULT_BOX_COUNT = 50
+
+
+def _slot_condition(shiny: Optional[bool], species: Optional[str]) -> Dict:
+    # Only a structural check: the slots of the requested page are validated
+    # into Pokemon models, invalid ones are left out of that page
+    conditions = [
+        {"$regexMatch": {"input": "$$slot.k", "regex": "^Slot"}},
+        {"$eq": [{"$type": "$$slot.v"}, "object"]},
+    ]
+    if shiny is not None:
+        # A missing or null Shiny is False, anything but a bool never matches
+        value = {"$ifNull": ["$$slot.v.Shiny", False]}
+        conditions.append({"$eq": [{"$type": value}, "bool"]})
+        conditions.append({"$eq": [value, shiny]})
+    if species:
+        conditions.append(
+            {
+                "$cond": [
+                    {"$eq": [{"$type": "$$slot.v.Species"}, "string"]},
+                    {
+                        "$regexMatch": {
+                            "input": "$$slot.v.Species",
+                            "regex": re.escape(species),
+                            "options": "i",
+                        }
+                    },
+                    False,
+                ]
+            }
+        )
+    return {"$and": conditions}
+
+
+def pc_index_pipeline(
+    uuid: str, shiny: Optional[bool], species: Optional[str]
+) -> List[Dict]:
+    """
+    Returns {BoxCount, boxes: [{box, slots: [slot keys]}]} for the slots
+    matching the filters, in document order, without shipping any Pokemon
+    data.
+    """
+    return [
+        {"$match": {"uuid": uuid}},
+        {
+            "$project": {
+                "_id": 0,
+                "BoxCount": 1,
+                "boxes": {
+                    "$map": {
+                        "input": {
+                            "$filter": {
+                                "input": {"$objectToArray": "$$ROOT"},
+                                "as": "box",
+                                "cond": {
+                                    "$and": [
+                                        {
+                                            "$regexMatch": {
+                                                "input": "$$box.k",
+                                                "regex": "^Box",
+                                            }
+                                        },
+                                        {"$eq": [{"$type": "$$box.v"}, "object"]},
+                                    ]
+                                },
+                            }
+                        },
+                        "as": "box",
+                        "in": {
+                            "box": "$$box.k",
+                            "slots": {
+                                "$map": {
+                                    "input": {
+                                        "$filter": {
+                                            "input": {"$objectToArray": "$$box.v"},
+                                            "as": "slot",
+                                            "cond": _slot_condition(shiny, species),
+                                        }
+                                    },
+                                    "as": "slot",
+                                    "in": "$$slot.k",
+                                }
+                            },
+                        },
+                    }
+                },
+            }
+        },
+    ]
+
+
+def _index_slots(index: Dict) -> List[Dict[str, str]]:
+    return [
+        {"box": box["box"], "slot": slot}
+        for box in index.get("boxes", [])
+        for slot in box["slots"]
+    ]
+
+
+def _matches(pokemon_data, shiny: Optional[bool], species: Optional[str]) -> bool:
+    """The conditions of _slot_condition, for one slot value."""
+    if not isinstance(pokemon_data, dict):
+        return False
+    if shiny is not None:
+        value = pokemon_data.get("Shiny")
+        if (False if value is None else value) is not shiny:
+            return False
+    if species:
+        value = pokemon_data.get("Species")
+        if not isinstance(value, str) or species.lower() not in value.lower():
+            return False
+    return True
+
+
+def index_pc_document(
+    pc_doc: Dict, shiny: Optional[bool], species: Optional[str]
+) -> List[Dict[str, str]]:
+    """Pure-Python equivalent of pc_index_pipeline for a full document."""
+    slots = []
+    for box_key, box_data in pc_doc.items():
+        if not box_key.startswith("Box") or not isinstance(box_data, dict):
+            continue
+        for slot_key, pokemon_data in box_data.items():
+            if slot_key.startswith("Slot") and _matches(pokemon_data, shiny, species):
+                slots.append({"box": box_key, "slot": slot_key})
+    return slots
+
+
+def _position(key: str, prefix: str) -> Optional[int]:
+    suffix = key[len(prefix) :]
+    return int(suffix) if suffix.isdigit() else None
+
+
+def _order_slots(slots: List[Dict[str, str]], box_count: int) -> List[Tuple]:
+    """Box order by index (slots keep document order), dropping boxes past BoxCount."""
+    ordered = []
+    for slot in slots:
+        box_idx = _position(slot["box"], "Box")
+        slot_idx = _position(slot["slot"], "Slot")
+        if box_idx is None or slot_idx is None or box_idx >= box_count:
+            continue
+        ordered.append((box_idx, slot_idx, slot["box"], slot["slot"]))
+    ordered.sort(key=lambda x: x[0])
+    return ordered
+
+
+def _build_page(pc_doc: Dict, page_slots: List[Tuple]) -> List[Pokemon]:
+    pokemon = []
+    for box_idx, slot_idx, box_key, slot_key in page_slots:
+        pokemon_data = pc_doc.get(box_key, {}).get(slot_key)
+        if not pokemon_data:
+            continue
+        try:
+            p_obj = Pokemon(**pokemon_data)
+            p_obj.boxIndex = box_idx
+            p_obj.slotIndex = slot_idx
+            pokemon.append(p_obj)
+        except Exception:
+            continue
+    return pokemon
+
+
+def pc_page_from_document(
+    pc_doc: Dict,
+    page: int = 1,
+    limit: int = 50,
+    shiny: Optional[bool] = None,
+    species: Optional[str] = None,
+) -> List[Pokemon]:
+    """One page of a PC document that has already been fetched in full."""
+    start = (page - 1) * limit
+    slots = index_pc_document(pc_doc, shiny, species)
+    box_count = pc_doc.get("BoxCount", DEFAULT_BOX_COUNT)
+    return _build_page(pc_doc, _order_slots(slots, box_count)[start : start + limit])
+
+
+async def get_pc_page(
+    uuid: str,
+    page: int = 1,
+    limit: int = 50,
+    shiny: Optional[bool] = None,
+    species: Optional[str] = None,
+) -> Optional[List[Pokemon]]:
+    """
+    One page of a player's PC, or None when the player has no PC.
+
+    A first query returns only the (box, slot) keys matching the filters, a
+    second one projects just the slots of the requested page, so the cost
+    depends on the page size rather than on how full the PC is. Slots are
+    indexed by shape only: one that then fails Pokemon validation keeps its
+    position and is left out of its page.
+    """
+    collection = get_collection("PCCollection")
+    start = (page - 1) * limit
+
+    try:
+        index = [
+            doc
+            async for doc in collection.aggregate(
+                pc_index_pipeline(uuid, shiny, species)
+            )
+        ]
+    except OperationFailure as e:
+        logger.warning(f"PC index pipeline failed, filtering in Python: {e}")
+        pc_doc = await collection.find_one({"uuid": uuid})
+        if not pc_doc:
+            return None
+        return pc_page_from_document(pc_doc, page, limit, shiny, species)
+
+    if not index:
+        return None
+
+    box_count = index[0].get("BoxCount", DEFAULT_BOX_COUNT)
+    page_slots = _order_slots(_index_slots(index[0]), box_count)[start : start + limit]
+    if not page_slots:
+        return []
+
+    projection = {"_id": 0}
+    projection.update({f"{box}.{slot}": 1 for _, _, box, slot in page_slots})
+    pc_doc = await collection.find_one({"uuid": uuid}, projection)
+    return _build_page(pc_doc or {}, page_slots)
@@ -0,0 +1,39 @@
+from functools import lru_cache
+from typing import Any, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def _adapter(annotation: Any) -> TypeAdapter:
+    return TypeAdapter(annotation)
+
+
+def dump_json(content: Any, annotation: Any = None) -> bytes:
+    """
+    Serialize already-validated models straight to JSON bytes, with aliases
+    (e.g. Pokemon IVs as "cobblemon:hp") as response_model would emit them.
+    The serializer for each type is compiled once and reused.
+    """
+    return _adapter(annotation or type(content)).dump_json(content, by_alias=True)
+
+
+class ModelResponse(Response):
+    """
+    JSON response for values built from pydantic models. Returning a Response
+    makes FastAPI skip its response_model pass, which would dump the models to
+    dicts, validate them again and re-encode them; the endpoint's
+    response_model still documents the schema.
+
+    `annotation` is needed for containers, e.g. List[Pokemon].
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, content: Any, annotation: Optional[Any] = None, **kwargs):
+        self.annotation = annotation
+        super().__init__(content, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content, self.annotation)
@@ -0,0 +1,134 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from cobblemon_academy_tracker_api.academy import METRICS
+from cobblemon_academy_tracker_api.routers.leaderboards import (
+    LEADERBOARD_METRICS,
+    get_academy_snapshot,
+    resolve_academy_weights,
+)
+from cobblemon_academy_tracker_api.schemas import AcademyRankEntry
+from cobblemon_academy_tracker_api.services import resolve_usernames
+from cobblemon_academy_tracker_api.stats import ensure_player_stats, ranked_players
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+# Rows serialized (and usernames resolved) per chunk written to the client
+EXPORT_CHUNK_ROWS = 500
+EXPORT_FORMAT = Query("ndjson", pattern="^(ndjson|csv)$")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+LEADERBOARD_COLUMNS = ["rank", "uuid", "username", "value"]
+ACADEMY_COLUMNS = (
+    ["rank", "uuid", "username", "score"]
+    + [f"{metric}Rank" for metric in METRICS]
+    + [f"{metric}Normalized" for metric in METRICS]
+)
+
+
+def _encode(rows: List[Dict], columns: List[str], fmt: str) -> bytes:
+    if fmt == "csv":
+        buffer = io.StringIO()
+        csv.DictWriter(buffer, columns, lineterminator="\n").writerows(rows)
+        return buffer.getvalue().encode()
+    return "".join(json.dumps(row) + "\n" for row in rows).encode()
+
+
+def _header(columns: List[str], fmt: str) -> bytes:
+    return (",".join(columns) + "\n").encode() if fmt == "csv" else b""
+
+
+def _export_response(body: AsyncIterator[bytes], name: str, fmt: str):
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
+
+
+def _slices(rows: List) -> Iterable[List]:
+    for start in range(0, len(rows), EXPORT_CHUNK_ROWS):
+        yield rows[start : start + EXPORT_CHUNK_ROWS]
+
+
+async def _stream_leaderboard(metric: str, fmt: str) -> AsyncIterator[bytes]:
+    yield _header(LEADERBOARD_COLUMNS, fmt)
+    await ensure_player_stats()
+    rank = 0
+    for chunk in _slices(ranked_players(metric)):
+        usernames = await resolve_usernames(uuid for uuid, _ in chunk)
+        rows = []
+        for uuid, value in chunk:
+            rank += 1
+            rows.append(
+                {
+                    "rank": rank,
+                    "uuid": uuid,
+                    "username": usernames[uuid],
+                    "value": value,
+                }
+            )
+        yield _encode(rows, LEADERBOARD_COLUMNS, fmt)
+
+
+async def _stream_academy(
+    entries: List[AcademyRankEntry], fmt: str
+) -> AsyncIterator[bytes]:
+    yield _header(ACADEMY_COLUMNS, fmt)
+    for chunk in _slices(entries):
+        usernames = await resolve_usernames(entry.uuid for entry in chunk)
+        rows = []
+        for entry in chunk:
+            row = {
+                "rank": entry.academyRank,
+                "uuid": entry.uuid,
+                "username": usernames[entry.uuid],
+                "score": entry.academyScore,
+            }
+            for metric in METRICS:
+                row[f"{metric}Rank"] = entry.ranks[metric]
+                row[f"{metric}Normalized"] = entry.normalized[metric]
+            rows.append(row)
+        yield _encode(rows, ACADEMY_COLUMNS, fmt)
+
+
+@router.get("/leaderboards/{category}")
+async def export_leaderboard(category: str, format: str = EXPORT_FORMAT):
+    """
+    Every row of a leaderboard as NDJSON or CSV, streamed from the cached
+    ranking a chunk at a time.
+    """
+    metric = LEADERBOARD_METRICS.get(category)
+    if metric is None:
+        raise HTTPException(status_code=404, detail=f"Unknown category '{category}'")
+    return _export_response(
+        _stream_leaderboard(metric, format), f"leaderboard-{category}", format
+    )
+
+
+@router.get("/academy")
+async def export_academy(
+    format: str = EXPORT_FORMAT,
+    profile: str = "default",
+    w_pokedex: Optional[float] = Query(None, ge=0),
+    w_shiny: Optional[float] = Query(None, ge=0),
+    w_battles: Optional[float] = Query(None, ge=0),
+    w_eggs: Optional[float] = Query(None, ge=0),
+):
+    """The full academy board from the cached ranks, as NDJSON or CSV."""
+    weights = resolve_academy_weights(
+        profile,
+        {
+            "pokedex": w_pokedex,
+            "shiny": w_shiny,
+            "battles": w_battles,
+            "eggs": w_eggs,
+        },
+    )
+    snapshot = await get_academy_snapshot(weights)
+    return _export_response(
+        _stream_academy(snapshot.entries, format), "academy", format
+    )
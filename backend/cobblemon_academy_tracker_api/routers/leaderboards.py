@@ -1,46 +1,118 @@
-from typing import List, Dict
-from datetime import datetime, timedelta
-from fastapi import APIRouter
-from cobblemon_academy_tracker_api.database import get_collection
-from cobblemon_academy_tracker_api.schemas import LeaderboardEntry, AcademyRankEntry
-from cobblemon_academy_tracker_api.services import resolve_username
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Any, List, Dict, Optional, Set, Tuple
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from cobblemon_academy_tracker_api.academy import (
+    DEFAULT_WEIGHTS,
+    METRICS,
+    AcademyMetrics,
+    AcademyRankEngine,
+    AcademySnapshot,
+)
+from cobblemon_academy_tracker_api.constants import ACADEMY_WEIGHT_PRESETS
+from cobblemon_academy_tracker_api.live import MAX_PLAYER_EVENTS_PER_BATCH, publish
+from cobblemon_academy_tracker_api.responses import ModelResponse, dump_json
+from cobblemon_academy_tracker_api.scheduler import JOBS
+from cobblemon_academy_tracker_api.schemas import (
+    LeaderboardEntry,
+    LeaderboardResponse,
+    AcademyRankEntry,
+    AcademyRankResponse,
+)
+from cobblemon_academy_tracker_api.services import RESOLVER_STATE, resolve_usernames
+from cobblemon_academy_tracker_api.stats import (
+    ACADEMY_CACHE,
+    SOURCE_STATUS,
+    STATS_LISTENERS,
+    STATS_REFRESH_INTERVAL_SECONDS,
+    STATS_STATE,
+    ensure_player_stats,
+    metric_scores,
+    player_metrics,
+    ranked_players,
+)
 
 router = APIRouter(prefix="/leaderboards", tags=["leaderboards"])
 
-
-async def get_pokedex_leaderboard(limit: int = 10) -> List[LeaderboardEntry]:
-    scores = await _scan_collections_for_pokedex()
-    sorted_items = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:limit]
-
-    results = []
-    for i, (uuid, value) in enumerate(sorted_items, start=1):
-        username = await resolve_username(uuid)
-        results.append(
-            LeaderboardEntry(uuid=uuid, username=username, value=value, rank=i)
-        )
-    return results
-
-
-async def get_shiny_leaderboard(limit: int = 10) -> List[LeaderboardEntry]:
-    scores = await _scan_collections_for_shiny()
-    sorted_items = sorted(scores.items(), key=lambda x: x[1], reverse=True)[:limit]
-
-    results = []
-    for i, (uuid, value) in enumerate(sorted_items, start=1):
-        username = await resolve_username(uuid)
-        results.append(
-            LeaderboardEntry(uuid=uuid, username=username, value=value, rank=i)
-        )
-    return results
+MAX_PAGE_SIZE = 1000
+
+# category -> stats table metric it ranks
+LEADERBOARD_METRICS = {
+    "pokedex": "pokedex",
+    "shiny": "shiny",
+    "captures": "captures",
+    "battles": "battles",
+    "breeders": "eggs",
+    "aspects": "aspects",
+}
+
+# Pages the frontend asks for, rendered ahead of requests by the scheduler
+PRECOMPUTED_PAGES = [(category, 10, 0) for category in LEADERBOARD_METRICS] + [
+    ("shiny", 5, 0)
+]
+
+LEADERBOARD_CACHE_SIZE = 256
+LEADERBOARD_MAX_AGE_SECONDS = STATS_REFRESH_INTERVAL_SECONDS
+LEADERBOARD_STALE_SECONDS = 60
+# (category, limit, offset) -> ((stats, usernames) version, ETag, serialized page)
+LEADERBOARD_RESPONSES: "OrderedDict[Tuple[str, int, int], Tuple[Tuple[int, int], str, bytes]]" = OrderedDict()
+
+
+async def get_stats_leaderboard(
+    category: str, metric: str, limit: int = 10, offset: int = 0
+) -> LeaderboardResponse:
+    await ensure_player_stats()
+    ranking = ranked_players(metric)
+    page = ranking[offset : offset + limit]
+
+    usernames = await resolve_usernames(uuid for uuid, _ in page)
+
+    return LeaderboardResponse(
+        category=category,
+        totalPlayers=len(ranking),
+        limit=limit,
+        offset=offset,
+        entries=[
+            LeaderboardEntry(uuid=uuid, username=usernames[uuid], value=value, rank=i)
+            for i, (uuid, value) in enumerate(page, start=offset + 1)
+        ],
+    )
 
 
-@router.get("/academy", response_model=List[AcademyRankEntry])
-async def get_academy_endpoint(limit: int = 100):
+async def with_usernames(entries: List[AcademyRankEntry]) -> List[AcademyRankEntry]:
+    """Copies of cached academy entries with their usernames filled in."""
+    usernames = await resolve_usernames(entry.uuid for entry in entries)
+    return [
+        entry.model_copy(update={"username": usernames[entry.uuid]})
+        for entry in entries
+    ]
+
+
+@router.get("/academy", response_model=AcademyRankResponse)
+async def get_academy_endpoint(
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    profile: str = "default",
+    w_pokedex: Optional[float] = Query(None, ge=0),
+    w_shiny: Optional[float] = Query(None, ge=0),
+    w_battles: Optional[float] = Query(None, ge=0),
+    w_eggs: Optional[float] = Query(None, ge=0),
+):
+    weights = resolve_academy_weights(
+        profile,
+        {
+            "pokedex": w_pokedex,
+            "shiny": w_shiny,
+            "battles": w_battles,
+            "eggs": w_eggs,
+        },
+    )
     try:
         print("Calculating Academy Ranks...")
-        results = await get_academy_leaderboard(limit)
-        print(f"Calculation done. Got {len(results)} results.")
-        return results
+        results = await get_academy_leaderboard(limit, offset, weights)
+        print(f"Calculation done. Got {len(results.entries)} results.")
+        return ModelResponse(results)
     except Exception as e:
         import traceback
 
@@ -49,324 +121,241 @@ async def get_academy_endpoint(limit: int = 100):
         raise e
 
 
-@router.get("/{category}", response_model=List[LeaderboardEntry])
-async def get_leaderboard(category: str, limit: int = 10):
-    if category == "pokedex":
-        return await get_pokedex_leaderboard(limit)
-
-    if category == "shiny":
-        return await get_shiny_leaderboard(limit)
-
-    collection = get_collection("PlayerDataCollection")
-
-    sort_field = ""
-    pipeline = None
-
-    if category == "captures":
-        sort_field = "advancementData.totalCaptureCount"
-    elif category == "battles":
-        pipeline = [
-            {
-                "$project": {
-                    "uuid": 1,
-                    "value": {
-                        "$add": [
-                            {
-                                "$ifNull": [
-                                    "$advancementData.totalPvPBattleVictoryCount",
-                                    0,
-                                ]
-                            },
-                            {
-                                "$ifNull": [
-                                    "$advancementData.totalPvNBattleVictoryCount",
-                                    0,
-                                ]
-                            },
-                        ]
-                    },
-                }
-            },
-            {"$sort": {"value": -1}},
-            {"$limit": limit},
-        ]
-    elif category == "breeders":
-        sort_field = "advancementData.totalEggsHatched"
-    elif category == "aspects":
-        pass
+@router.get("/academy/profiles")
+async def get_academy_profiles() -> Dict[str, Dict[str, float]]:
+    return ACADEMY_WEIGHT_PRESETS
+
+
+@router.get("/academy/cache")
+async def get_academy_cache_stats() -> Dict[str, Any]:
+    return {**ACADEMY_CACHE.stats(), "sources": SOURCE_STATUS}
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison, proxies like nginx weaken ETags when compressing
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+@router.get("/{category}", response_model=LeaderboardResponse)
+async def get_leaderboard(
+    category: str,
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Leaderboard page, cached as serialized JSON until the stats version
+    changes. Every leaderboard derives from the fingerprinted source
+    collections, so a cached page with the current version is still exact,
+    and conditional requests matching its ETag get a bare 304. Usernames
+    resolved in the background since then also invalidate it.
+    """
+    await ensure_player_stats()
+    # A page cached for the current version answers a matching conditional
+    # request before anything is built or looked up
+    cached = LEADERBOARD_RESPONSES.get((category, limit, offset))
+    if cached is not None and cached[0] == _page_version() and if_none_match:
+        if _etag_matches(if_none_match, cached[1]):
+            return Response(status_code=304, headers=_page_headers(cached[1]))
+
+    etag, body = await leaderboard_page(category, limit, offset)
+    headers = _page_headers(etag)
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _page_version() -> Tuple[int, int]:
+    return STATS_STATE["version"], RESOLVER_STATE["version"]
+
+
+def _page_headers(etag: str) -> Dict[str, str]:
+    return {
+        "ETag": etag,
+        "Cache-Control": (
+            f"public, max-age={LEADERBOARD_MAX_AGE_SECONDS}, "
+            f"stale-while-revalidate={LEADERBOARD_STALE_SECONDS}"
+        ),
+    }
+
+
+async def leaderboard_page(category: str, limit: int, offset: int) -> Tuple[str, bytes]:
+    """(ETag, serialized page), rendered once per stats and usernames version."""
+    version = _page_version()
+    key = (category, limit, offset)
+
+    cached = LEADERBOARD_RESPONSES.get(key)
+    if cached is not None and cached[0] == version:
+        LEADERBOARD_RESPONSES.move_to_end(key)
     else:
-        return []
-
-    if not pipeline:
-        if category == "aspects":
-            pipeline = [
-                {
-                    "$project": {
-                        "uuid": 1,
-                        "value": {
-                            "$size": {
-                                "$objectToArray": "$advancementData.aspectsCollected"
-                            }
-                        },
-                    }
-                },
-                {"$sort": {"value": -1}},
-                {"$limit": limit},
-            ]
-        else:
-            pipeline = [
-                {"$sort": {sort_field: -1}},
-                {"$limit": limit},
-                {"$project": {"uuid": 1, "value": f"${sort_field}"}},
-            ]
-
-    cursor = collection.aggregate(pipeline)
-
-    results = []
-    rank = 1
-    async for doc in cursor:
-        username = await resolve_username(doc["uuid"])
-        results.append(
-            LeaderboardEntry(
-                uuid=doc["uuid"],
-                username=username,
-                value=doc.get("value", 0),
-                rank=rank,
-            )
+        board = await build_leaderboard(category, limit, offset)
+        body = dump_json(board)
+        etag = f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+        cached = LEADERBOARD_RESPONSES[key] = (version, etag, body)
+        while len(LEADERBOARD_RESPONSES) > LEADERBOARD_CACHE_SIZE:
+            LEADERBOARD_RESPONSES.popitem(last=False)
+
+    _, etag, body = cached
+    return etag, body
+
+
+async def build_leaderboard(
+    category: str, limit: int = 10, offset: int = 0
+) -> LeaderboardResponse:
+    metric = LEADERBOARD_METRICS.get(category)
+    if metric is None:
+        return LeaderboardResponse(
+            category=category, totalPlayers=0, limit=limit, offset=offset, entries=[]
         )
-        rank += 1
-
-    return results
-
-
-ACADEMY_CACHE: Dict = {"data": None, "expires_at": datetime.min}
-CACHE_TTL_SECONDS = 60
+    return await get_stats_leaderboard(category, metric, limit, offset)
+
+
+WEIGHT_CACHE_SIZE = 8
+
+# weights -> (metrics they were applied to, snapshot), least recently used first
+WEIGHTED_SNAPSHOTS: "OrderedDict[Tuple[float, ...], Tuple[AcademyMetrics, AcademySnapshot]]" = OrderedDict()
+
+
+def resolve_academy_weights(
+    profile: str, overrides: Dict[str, Optional[float]]
+) -> Dict[str, float]:
+    if profile not in ACADEMY_WEIGHT_PRESETS:
+        raise HTTPException(status_code=400, detail=f"Unknown profile '{profile}'")
+
+    weights = dict(ACADEMY_WEIGHT_PRESETS[profile])
+    for metric, value in overrides.items():
+        if value is not None:
+            weights[metric] = value
+
+    if sum(weights.values()) <= 0:
+        raise HTTPException(status_code=400, detail="Weights must not all be zero")
+    return weights
+
+
+async def get_academy_snapshot(
+    weights: Dict[str, float] = DEFAULT_WEIGHTS,
+) -> AcademySnapshot:
+    """
+    Academy board for a weight profile. Re-weighting reuses the cached
+    per-metric ranks, only the weighted sum and final sort are recomputed.
+    """
+    await ensure_player_stats()
+    metrics = await ACADEMY_CACHE.get()
+    key = tuple(weights[metric] for metric in METRICS)
+
+    cached = WEIGHTED_SNAPSHOTS.get(key)
+    if cached is not None and cached[0] is metrics:
+        WEIGHTED_SNAPSHOTS.move_to_end(key)
+        return cached[1]
+
+    snapshot = AcademySnapshot(metrics.weigh(weights))
+    WEIGHTED_SNAPSHOTS[key] = (metrics, snapshot)
+    WEIGHTED_SNAPSHOTS.move_to_end(key)
+    while len(WEIGHTED_SNAPSHOTS) > WEIGHT_CACHE_SIZE:
+        WEIGHTED_SNAPSHOTS.popitem(last=False)
+    return snapshot
+
+
+async def get_academy_leaderboard(
+    limit: int = 100, offset: int = 0, weights: Dict[str, float] = DEFAULT_WEIGHTS
+) -> AcademyRankResponse:
+    snapshot = await get_academy_snapshot(weights)
+    return AcademyRankResponse(
+        totalPlayers=len(snapshot),
+        limit=limit,
+        offset=offset,
+        weights=weights,
+        entries=await with_usernames(snapshot.entries[offset : offset + limit]),
+    )
 
 
-async def get_cached_academy_ranks() -> List[AcademyRankEntry]:
-    if ACADEMY_CACHE["data"] and datetime.now() < ACADEMY_CACHE["expires_at"]:
-        return ACADEMY_CACHE["data"]
+# Default-weight ranks maintained incrementally, so a player's rank, profile
+# rank and percentile are current without re-ranking the whole board. These
+# are competition ranks: tied players share the best rank, where the academy
+# board lists them one position apart.
+RANK_ENGINE: Dict[str, Optional[AcademyRankEngine]] = {"engine": None}
 
-    results = await calculate_academy_ranks()
 
-    ACADEMY_CACHE["data"] = results
-    ACADEMY_CACHE["expires_at"] = datetime.now() + timedelta(seconds=CACHE_TTL_SECONDS)
+def _publish_scores(rescored: Dict[str, float]) -> None:
+    small = len(rescored) <= MAX_PLAYER_EVENTS_PER_BATCH
+    publish(
+        {
+            "event": "academy",
+            "data": {
+                "players": len(rescored),
+                "scores": rescored if small else None,
+            },
+        }
+    )
 
-    return results
 
+def settle_rank_engine() -> None:
+    engine = RANK_ENGINE["engine"]
+    if engine is None:
+        return
+    rescored = engine.settle()
+    if rescored:
+        _publish_scores(rescored)
+
+
+def sync_rank_engine(changed: Set[str]) -> None:
+    engine = RANK_ENGINE["engine"]
+    if engine is None:
+        return
+    was_pending = engine.pending
+    rescored = engine.update_many({uuid: player_metrics(uuid) for uuid in changed})
+    if rescored:
+        _publish_scores(rescored)
+    elif engine.pending and not was_pending:
+        # Players joined or left: rescore the board once after this batch of
+        # table changes, outside the listener. Reads settle it themselves if
+        # they get there first.
+        try:
+            asyncio.get_running_loop().call_soon(settle_rank_engine)
+        except RuntimeError:
+            pass
+
+
+STATS_LISTENERS.append(sync_rank_engine)
+
+
+async def get_rank_engine() -> AcademyRankEngine:
+    # Once built, table changes reach the engine through sync_rank_engine
+    await ensure_player_stats()
+    if RANK_ENGINE["engine"] is None:
+        RANK_ENGINE["engine"] = AcademyRankEngine(
+            {metric: metric_scores(metric) for metric in METRICS}
+        )
+    return RANK_ENGINE["engine"]
 
-async def get_academy_leaderboard(limit: int = 100) -> List[AcademyRankEntry]:
-    results = await get_cached_academy_ranks()
-    return results[:limit]
 
+# --- Precomputation ---
 
-async def calculate_academy_ranks() -> List[AcademyRankEntry]:
-    W_POKEDEX = 0.35
-    W_SHINY = 0.30
-    W_BATTLES = 0.25
-    W_EGGS = 0.10
 
-    pokedex_scores = await _get_all_pokedex_scores()
-    shiny_scores = await _get_all_shiny_scores()
-    battle_scores = await _get_all_battle_scores()
-    egg_scores = await _get_all_basic_scores("advancementData.totalEggsHatched")
+async def precompute_rankings() -> None:
+    for metric in dict.fromkeys(LEADERBOARD_METRICS.values()):
+        ranked_players(metric)
 
-    all_uuids = (
-        set(pokedex_scores.keys())
-        | set(shiny_scores.keys())
-        | set(battle_scores.keys())
-        | set(egg_scores.keys())
-    )
-    total_players = len(all_uuids)
-
-    if total_players == 0:
-        return []
-
-    def compute_ranks(scores: Dict[str, float]) -> Dict[str, int]:
-        sorted_uuid = sorted(all_uuids, key=lambda u: scores.get(u, 0), reverse=True)
-        ranks = {}
-        current_rank = 1
-        for i, uuid in enumerate(sorted_uuid):
-            if i > 0 and scores.get(uuid, 0) < scores.get(sorted_uuid[i - 1], 0):
-                current_rank = i + 1
-            ranks[uuid] = current_rank
-        return ranks
-
-    rank_pokedex = compute_ranks(pokedex_scores)
-    rank_shiny = compute_ranks(shiny_scores)
-    rank_battles = compute_ranks(battle_scores)
-    rank_eggs = compute_ranks(egg_scores)
-
-    academy_entries = []
-
-    for uuid in all_uuids:
-
-        def get_norm(rank: int, raw_val: float) -> float:
-            if raw_val == 0:
-                return 0.0
-            if total_players <= 1:
-                return 1.0
-            return 1.0 - (rank - 1) / (total_players - 1)
-
-        norm_pokedex = get_norm(rank_pokedex[uuid], pokedex_scores.get(uuid, 0))
-        norm_shiny = get_norm(rank_shiny[uuid], shiny_scores.get(uuid, 0))
-        norm_battles = get_norm(rank_battles[uuid], battle_scores.get(uuid, 0))
-        norm_eggs = get_norm(rank_eggs[uuid], egg_scores.get(uuid, 0))
-
-        raw_score = (
-            W_POKEDEX * norm_pokedex
-            + W_SHINY * norm_shiny
-            + W_BATTLES * norm_battles
-            + W_EGGS * norm_eggs
-        )
-        final_score = round(raw_score * 100, 2)
-
-        academy_entries.append(
-            {
-                "uuid": uuid,
-                "score": final_score,
-                "ranks": {
-                    "pokedex": rank_pokedex[uuid],
-                    "shiny": rank_shiny[uuid],
-                    "battles": rank_battles[uuid],
-                    "eggs": rank_eggs[uuid],
-                },
-                "normalized": {
-                    "pokedex": norm_pokedex,
-                    "shiny": norm_shiny,
-                    "battles": norm_battles,
-                    "eggs": norm_eggs,
-                },
-            }
-        )
-
-    academy_entries.sort(key=lambda x: x["score"], reverse=True)
-
-    final_results = []
-    for i, entry in enumerate(academy_entries, start=1):
-        username = await resolve_username(entry["uuid"])
-        final_results.append(
-            AcademyRankEntry(
-                uuid=entry["uuid"],
-                username=username,
-                academyRank=i,
-                academyScore=entry["score"],
-                ranks=entry["ranks"],
-                normalized=entry["normalized"],
-                totalPlayers=total_players,
-            )
-        )
-
-    return final_results
 
+async def precompute_academy() -> None:
+    await ACADEMY_CACHE.refresh()
+    await get_academy_snapshot()
+    await get_rank_engine()
+    settle_rank_engine()
 
-async def _get_all_pokedex_scores() -> Dict[str, float]:
-    return await _scan_collections_for_pokedex()
 
+async def precompute_pages() -> None:
+    for category, limit, offset in PRECOMPUTED_PAGES:
+        await leaderboard_page(category, limit, offset)
 
-async def _get_all_shiny_scores() -> Dict[str, float]:
-    return await _scan_collections_for_shiny()
 
-
-async def _get_all_basic_scores(field_path: str) -> Dict[str, float]:
-    collection = get_collection("PlayerDataCollection")
-    cursor = collection.aggregate(
-        [{"$project": {"uuid": 1, "value": f"${field_path}"}}]
-    )
-    scores = {}
-    async for doc in cursor:
-        scores[doc["uuid"]] = float(doc.get("value", 0))
-    return scores
-
-
-async def _get_all_battle_scores() -> Dict[str, float]:
-    """Get battle scores using PvP + PvN (excluding PvW - wild battles)"""
-    collection = get_collection("PlayerDataCollection")
-    cursor = collection.aggregate(
-        [
-            {
-                "$project": {
-                    "uuid": 1,
-                    "value": {
-                        "$add": [
-                            {
-                                "$ifNull": [
-                                    "$advancementData.totalPvPBattleVictoryCount",
-                                    0,
-                                ]
-                            },
-                            {
-                                "$ifNull": [
-                                    "$advancementData.totalPvNBattleVictoryCount",
-                                    0,
-                                ]
-                            },
-                        ]
-                    },
-                }
-            }
-        ]
-    )
-    scores = {}
-    async for doc in cursor:
-        scores[doc["uuid"]] = float(doc.get("value", 0))
-    return scores
-
-
-async def _scan_collections_for_pokedex() -> Dict[str, int]:
-    pokedex_collection = get_collection("PokeDexCollection")
-    player_caught_count: dict[str, int] = {}
-
-    async for doc in pokedex_collection.find({}):
-        uuid = doc.get("uuid")
-        if not uuid:
-            continue
-
-        species_records = doc.get("speciesRecords", {})
-        caught_count = 0
-
-        for species_name, species_data in species_records.items():
-            form_records = species_data.get("formRecords", {})
-            for form_name, form_data in form_records.items():
-                if form_data.get("knowledge") == "CAUGHT":
-                    caught_count += 1
-                    break  # Count species only once even if multiple forms are caught
-
-        player_caught_count[uuid] = caught_count
-
-    return player_caught_count
-
-
-async def _scan_collections_for_shiny() -> Dict[str, int]:
-    party_collection = get_collection("PlayerPartyCollection")
-    pc_collection = get_collection("PCCollection")
-    player_shinies: dict[str, int] = {}
-
-    def add_shiny(uid, is_shiny):
-        if is_shiny:
-            player_shinies[uid] = player_shinies.get(uid, 0) + 1
-        elif uid not in player_shinies:
-            player_shinies[uid] = 0
-
-    async for doc in party_collection.find({}):
-        uuid = doc.get("uuid")
-        if not uuid:
-            continue
-        add_shiny(uuid, False)
-        for i in range(6):
-            slot = doc.get(f"Slot{i}")
-            if slot and slot.get("Shiny"):
-                add_shiny(uuid, True)
-
-    async for doc in pc_collection.find({}):
-        uuid = doc.get("uuid")
-        if not uuid:
-            continue
-        add_shiny(uuid, False)
-        for key, val in doc.items():
-            if key.startswith("Box") and isinstance(val, dict):
-                for slot, poke in val.items():
-                    if slot.startswith("Slot") and isinstance(poke, dict):
-                        if poke.get("Shiny"):
-                            add_shiny(uuid, True)
-    return player_shinies
+JOBS.extend(
+    [
+        ("rankings", precompute_rankings),
+        ("academy", precompute_academy),
+        ("pages", precompute_pages),
+    ]
+)
@@ -0,0 +1,53 @@
+import asyncio
+import json
+from typing import Optional
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from cobblemon_academy_tracker_api.live import (
+    live_status,
+    subscribe,
+    unsubscribe,
+)
+
+router = APIRouter(prefix="/live", tags=["live"])
+
+KEEPALIVE_SECONDS = 15
+
+
+@router.get("/events")
+async def live_events(uuid: Optional[str] = None):
+    """
+    Server-sent events: `player` deltas (only the given player's when `uuid`
+    is set) and `leaderboards` notices carrying the new stats version.
+    """
+    queue = subscribe()
+
+    async def stream():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if (
+                    uuid
+                    and message["event"] == "player"
+                    and message["data"]["uuid"] != uuid
+                ):
+                    continue
+                yield f"event: {message['event']}\ndata: {json.dumps(message['data'])}\n\n"
+        finally:
+            unsubscribe(queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/status")
+async def get_live_status():
+    return live_status()
@@ -1,48 +1,60 @@
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException
+import asyncio
+from typing import Dict, List, Optional
+from fastapi import APIRouter, HTTPException, Query
 from cobblemon_academy_tracker_api.database import get_collection
+from cobblemon_academy_tracker_api.pc import get_pc_page, pc_page_from_document
+from cobblemon_academy_tracker_api.responses import ModelResponse
 from cobblemon_academy_tracker_api.schemas import (
+    PlayerProfile,
     PlayerSummary,
     Pokemon,
     PokedexStats,
+    PokedexComparison,
+    DexEntry,
     AcademyRankEntry,
+    AcademyPercentile,
+)
+from cobblemon_academy_tracker_api.species import (
+    DEX_NUMBERS,
+    SPECIES,
+    SPECIES_BITS,
+    TOTAL_SPECIES,
+    count_species,
+    missing_species,
+    species_list,
+)
+from cobblemon_academy_tracker_api.stats import (
+    PLAYER_STATS,
+    PlayerStats,
+    count_party_shinies,
+    count_pc_shinies,
+    ensure_player_stats,
+    ranked_position,
 )
 
 router = APIRouter(prefix="/players", tags=["players"])
 
 
-@router.get("/{uuid}/summary", response_model=PlayerSummary)
-async def get_player_summary(uuid: str):
-    collection = get_collection("PlayerDataCollection")
-    player_doc = await collection.find_one({"uuid": uuid})
+# Only the fields the builders below read
+PLAYER_PROJECTION = {"_id": 0, "uuid": 1, "advancementData": 1}
+PARTY_PROJECTION = {"_id": 0, **{f"Slot{i}": 1 for i in range(6)}}
+PC_PROJECTION = {"_id": 0}
+PROFILE_PC_PAGE_SIZE = 50
 
-    if not player_doc:
-        raise HTTPException(status_code=404, detail="Player not found")
 
-    from cobblemon_academy_tracker_api.services import resolve_username
-
-    real_username = await resolve_username(uuid)
-    player_doc["username"] = real_username
+def build_player_summary(
+    player_doc: Dict,
+    party_doc: Optional[Dict],
+    pc_doc: Optional[Dict],
+    username: str,
+) -> PlayerSummary:
+    player_doc["username"] = username
 
     shiny_count = 0
-
-    party_collection = get_collection("PlayerPartyCollection")
-    party_doc = await party_collection.find_one({"uuid": uuid})
     if party_doc:
-        for i in range(6):
-            slot = party_doc.get(f"Slot{i}")
-            if slot and slot.get("Shiny"):
-                shiny_count += 1
-
-    pc_collection = get_collection("PCCollection")
-    pc_doc = await pc_collection.find_one({"uuid": uuid})
+        shiny_count += count_party_shinies(party_doc)
     if pc_doc:
-        for key, val in pc_doc.items():
-            if key.startswith("Box") and isinstance(val, dict):
-                for slot, poke in val.items():
-                    if slot.startswith("Slot") and isinstance(poke, dict):
-                        if poke.get("Shiny"):
-                            shiny_count += 1
+        shiny_count += count_pc_shinies(pc_doc)
 
     if "advancementData" not in player_doc:
         player_doc["advancementData"] = {}
@@ -57,14 +69,7 @@ async def get_player_summary(uuid: str):
     return PlayerSummary(**player_doc)
 
 
-@router.get("/{uuid}/party", response_model=List[Pokemon])
-async def get_player_party(uuid: str):
-    collection = get_collection("PlayerPartyCollection")
-    party_doc = await collection.find_one({"uuid": uuid})
-
-    if not party_doc:
-        raise HTTPException(status_code=404, detail="Player party not found")
-
+def build_party(party_doc: Dict) -> List[Pokemon]:
     party_pokemon = []
     for i in range(6):
         key = f"Slot{i}"
@@ -76,6 +81,112 @@ async def get_player_party(uuid: str):
     return party_pokemon
 
 
+def build_pokedex_stats(stats: Optional[PlayerStats]) -> PokedexStats:
+    if stats is None or stats.pokedex is None:
+        return PokedexStats(
+            total_seen=0,
+            total_caught=0,
+            catalogue_size=TOTAL_SPECIES,
+            completion_percentage=0.0,
+            missing_species=list(SPECIES),
+        )
+
+    caught = stats.caught_species or 0
+    catalogue_caught = count_species(caught)
+
+    return PokedexStats(
+        total_seen=stats.seen,
+        total_caught=stats.pokedex,
+        catalogue_caught=catalogue_caught,
+        catalogue_size=TOTAL_SPECIES,
+        completion_percentage=round(catalogue_caught / TOTAL_SPECIES * 100, 2),
+        missing_species=missing_species(caught),
+    )
+
+
+async def get_player_stats(uuid: str) -> Optional[PlayerStats]:
+    await ensure_player_stats()
+    return PLAYER_STATS.get(uuid)
+
+
+@router.get("/{uuid}/profile", response_model=PlayerProfile)
+async def get_player_profile(uuid: str):
+    """
+    Everything the profile page shows in one response. Each collection is
+    read once, concurrently, and every section is built from those documents.
+    """
+    from cobblemon_academy_tracker_api.routers.leaderboards import (
+        get_rank_engine,
+        with_usernames,
+    )
+    from cobblemon_academy_tracker_api.services import resolve_username
+
+    player_doc, party_doc, pc_doc, engine = await asyncio.gather(
+        get_collection("PlayerDataCollection").find_one(
+            {"uuid": uuid}, PLAYER_PROJECTION
+        ),
+        get_collection("PlayerPartyCollection").find_one(
+            {"uuid": uuid}, PARTY_PROJECTION
+        ),
+        get_collection("PCCollection").find_one({"uuid": uuid}, PC_PROJECTION),
+        get_rank_engine(),
+    )
+
+    if not player_doc:
+        raise HTTPException(status_code=404, detail="Player not found")
+
+    username = await resolve_username(uuid)
+    entry = engine.entry(uuid)
+
+    return ModelResponse(
+        PlayerProfile(
+            summary=build_player_summary(player_doc, party_doc, pc_doc, username),
+            # the rank engine loaded the stats table the pokedex comes from
+            pokedex=build_pokedex_stats(PLAYER_STATS.get(uuid)),
+            party=build_party(party_doc) if party_doc else [],
+            # the username was just resolved, so this is served from memory
+            rank=(await with_usernames([entry]))[0] if entry else None,
+            capturesRank=ranked_position("captures", uuid),
+            pc=pc_page_from_document(pc_doc, 1, PROFILE_PC_PAGE_SIZE) if pc_doc else [],
+        )
+    )
+
+
+@router.get("/{uuid}/summary", response_model=PlayerSummary)
+async def get_player_summary(uuid: str):
+    collection = get_collection("PlayerDataCollection")
+    player_doc = await collection.find_one({"uuid": uuid}, PLAYER_PROJECTION)
+
+    if not player_doc:
+        raise HTTPException(status_code=404, detail="Player not found")
+
+    from cobblemon_academy_tracker_api.services import resolve_username
+
+    real_username = await resolve_username(uuid)
+
+    party_doc, pc_doc = await asyncio.gather(
+        get_collection("PlayerPartyCollection").find_one(
+            {"uuid": uuid}, PARTY_PROJECTION
+        ),
+        get_collection("PCCollection").find_one({"uuid": uuid}, PC_PROJECTION),
+    )
+
+    return ModelResponse(
+        build_player_summary(player_doc, party_doc, pc_doc, real_username)
+    )
+
+
+@router.get("/{uuid}/party", response_model=List[Pokemon])
+async def get_player_party(uuid: str):
+    collection = get_collection("PlayerPartyCollection")
+    party_doc = await collection.find_one({"uuid": uuid}, PARTY_PROJECTION)
+
+    if not party_doc:
+        raise HTTPException(status_code=404, detail="Player party not found")
+
+    return ModelResponse(build_party(party_doc), List[Pokemon])
+
+
 @router.get("/{uuid}/pc", response_model=List[Pokemon])
 async def get_player_pc(
     uuid: str,
@@ -84,103 +195,115 @@ async def get_player_pc(
     shiny: Optional[bool] = None,
     species: Optional[str] = None,
 ):
-    collection = get_collection("PCCollection")
-    pc_doc = await collection.find_one({"uuid": uuid})
+    pokemon = await get_pc_page(uuid, page, limit, shiny, species)
 
-    if not pc_doc:
+    if pokemon is None:
         raise HTTPException(status_code=404, detail="Player PC not found")
 
-    all_pokemon = []
-    box_count = pc_doc.get("BoxCount", 50)
-
-    for box_idx in range(box_count):
-        box_key = f"Box{box_idx}"
-        box_data = pc_doc.get(box_key, {})
-        if not box_data:
-            continue
-
-        for slot_key, pokemon_data in box_data.items():
-            if not slot_key.startswith("Slot"):
-                continue
-
-            if not isinstance(pokemon_data, dict) or "Species" not in pokemon_data:
-                continue
-
-            if shiny is not None and pokemon_data.get("Shiny", False) != shiny:
-                continue
-
-            if species:
-                if species.lower() not in pokemon_data.get("Species", "").lower():
-                    continue
-
-            try:
-                p_obj = Pokemon(**pokemon_data)
-                p_obj.boxIndex = box_idx
-                p_obj.slotIndex = int(slot_key.replace("Slot", ""))
-                all_pokemon.append(p_obj)
-            except Exception:
-                continue
-
-    start = (page - 1) * limit
-    end = start + limit
-    return all_pokemon[start:end]
+    return ModelResponse(pokemon, List[Pokemon])
 
 
 @router.get("/{uuid}/pokedex", response_model=PokedexStats)
 async def get_player_pokedex(uuid: str):
-    from cobblemon_academy_tracker_api.constants import TOTAL_COBBLEMON_SPECIES
+    return ModelResponse(build_pokedex_stats(await get_player_stats(uuid)))
 
-    pokedex_collection = get_collection("PokeDexCollection")
-    pokedex_doc = await pokedex_collection.find_one({"uuid": uuid})
 
-    if not pokedex_doc:
-        return PokedexStats(
-            total_seen=0,
-            total_caught=0,
-            completion_percentage=0.0,
-        )
+@router.get("/{uuid}/pokedex/entries", response_model=List[DexEntry])
+async def get_player_pokedex_entries(uuid: str):
+    """Caught, seen and shiny state of every catalogue species, in dex order."""
+    stats = await get_player_stats(uuid)
+    if stats is None or stats.pokedex is None:
+        raise HTTPException(status_code=404, detail="Player pokedex not found")
+
+    caught, seen, shiny = (
+        stats.caught_species or 0,
+        stats.seen_species or 0,
+        stats.shiny_species or 0,
+    )
+    fields_set = set(DexEntry.model_fields)
+    return ModelResponse(
+        [
+            DexEntry.model_construct(
+                fields_set,
+                species=species,
+                dex_number=number,
+                caught=bool(caught & bit),
+                seen=bool(seen & bit),
+                shinies_seen=bool(shiny & bit),
+            )
+            for (species, number), bit in zip(
+                DEX_NUMBERS.items(), SPECIES_BITS.values()
+            )
+        ],
+        List[DexEntry],
+    )
 
-    species_records = pokedex_doc.get("speciesRecords", {})
 
-    total_seen = 0
-    total_caught = 0
+@router.get("/{uuid}/pokedex/compare/{other_uuid}", response_model=PokedexComparison)
+async def compare_player_pokedex(uuid: str, other_uuid: str):
+    """Species only one of the two players has caught, in dex order."""
+    await ensure_player_stats()
+    player, other = PLAYER_STATS.get(uuid), PLAYER_STATS.get(other_uuid)
+    if player is None or other is None:
+        raise HTTPException(status_code=404, detail="Player pokedex not found")
+
+    mine, theirs = player.caught_species or 0, other.caught_species or 0
+    return ModelResponse(
+        PokedexComparison(
+            uuid=uuid,
+            other_uuid=other_uuid,
+            caught_by_both=count_species(mine & theirs),
+            only_caught_by_player=species_list(mine & ~theirs),
+            only_caught_by_other=species_list(theirs & ~mine),
+        )
+    )
 
-    for species_name, species_data in species_records.items():
-        form_records = species_data.get("formRecords", {})
-        has_caught = False
-        has_seen = False
 
-        for form_name, form_data in form_records.items():
-            knowledge = form_data.get("knowledge", "")
-            if knowledge == "CAUGHT":
-                has_caught = True
-                has_seen = True
-            elif knowledge == "ENCOUNTERED":
-                has_seen = True
+@router.get("/{uuid}/rank", response_model=AcademyRankEntry)
+async def get_player_rank(uuid: str):
+    from cobblemon_academy_tracker_api.routers.leaderboards import (
+        get_rank_engine,
+        with_usernames,
+    )
 
-        if has_seen:
-            total_seen += 1
-        if has_caught:
-            total_caught += 1
+    engine = await get_rank_engine()
+    entry = engine.entry(uuid)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Player rank data not found")
+    return ModelResponse((await with_usernames([entry]))[0])
 
-    completion_percentage = round((total_caught / TOTAL_COBBLEMON_SPECIES) * 100, 2)
 
-    return PokedexStats(
-        total_seen=total_seen,
-        total_caught=total_caught,
-        completion_percentage=completion_percentage,
+@router.get("/{uuid}/rank/around", response_model=List[AcademyRankEntry])
+async def get_player_rank_around(uuid: str, window: int = Query(5, ge=0, le=50)):
+    from cobblemon_academy_tracker_api.routers.leaderboards import (
+        get_academy_snapshot,
+        with_usernames,
     )
 
+    snapshot = await get_academy_snapshot()
+    entries = snapshot.around(uuid, window)
+    if not entries:
+        raise HTTPException(status_code=404, detail="Player rank data not found")
+    return ModelResponse(await with_usernames(entries), List[AcademyRankEntry])
 
-@router.get("/{uuid}/rank", response_model=AcademyRankEntry)
-async def get_player_rank(uuid: str):
+
+@router.get("/{uuid}/rank/percentile", response_model=AcademyPercentile)
+async def get_player_rank_percentile(uuid: str):
     from cobblemon_academy_tracker_api.routers.leaderboards import (
-        get_cached_academy_ranks,
+        get_rank_engine,
     )
 
-    ranks = await get_cached_academy_ranks()
-    for entry in ranks:
-        if entry.uuid == uuid:
-            return entry
-
-    raise HTTPException(status_code=404, detail="Player rank data not found")
+    engine = await get_rank_engine()
+    entry = engine.entry(uuid)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Player rank data not found")
+
+    return ModelResponse(
+        AcademyPercentile(
+            uuid=uuid,
+            academyRank=entry.academyRank,
+            academyScore=entry.academyScore,
+            percentile=engine.percentile(entry.academyScore),
+            totalPlayers=entry.totalPlayers,
+        )
+    )
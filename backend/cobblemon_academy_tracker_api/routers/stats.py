@@ -0,0 +1,78 @@
+from typing import Dict
+from fastapi import APIRouter
+from cobblemon_academy_tracker_api.cache import SingleFlightCache
+from cobblemon_academy_tracker_api.database import pool_status
+from cobblemon_academy_tracker_api.responses import ModelResponse
+from cobblemon_academy_tracker_api.scheduler import scheduler_status
+from cobblemon_academy_tracker_api.schemas import ServerStats, SpeciesCoverage
+from cobblemon_academy_tracker_api.services import http_status
+from cobblemon_academy_tracker_api.species import (
+    TOTAL_SPECIES,
+    count_species,
+    missing_species,
+)
+from cobblemon_academy_tracker_api.stats import (
+    ensure_player_stats,
+    metric_scores,
+    metric_total,
+    species_union,
+)
+from cobblemon_academy_tracker_api.workers import worker_status
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+SERVER_STATS_TTL_SECONDS = 30
+
+
+async def calculate_server_stats() -> ServerStats:
+    # Every total comes from the stats table, no extra collection scan
+    await ensure_player_stats()
+    return ServerStats(
+        totalCaptures=metric_total("captures"),
+        totalShinies=metric_total("shiny"),
+        totalBattles=metric_total("battles"),
+        totalEggs=metric_total("eggs"),
+        activeTrainers=len(metric_scores("captures")),
+    )
+
+
+SERVER_STATS_CACHE = SingleFlightCache(
+    "server-stats", calculate_server_stats, ttl_seconds=SERVER_STATS_TTL_SECONDS
+)
+
+
+@router.get("/server", response_model=ServerStats)
+async def get_server_stats():
+    return ModelResponse(await SERVER_STATS_CACHE.get())
+
+
+@router.get("/species", response_model=SpeciesCoverage)
+async def get_species_coverage():
+    """Catalogue species nobody on the server has caught yet."""
+    await ensure_player_stats()
+    caught = species_union("caught_species")
+    return ModelResponse(
+        SpeciesCoverage(
+            total_species=TOTAL_SPECIES,
+            caught_by_anyone=count_species(caught),
+            caught_by_nobody=missing_species(caught),
+        )
+    )
+
+
+@router.get("/connections")
+async def get_connection_stats() -> Dict:
+    """Pool utilization of the MongoDB and Mojang API clients."""
+    return {"mongo": pool_status(), "http": http_status()}
+
+
+@router.get("/scheduler")
+async def get_scheduler_status() -> Dict:
+    """Precomputation cycles and how long each job last took."""
+    return scheduler_status()
+
+
+@router.get("/workers")
+async def get_worker_status() -> Dict:
+    """This worker's role in leader election and its snapshot swaps."""
+    return worker_status()
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from cobblemon_academy_tracker_api.stats import (
+    STATS_REFRESH_INTERVAL_SECONDS,
+    STATS_STATE,
+    refresh_player_stats,
+)
+
+logger = logging.getLogger("uvicorn")
+
+# 0 disables the scheduler, handlers then compute on demand as before
+PRECOMPUTE_INTERVAL_SECONDS = float(
+    os.environ.get("PRECOMPUTE_INTERVAL_SECONDS", STATS_REFRESH_INTERVAL_SECONDS)
+)
+# Random extra delay per cycle, so workers started together drift apart
+PRECOMPUTE_JITTER_SECONDS = float(os.environ.get("PRECOMPUTE_JITTER_SECONDS", "2"))
+
+# reads: the stats table's read count when the last cycle ended
+SCHEDULER_STATE: Dict = {
+    "task": None,
+    "runs": 0,
+    "last_run_at": None,
+    "reads": None,
+    "idle_skips": 0,
+}
+# job name -> {ok, seconds, at, error} of its last run
+JOB_STATUS: Dict[str, Dict] = {}
+
+
+async def refresh_stats_job() -> None:
+    # A change feed already keeps the table current when live, a follower
+    # takes the leader's table instead
+    if STATS_STATE["live"] or STATS_STATE["follower"]:
+        return
+    # Nothing read the table since the last cycle: an idle server is not
+    # rescanned, the first cycle after a request catches up
+    if STATS_STATE["reads"] == SCHEDULER_STATE["reads"]:
+        SCHEDULER_STATE["idle_skips"] += 1
+        return
+    await refresh_player_stats(force=True)
+
+
+# Run in order every cycle. Modules computing something handlers serve
+# append their job at import, the stats refresh runs first.
+JOBS: List[Tuple[str, Callable[[], Awaitable[None]]]] = [
+    ("stats", refresh_stats_job),
+]
+
+
+async def run_jobs() -> None:
+    """
+    One precomputation cycle. Each job swaps its result in with a single
+    assignment once it is complete, so readers see either the previous or
+    the new value. A failing job keeps its previous result.
+    """
+    for name, job in JOBS:
+        started = time.monotonic()
+        try:
+            await job()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Precompute job {name} failed: {e!r}")
+            JOB_STATUS[name] = {
+                "ok": False,
+                "seconds": time.monotonic() - started,
+                "at": time.time(),
+                "error": repr(e),
+            }
+            continue
+        JOB_STATUS[name] = {
+            "ok": True,
+            "seconds": time.monotonic() - started,
+            "at": time.time(),
+        }
+    SCHEDULER_STATE["runs"] += 1
+    SCHEDULER_STATE["last_run_at"] = time.time()
+    # After the jobs, whose own reads of the table don't count as traffic
+    SCHEDULER_STATE["reads"] = STATS_STATE["reads"]
+
+
+async def run_scheduler(interval: float, jitter: float) -> None:
+    while True:
+        await run_jobs()
+        await asyncio.sleep(interval + random.uniform(0, jitter))
+
+
+def start_scheduler(
+    interval: float = PRECOMPUTE_INTERVAL_SECONDS,
+    jitter: float = PRECOMPUTE_JITTER_SECONDS,
+) -> Optional[asyncio.Task]:
+    if interval <= 0:
+        logger.info("Leaderboard precomputation disabled")
+        return None
+    STATS_STATE["scheduled"] = True
+    SCHEDULER_STATE["task"] = asyncio.create_task(run_scheduler(interval, jitter))
+    return SCHEDULER_STATE["task"]
+
+
+async def stop_scheduler() -> None:
+    task = SCHEDULER_STATE["task"]
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    SCHEDULER_STATE["task"] = None
+    STATS_STATE["scheduled"] = False
+
+
+def scheduler_status() -> Dict:
+    return {
+        "running": SCHEDULER_STATE["task"] is not None,
+        "intervalSeconds": PRECOMPUTE_INTERVAL_SECONDS,
+        "jitterSeconds": PRECOMPUTE_JITTER_SECONDS,
+        "runs": SCHEDULER_STATE["runs"],
+        "lastRunAt": SCHEDULER_STATE["last_run_at"],
+        "idleSkips": SCHEDULER_STATE["idle_skips"],
+        "jobs": JOB_STATUS,
+    }
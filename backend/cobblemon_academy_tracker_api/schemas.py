@@ -108,6 +108,14 @@ class LeaderboardEntry(BaseModel):
     rank: int
 
 
+class LeaderboardResponse(BaseModel):
+    category: str
+    totalPlayers: int
+    limit: int
+    offset: int
+    entries: List[LeaderboardEntry]
+
+
 class AcademyRankEntry(BaseModel):
     uuid: str
     username: Optional[str] = None
@@ -118,6 +126,14 @@ class AcademyRankEntry(BaseModel):
     totalPlayers: int
 
 
+class AcademyPercentile(BaseModel):
+    uuid: str
+    academyRank: int
+    academyScore: float
+    percentile: float
+    totalPlayers: int
+
+
 class AcademyRankResponse(BaseModel):
     category: str = "academy"
     totalPlayers: int
@@ -132,13 +148,57 @@ class AcademyRankResponse(BaseModel):
 
 class DexEntry(BaseModel):
     species: str
+    dex_number: Optional[int] = None
     caught: bool
     seen: bool
-    shinies_caught: bool = False
+    # Seen or caught shiny, as recorded in the form's shinyStates
+    shinies_seen: bool = False
 
 
 class PokedexStats(BaseModel):
     total_seen: int
+    # Every caught species record, addon species included
     total_caught: int
+    # What completion_percentage counts: caught species of the catalogue
+    catalogue_caught: int = 0
+    catalogue_size: int = 0
     completion_percentage: float
     missing_species: List[str] = []
+
+
+class PokedexComparison(BaseModel):
+    uuid: str
+    other_uuid: str
+    caught_by_both: int
+    only_caught_by_player: List[str]
+    only_caught_by_other: List[str]
+
+
+class SpeciesCoverage(BaseModel):
+    total_species: int
+    caught_by_anyone: int
+    caught_by_nobody: List[str]
+
+
+# --- Player Profile ---
+
+
+class PlayerProfile(BaseModel):
+    summary: PlayerSummary
+    pokedex: PokedexStats
+    party: List[Pokemon]
+    rank: Optional[AcademyRankEntry] = None
+    # Position on the captures leaderboard, the rank the profile summary shows
+    capturesRank: Optional[int] = None
+    pc: List[Pokemon]
+
+
+# --- Server Stats ---
+
+
+class ServerStats(BaseModel):
+    totalCaptures: int
+    totalShinies: int
+    totalBattles: int
+    totalEggs: int
+    activeTrainers: int
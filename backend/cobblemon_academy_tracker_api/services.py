@@ -1,60 +1,437 @@
+import asyncio
 import httpx
+import json
 import logging
+import os
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from pymongo import UpdateOne
 from cobblemon_academy_tracker_api.database import get_collection
 
 logger = logging.getLogger("uvicorn")
 
 CACHE_DURATION_DAYS = 7
+# Unknown uuids (offline-mode accounts) are asked again after this long
+NEGATIVE_CACHE_HOURS = 24
 MOJANG_SESSION_URL = "https://sessionserver.mojang.com/session/minecraft/profile/"
+UNKNOWN_USERNAME = "Unknown Trainer"
 
+MEMORY_CACHE_SIZE = 10_000
+MEMORY_CACHE_TTL_SECONDS = 3600
+NEGATIVE_MEMORY_TTL_SECONDS = 600
+MOJANG_CONCURRENCY = int(os.environ.get("MOJANG_CONCURRENCY", "8"))
+MOJANG_TIMEOUT_SECONDS = float(os.environ.get("MOJANG_TIMEOUT_SECONDS", "5"))
+MOJANG_KEEPALIVE_SECONDS = 60
 
-async def resolve_username(uuid: str) -> str:
+# "mojang", "file" (a uuid -> name JSON map or a Minecraft usercache.json at
+# USERNAMES_FILE, for air-gapped servers) or "off"
+USERNAME_RESOLVER = os.environ.get("USERNAME_RESOLVER", "mojang")
+USERNAMES_FILE = os.environ.get("USERNAMES_FILE", "usercache.json")
+RESOLVE_QUEUE_SIZE = 10_000
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+# Backoff is tracked for at most this many uuids, least recently failed first
+RETRY_TRACK_SIZE = 10_000
+# Consecutive failures that open the circuit, and how long it stays open
+# (doubling while trial lookups keep failing)
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN_SECONDS = 30
+BREAKER_MAX_COOLDOWN_SECONDS = 900
+
+# uuid -> (username, expires_at monotonic), least recently used first
+USERNAME_CACHE: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+HTTP_STATE: Dict = {"client": None, "semaphore": None, "requests": 0, "in_flight": 0}
+RESOLVER_STATE: Dict = {
+    "resolver": None,
+    "disabled": False,
+    "queue": None,
+    "task": None,
+    "pending": set(),
+    # uuid -> (failed attempts, monotonic time before which it is not retried),
+    # least recently failed first
+    "retry": OrderedDict(),
+    "failures": 0,
+    "open_until": 0.0,
+    "cooldown": BREAKER_COOLDOWN_SECONDS,
+    "trips": 0,
+    "resolved": 0,
+    "not_found": 0,
+    "errors": 0,
+    # Bumped whenever a resolved name changes what a response would show
+    "version": 0,
+}
+
+
+def _cache_get(uuid: str) -> Optional[str]:
+    entry = USERNAME_CACHE.get(uuid)
+    if entry is None:
+        return None
+    username, expires_at = entry
+    if time.monotonic() >= expires_at:
+        del USERNAME_CACHE[uuid]
+        return None
+    USERNAME_CACHE.move_to_end(uuid)
+    return username
+
+
+def _cache_put(
+    uuid: str, username: str, ttl_seconds: float = MEMORY_CACHE_TTL_SECONDS
+) -> None:
+    USERNAME_CACHE[uuid] = (username, time.monotonic() + ttl_seconds)
+    USERNAME_CACHE.move_to_end(uuid)
+    while len(USERNAME_CACHE) > MEMORY_CACHE_SIZE:
+        USERNAME_CACHE.popitem(last=False)
+
+
+def open_http_client() -> httpx.AsyncClient:
+    """Create the app-wide client; called from the lifespan hook."""
+    HTTP_STATE["client"] = httpx.AsyncClient(
+        timeout=MOJANG_TIMEOUT_SECONDS,
+        limits=httpx.Limits(
+            max_connections=MOJANG_CONCURRENCY,
+            max_keepalive_connections=MOJANG_CONCURRENCY,
+            keepalive_expiry=MOJANG_KEEPALIVE_SECONDS,
+        ),
+    )
+    HTTP_STATE["semaphore"] = asyncio.Semaphore(MOJANG_CONCURRENCY)
+    return HTTP_STATE["client"]
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared client so Mojang lookups reuse pooled connections."""
+    if HTTP_STATE["client"] is None or HTTP_STATE["client"].is_closed:
+        # Outside the lifespan (scripts, tests) the client is created on demand
+        return open_http_client()
+    return HTTP_STATE["client"]
+
+
+async def close_http_client():
+    if HTTP_STATE["client"] is not None:
+        await HTTP_STATE["client"].aclose()
+        HTTP_STATE["client"] = None
+
+
+def http_status() -> Dict:
+    client = HTTP_STATE["client"]
+    return {
+        "open": client is not None and not client.is_closed,
+        "maxConnections": MOJANG_CONCURRENCY,
+        "inFlight": HTTP_STATE["in_flight"],
+        "requests": HTTP_STATE["requests"],
+        "resolver": resolver_status(),
+    }
+
+
+def _is_fresh(cached: Dict, max_age: timedelta) -> bool:
+    updated_at = cached.get("updated_at")
+    if updated_at is None:
+        return False
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) - updated_at < max_age
+
+
+# --- Resolvers ---
+#
+# resolve(uuid) returns the username, None when the uuid has no account, and
+# raises ResolverError when it could not tell (the lookup is retried later).
+
+
+class ResolverError(Exception):
+    pass
+
+
+class MojangResolver:
+    name = "mojang"
+
+    async def resolve(self, uuid: str) -> Optional[str]:
+        clean_uuid = uuid.replace("-", "")
+        client = get_http_client()
+
+        try:
+            async with HTTP_STATE["semaphore"]:
+                HTTP_STATE["in_flight"] += 1
+                HTTP_STATE["requests"] += 1
+                try:
+                    response = await client.get(f"{MOJANG_SESSION_URL}{clean_uuid}")
+                finally:
+                    HTTP_STATE["in_flight"] -= 1
+        except httpx.HTTPError as e:
+            raise ResolverError(f"Mojang request failed: {e!r}") from e
+
+        if response.status_code == 200:
+            return response.json().get("name")
+        if response.status_code in (204, 404):
+            return None
+        raise ResolverError(f"Mojang API error {response.status_code}")
+
+
+class StaticResolver:
+    """Fixed uuid -> username map, for tests and servers without internet."""
+
+    name = "static"
+
+    def __init__(self, usernames: Optional[Dict[str, str]] = None):
+        self.usernames = dict(usernames or {})
+
+    @classmethod
+    def from_file(cls, path: str) -> "StaticResolver":
+        """Reads a {uuid: name} map or a Minecraft server's usercache.json."""
+        with open(path) as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            data = {entry["uuid"]: entry["name"] for entry in data}
+        return cls(data)
+
+    async def resolve(self, uuid: str) -> Optional[str]:
+        return self.usernames.get(uuid)
+
+
+def make_resolver():
+    if USERNAME_RESOLVER == "mojang":
+        return MojangResolver()
+    if USERNAME_RESOLVER == "file":
+        try:
+            return StaticResolver.from_file(USERNAMES_FILE)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Could not load usernames from {USERNAMES_FILE}: {e}")
+    return None
+
+
+# --- Background resolution ---
+
+
+def _schedule(uuid: str) -> None:
+    """Queue a lookup unless one is pending, backing off, or impossible."""
+    state = RESOLVER_STATE
+    if state["disabled"] or uuid in state["pending"]:
+        return
+    retry = state["retry"].get(uuid)
+    if retry is not None:
+        now = time.monotonic()
+        if now < retry[1]:
+            return
+        if now >= retry[1] + RETRY_MAX_SECONDS:
+            # Failed long ago: the next failure starts from the base delay
+            del state["retry"][uuid]
+    if state["task"] is None or state["task"].done():
+        # Outside the lifespan (scripts, tests) the worker starts on demand
+        if start_username_worker(state["resolver"]) is None:
+            return
+    if state["queue"].full():
+        return
+    state["pending"].add(uuid)
+    state["queue"].put_nowait(uuid)
+
+
+def _lookup_failed(uuid: str, error: Exception) -> None:
+    state = RESOLVER_STATE
+    now = time.monotonic()
+    attempts = state["retry"].get(uuid, (0, 0.0))[0] + 1
+    delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+    state["retry"][uuid] = (attempts, now + delay)
+    state["retry"].move_to_end(uuid)
+    while len(state["retry"]) > RETRY_TRACK_SIZE:
+        state["retry"].popitem(last=False)
+    state["errors"] += 1
+    state["failures"] += 1
+
+    if state["failures"] == BREAKER_THRESHOLD:
+        state["trips"] += 1
+        logger.warning(
+            f"Username lookups failing ({error}), pausing for {state['cooldown']}s"
+        )
+    if state["failures"] >= BREAKER_THRESHOLD:
+        if state["open_until"] and now >= state["open_until"]:
+            # The trial lookup after a cooldown failed as well
+            state["cooldown"] = min(state["cooldown"] * 2, BREAKER_MAX_COOLDOWN_SECONDS)
+        state["open_until"] = now + state["cooldown"]
+
+
+def _lookup_succeeded(uuid: str) -> None:
+    state = RESOLVER_STATE
+    state["retry"].pop(uuid, None)
+    if state["open_until"]:
+        logger.info("Username lookups recovered")
+    state["failures"] = 0
+    state["open_until"] = 0.0
+    state["cooldown"] = BREAKER_COOLDOWN_SECONDS
+
+
+async def _lookup(resolver, uuid: str) -> Tuple[str, Optional[str], bool]:
+    try:
+        username = await resolver.resolve(uuid)
+    except Exception as e:
+        _lookup_failed(uuid, e)
+        return uuid, None, False
+    _lookup_succeeded(uuid)
+    return uuid, username, True
+
+
+async def _store(results: List[Tuple[str, Optional[str], bool]]) -> None:
+    updates = []
+    now = datetime.now(timezone.utc)
+    for uuid, username, answered in results:
+        if not answered:
+            continue
+        if username:
+            RESOLVER_STATE["resolved"] += 1
+            if _cache_get(uuid) != username:
+                RESOLVER_STATE["version"] += 1
+            _cache_put(uuid, username)
+            fields = {"username": username, "not_found": False, "updated_at": now}
+        else:
+            # Keep any previously known name, only remember the miss
+            RESOLVER_STATE["not_found"] += 1
+            fields = {"not_found": True, "updated_at": now}
+        updates.append(UpdateOne({"uuid": uuid}, {"$set": fields}, upsert=True))
+
+    if updates:
+        try:
+            await get_collection("UserCache").bulk_write(updates, ordered=False)
+        except Exception as e:
+            logger.error(f"Could not store resolved usernames: {e}")
+
+
+async def _resolve_worker(resolver) -> None:
+    state = RESOLVER_STATE
+    queue: asyncio.Queue = state["queue"]
+    while True:
+        batch = [await queue.get()]
+        while len(batch) < MOJANG_CONCURRENCY and not queue.empty():
+            batch.append(queue.get_nowait())
+
+        wait = state["open_until"] - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        if state["failures"] >= BREAKER_THRESHOLD:
+            # Half-open: a single trial lookup decides whether to resume
+            for uuid in batch[1:]:
+                try:
+                    queue.put_nowait(uuid)
+                except asyncio.QueueFull:
+                    state["pending"].discard(uuid)
+                queue.task_done()
+            batch = batch[:1]
+
+        try:
+            results = await asyncio.gather(*(_lookup(resolver, u) for u in batch))
+            await _store(results)
+        finally:
+            for uuid in batch:
+                state["pending"].discard(uuid)
+                queue.task_done()
+
+
+def start_username_worker(resolver=None) -> Optional[asyncio.Task]:
     """
-    Resolves a UUID to a Minecraft username using a local cache and the Mojang API.
+    Start resolving usernames in the background with `resolver` (default:
+    per USERNAME_RESOLVER). Without a resolver, names only come from UserCache.
     """
-    clean_uuid = uuid.replace("-", "")
-    collection = get_collection("UserCache")
+    state = RESOLVER_STATE
+    state["resolver"] = resolver if resolver is not None else make_resolver()
+    state["disabled"] = state["resolver"] is None
+    if state["disabled"]:
+        logger.info("Username resolution disabled")
+        return None
+    if state["queue"] is None:
+        state["queue"] = asyncio.Queue(maxsize=RESOLVE_QUEUE_SIZE)
+    if state["task"] is None or state["task"].done():
+        state["task"] = asyncio.create_task(_resolve_worker(state["resolver"]))
+    return state["task"]
 
-    cached = await collection.find_one({"uuid": uuid})
-    if cached:
-        updated_at = cached.get("updated_at")
-        if updated_at.tzinfo is None:
-            updated_at = updated_at.replace(tzinfo=timezone.utc)
-
-        if datetime.now(timezone.utc) - updated_at < timedelta(
-            days=CACHE_DURATION_DAYS
-        ):
-            return cached.get("username", "Unknown Trainer")
 
+async def stop_username_worker() -> None:
+    state = RESOLVER_STATE
+    task = state["task"]
+    if task is None:
+        return
+    task.cancel()
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{MOJANG_SESSION_URL}{clean_uuid}")
-
-            if response.status_code == 200:
-                data = response.json()
-                username = data.get("name")
-
-                await collection.update_one(
-                    {"uuid": uuid},
-                    {
-                        "$set": {
-                            "username": username,
-                            "updated_at": datetime.now(timezone.utc),
-                        }
-                    },
-                    upsert=True,
-                )
-                return username
-            elif response.status_code == 204:
-                logger.warning(f"UUID {uuid} not found on Mojang servers.")
-            else:
-                logger.error(f"Mojang API error {response.status_code} for {uuid}")
+        await task
+    except asyncio.CancelledError:
+        pass
+    state["task"] = None
+    state["queue"] = None
+    state["pending"].clear()
 
-    except Exception as e:
-        logger.error(f"Failed to resolve username for {uuid}: {e}")
 
-    if cached and "username" in cached:
-        return cached["username"]
+async def wait_for_usernames() -> None:
+    """Block until every queued lookup is done, for tests and scripts."""
+    if RESOLVER_STATE["queue"] is not None:
+        await RESOLVER_STATE["queue"].join()
+
+
+def resolver_status() -> Dict:
+    state = RESOLVER_STATE
+    resolver = state["resolver"]
+    return {
+        "name": resolver.name if resolver is not None else "off",
+        "queued": state["queue"].qsize() if state["queue"] is not None else 0,
+        "circuitOpen": state["open_until"] > time.monotonic(),
+        "consecutiveFailures": state["failures"],
+        "trips": state["trips"],
+        "backingOff": len(state["retry"]),
+        "resolved": state["resolved"],
+        "notFound": state["not_found"],
+        "errors": state["errors"],
+    }
+
+
+# --- Request path ---
+
+
+async def resolve_usernames(uuids: Iterable[str]) -> Dict[str, str]:
+    """
+    Resolves many UUIDs at once from the in-memory LRU and a single UserCache
+    query, without ever waiting on the resolver: names that are missing or
+    stale come back as the last known name (or a placeholder) and are looked
+    up in the background.
+    """
+    results: Dict[str, str] = {}
+    misses: List[str] = []
+    for uuid in dict.fromkeys(uuids):
+        username = _cache_get(uuid)
+        if username is not None:
+            results[uuid] = username
+        else:
+            misses.append(uuid)
+
+    if not misses:
+        return results
+
+    cached_docs = {}
+    async for cached in get_collection("UserCache").find({"uuid": {"$in": misses}}):
+        cached_docs[cached["uuid"]] = cached
+
+    positive_age = timedelta(days=CACHE_DURATION_DAYS)
+    negative_age = timedelta(hours=NEGATIVE_CACHE_HOURS)
+    refresh: Set[str] = set()
+    for uuid in misses:
+        cached = cached_docs.get(uuid) or {}
+        username = cached.get("username") or UNKNOWN_USERNAME
+        results[uuid] = username
+        if cached.get("not_found"):
+            if _is_fresh(cached, negative_age):
+                _cache_put(uuid, username, NEGATIVE_MEMORY_TTL_SECONDS)
+                continue
+        elif "username" in cached and _is_fresh(cached, positive_age):
+            _cache_put(uuid, username)
+            continue
+        refresh.add(uuid)
+
+    for uuid in refresh:
+        _schedule(uuid)
+    return results
 
-    return "Unknown Trainer"
+
+async def resolve_username(uuid: str) -> str:
+    """
+    Resolves a UUID to a Minecraft username from the in-memory LRU, then the
+    UserCache collection. A missing or stale name comes back as the last
+    known one (or UNKNOWN_USERNAME) and is queued for the background
+    resolver; the request never waits on Mojang.
+    """
+    return (await resolve_usernames([uuid]))[uuid]
@@ -0,0 +1,422 @@
+"""
+On-disk snapshot of the stats table and the academy ranks, so a restarted
+worker serves the previous results (stale, but consistent) immediately
+instead of recomputing everything before its first fast response.
+
+The file is a small BSON header followed by a zlib-compressed BSON body
+holding the table column-wise, and is replaced atomically. It is written by
+the precompute scheduler whenever the table changed, and at shutdown.
+
+With several workers the file is also how the leader hands its table to the
+followers: each of them reads the header, and decodes the body only when it
+holds a different table. The header lists the players changed since the
+previous file, so a follower holding that one skips diffing every row.
+"""
+
+import asyncio
+import logging
+import os
+import tempfile
+import time
+import uuid
+import zlib
+from dataclasses import fields
+from typing import Dict, List, Optional, Set, Tuple
+
+import bson
+import numpy as np
+
+from cobblemon_academy_tracker_api.academy import METRICS, AcademyMetrics
+from cobblemon_academy_tracker_api.scheduler import JOBS
+from cobblemon_academy_tracker_api.stats import (
+    ACADEMY_CACHE,
+    ACADEMY_STATE,
+    FINGERPRINTS,
+    PLAYER_STATS,
+    SOURCES,
+    STATS_LISTENERS,
+    STATS_STATE,
+    PlayerStats,
+    replace_table,
+)
+
+logger = logging.getLogger("uvicorn")
+
+# Snapshots are opt-in: empty (the default) disables them
+SNAPSHOT_PATH = os.environ.get("SNAPSHOT_PATH", "")
+# Minimum time between two scheduled saves of a changing table
+SNAPSHOT_INTERVAL_SECONDS = float(os.environ.get("SNAPSHOT_INTERVAL_SECONDS", "300"))
+# Bump whenever a metric is computed differently: the fingerprints in an
+# older snapshot would otherwise keep its values from being recomputed
+SNAPSHOT_FORMAT = 2
+SNAPSHOT_MAGIC = b"CATSNAP\0"
+STATS_FIELDS = [field.name for field in fields(PlayerStats)]
+INT64_MAX = 2**63 - 1
+# Beyond this many changed players a snapshot lists none, readers diff rows
+MAX_LISTED_CHANGES = 10_000
+# Identifies this process's snapshots, stats versions are per process
+WRITER = uuid.uuid4().hex
+
+# version: stats version of the file on disk. file: identity of the file last
+# loaded. table: (writer, version) of the snapshot matching the table held,
+# the last one written or loaded. pending: players changed since then, None
+# when too many. shared: other workers read the file, every change is written.
+SNAPSHOT_STATE: Dict = {
+    "version": None,
+    "saved_at": None,
+    "loaded_at": None,
+    "loads": 0,
+    "skipped": 0,
+    "file": None,
+    "table": None,
+    "pending": set(),
+    "shared": False,
+}
+
+
+def _track_changes(changed: Set[str]) -> None:
+    pending = SNAPSHOT_STATE["pending"]
+    if pending is None:
+        return
+    pending |= changed
+    if len(pending) > MAX_LISTED_CHANGES:
+        SNAPSHOT_STATE["pending"] = None
+
+
+STATS_LISTENERS.append(_track_changes)
+
+
+def _academy_columns() -> Optional[Dict]:
+    metrics = ACADEMY_CACHE.value
+    if metrics is None or ACADEMY_STATE["version"] != STATS_STATE["version"]:
+        return None
+    return {
+        "uuids": "\n".join(metrics.uuids),
+        "ranks": {
+            metric: np.asarray(metrics.ranks[metric], dtype=np.int64).tobytes()
+            for metric in METRICS
+        },
+        "normalized": {
+            metric: metrics.normalized[metric].astype(np.float64).tobytes()
+            for metric in METRICS
+        },
+    }
+
+
+def _pack_ints(values: List[Optional[int]]) -> bytes:
+    """Non-negative counts as int64, None as -1."""
+    return np.array(
+        [-1 if value is None else value for value in values], dtype=np.int64
+    ).tobytes()
+
+
+def _unpack_ints(data: bytes) -> List[Optional[int]]:
+    return [None if value < 0 else value for value in _int64s(data)]
+
+
+def _int64s(data: bytes) -> List[int]:
+    return np.frombuffer(data, dtype=np.int64).tolist()
+
+
+def _pack_bitsets(values: List[Optional[int]]) -> Dict:
+    """Ints wider than int64 (species bitsets) as fixed-width bytes."""
+    width = max(((value or 0).bit_length() for value in values), default=0) // 8 + 1
+    return {
+        "width": width,
+        "bits": b"".join((value or 0).to_bytes(width, "little") for value in values),
+        "missing": np.array(
+            [i for i, value in enumerate(values) if value is None], dtype=np.int64
+        ).tobytes(),
+    }
+
+
+def _unpack_bitsets(column: Dict) -> List[Optional[int]]:
+    width, bits = column["width"], column["bits"]
+    values: List[Optional[int]] = [
+        int.from_bytes(bits[start : start + width], "little")
+        for start in range(0, len(bits), width)
+    ]
+    for i in _int64s(column["missing"]):
+        values[i] = None
+    return values
+
+
+def _pack_column(values: List) -> object:
+    # BSON arrays store a key per element, packed columns load several
+    # times faster; the per-type dicts stay a plain array
+    if all(value is None or isinstance(value, int) for value in values):
+        if all(value is None or value <= INT64_MAX for value in values):
+            return _pack_ints(values)
+        return _pack_bitsets(values)
+    return values
+
+
+def _pack_fingerprints(known: Dict[str, object]) -> Dict:
+    values = list(known.values())
+    if all(isinstance(value, int) for value in values):
+        # $toHashedIndexKey returns 64-bit hashes
+        values = np.array(values, dtype=np.int64).tobytes()
+    return {"uuids": "\n".join(known), "values": values}
+
+
+def build_header(version: int) -> Dict:
+    """What a reader needs to decide whether to decode the body at all."""
+    pending = SNAPSHOT_STATE["pending"]
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "fields": STATS_FIELDS,
+        "createdAt": time.time(),
+        "writer": WRITER,
+        "version": version,
+        "base": SNAPSHOT_STATE["table"],
+        "changed": None if pending is None else sorted(pending),
+    }
+
+
+def build_snapshot() -> Dict:
+    """The table, fingerprints and academy ranks as one column-wise document."""
+    stats = list(PLAYER_STATS.values())
+    return {
+        "uuids": "\n".join(row.uuid for row in stats),
+        "stats": {
+            name: _pack_column([getattr(row, name) for row in stats])
+            for name in STATS_FIELDS[1:]
+        },
+        "fingerprints": {
+            name: _pack_fingerprints(known) for name, known in FINGERPRINTS.items()
+        },
+        "academy": _academy_columns(),
+    }
+
+
+def _write(path: str, header: Dict, snapshot: Dict) -> int:
+    encoded = bson.encode(header)
+    data = b"".join(
+        [
+            SNAPSHOT_MAGIC,
+            len(encoded).to_bytes(4, "little"),
+            encoded,
+            zlib.compress(bson.encode(snapshot), 1),
+        ]
+    )
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return len(data)
+
+
+async def save_snapshot(path: str = SNAPSHOT_PATH, force: bool = False) -> bool:
+    """
+    Write the snapshot when the table changed since the last one, at most
+    every SNAPSHOT_INTERVAL_SECONDS unless forced or shared with other
+    workers. The columns are copied on the event loop, encoding and I/O run
+    in a thread. Followers never write, the file is the leader's.
+    """
+    version = STATS_STATE["version"]
+    if not path or not STATS_STATE["refreshed_at"] or STATS_STATE["follower"]:
+        return False
+    if SNAPSHOT_STATE["version"] == version:
+        return False
+    saved_at = SNAPSHOT_STATE["saved_at"]
+    throttled = not force and not SNAPSHOT_STATE["shared"]
+    if throttled and saved_at and time.time() - saved_at < SNAPSHOT_INTERVAL_SECONDS:
+        return False
+
+    header, snapshot = build_header(version), build_snapshot()
+    # Changes made while the file is written belong to the next one
+    pending, SNAPSHOT_STATE["pending"] = SNAPSHOT_STATE["pending"], set()
+    started = time.monotonic()
+    try:
+        size = await asyncio.to_thread(_write, path, header, snapshot)
+    except BaseException:
+        # The next file is still based on the previous one
+        if pending is None or SNAPSHOT_STATE["pending"] is None:
+            SNAPSHOT_STATE["pending"] = None
+        else:
+            _track_changes(pending)
+        raise
+    SNAPSHOT_STATE["version"] = version
+    SNAPSHOT_STATE["table"] = (WRITER, version)
+    SNAPSHOT_STATE["saved_at"] = time.time()
+    logger.info(
+        f"Saved snapshot of {len(PLAYER_STATS)} players to {path} "
+        f"({size} bytes, {time.monotonic() - started:.2f}s)"
+    )
+    return True
+
+
+def file_id(path: str) -> Optional[Tuple[int, int, int]]:
+    """Identity of the file currently at `path`; a replaced file gets a new one."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def _read(path: str, table: Optional[Tuple] = None) -> Optional[Dict]:
+    """
+    The snapshot at `path` as its header merged with its body. The body is
+    left out when the header shows the (writer, version) of `table`, the
+    table the caller already holds. None when there is no usable file.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    with f:
+        st = os.fstat(f.fileno())
+        header = None
+        if f.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC:
+            size = int.from_bytes(f.read(4), "little")
+            header = bson.decode(f.read(size))
+        if (
+            header is None
+            or header.get("format") != SNAPSHOT_FORMAT
+            or header.get("fields") != STATS_FIELDS
+        ):
+            logger.warning(f"Ignoring snapshot {path} written by another version")
+            return None
+        header["file"] = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if table is not None and (header["writer"], header["version"]) == table:
+            return header
+        return {**header, **bson.decode(zlib.decompress(f.read()))}
+
+
+def _split(joined: str) -> List[str]:
+    return joined.split("\n") if joined else []
+
+
+def _unpack_column(column: object) -> List:
+    if isinstance(column, bytes):
+        return _unpack_ints(column)
+    if isinstance(column, dict):
+        return _unpack_bitsets(column)
+    return column
+
+
+def _academy_metrics(academy: Optional[Dict]) -> Optional[AcademyMetrics]:
+    if academy is None:
+        return None
+    return AcademyMetrics.from_columns(
+        _split(academy["uuids"]),
+        {metric: _int64s(academy["ranks"][metric]) for metric in METRICS},
+        {
+            metric: np.frombuffer(academy["normalized"][metric], np.float64)
+            for metric in METRICS
+        },
+    )
+
+
+def restore_snapshot(snapshot: Dict) -> Set[str]:
+    """
+    Replace the stats table and academy ranks with the snapshot's. Everything
+    is decoded first and swapped in without yielding to the event loop, so
+    handlers never see a partial table. When the snapshot lists its changes
+    since the table held, those are the changed players and rows are not
+    compared. Returns the uuids that changed.
+    """
+    uuids = _split(snapshot["uuids"])
+    columns = [uuids] + [
+        _unpack_column(snapshot["stats"][name]) for name in STATS_FIELDS[1:]
+    ]
+    rows = {values[0]: PlayerStats(*values) for values in zip(*columns)}
+
+    fingerprints = {}
+    for name, known in snapshot["fingerprints"].items():
+        if name in SOURCES:
+            values = known["values"]
+            if isinstance(values, bytes):
+                values = _int64s(values)
+            fingerprints[name] = dict(zip(_split(known["uuids"]), values))
+
+    academy = _academy_metrics(snapshot.get("academy"))
+
+    # The listed changes only apply on top of the table they were made to
+    listed, base = snapshot["changed"], snapshot["base"]
+    if base is None or tuple(base) != SNAPSHOT_STATE["table"]:
+        listed = None
+
+    # Counts as a refresh: handlers serve the table while the scheduler (or
+    # the next refresh interval) brings it up to date incrementally
+    changed = replace_table(rows, fingerprints, None if listed is None else set(listed))
+    if academy is not None:
+        ACADEMY_CACHE.prime(academy)
+        ACADEMY_STATE["version"] = STATS_STATE["version"]
+
+    SNAPSHOT_STATE["version"] = STATS_STATE["version"]
+    SNAPSHOT_STATE["table"] = (snapshot["writer"], snapshot["version"])
+    SNAPSHOT_STATE["pending"] = set()
+    SNAPSHOT_STATE["file"] = snapshot["file"]
+    SNAPSHOT_STATE["loaded_at"] = time.time()
+    SNAPSHOT_STATE["loads"] += 1
+    return changed
+
+
+def _log_loaded(path: str, snapshot: Dict, started: float) -> None:
+    age = time.time() - snapshot["createdAt"]
+    logger.info(
+        f"Loaded snapshot of {len(PLAYER_STATS)} players from {path} "
+        f"({age:.0f}s old, {time.monotonic() - started:.2f}s)"
+    )
+
+
+def load_snapshot(path: str = SNAPSHOT_PATH) -> bool:
+    """
+    Seed the stats table and academy cache from the snapshot at `path`.
+    A missing, unreadable or outdated file is skipped: the first refresh
+    then computes everything as on a first start.
+    """
+    if not path:
+        return False
+    started = time.monotonic()
+    try:
+        snapshot = _read(path)
+        if snapshot is None:
+            return False
+        restore_snapshot(snapshot)
+    except Exception as e:
+        logger.error(f"Could not load snapshot {path}: {e!r}")
+        return False
+    _log_loaded(path, snapshot, started)
+    return True
+
+
+async def reload_snapshot(path: str = SNAPSHOT_PATH) -> Optional[Set[str]]:
+    """
+    Swap in the snapshot at `path` if the file was replaced since it was
+    last loaded and holds another table, decoding it in a thread. Returns
+    the changed uuids, or None when nothing was loaded; a bad file keeps the
+    current table.
+    """
+    if not path or file_id(path) in (None, SNAPSHOT_STATE["file"]):
+        return None
+    started = time.monotonic()
+    try:
+        snapshot = await asyncio.to_thread(_read, path, SNAPSHOT_STATE["table"])
+        if snapshot is None:
+            return None
+        if "stats" not in snapshot:
+            # Same writer and version: the table held is already this one
+            SNAPSHOT_STATE["file"] = snapshot["file"]
+            SNAPSHOT_STATE["skipped"] += 1
+            return None
+        changed = restore_snapshot(snapshot)
+    except Exception as e:
+        logger.error(f"Could not load snapshot {path}: {e!r}")
+        return None
+    _log_loaded(path, snapshot, started)
+    return changed
+
+
+async def snapshot_job() -> None:
+    await save_snapshot()
+
+
+JOBS.append(("snapshot", snapshot_job))
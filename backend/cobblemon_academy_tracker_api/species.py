@@ -0,0 +1,69 @@
+"""
+Species catalogue, loaded once at startup, and the per-player species
+bitsets built on it.
+
+Bit i of a bitset stands for the i-th species of the catalogue in national
+dex order, so a player's caught, seen and shiny species are three ints of
+len(SPECIES) bits (about 90 bytes each). Completion is a popcount, missing
+species a mask, and comparing players or the whole server plain bitwise
+operations. Species outside the catalogue (addons) have no bit.
+"""
+
+import json
+import logging
+import os
+from typing import Dict, Iterable, List
+
+logger = logging.getLogger("uvicorn")
+
+BUNDLED_CATALOGUE = os.path.join(os.path.dirname(__file__), "species.json")
+# A JSON list of species ids in dex order, or a {species id: dex number} map
+# (e.g. extracted from the mod's species data)
+SPECIES_CATALOGUE = os.environ.get("SPECIES_CATALOGUE", BUNDLED_CATALOGUE)
+
+
+def load_catalogue(path: str) -> Dict[str, int]:
+    """{species id: dex number}, sorted by dex number."""
+    with open(path) as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        numbers = {species: int(number) for species, number in data.items()}
+        return dict(sorted(numbers.items(), key=lambda item: item[1]))
+    return {species: i + 1 for i, species in enumerate(data)}
+
+
+try:
+    DEX_NUMBERS = load_catalogue(SPECIES_CATALOGUE)
+except (OSError, ValueError, TypeError) as e:
+    logger.error(f"Could not load species from {SPECIES_CATALOGUE}: {e}")
+    DEX_NUMBERS = load_catalogue(BUNDLED_CATALOGUE)
+
+SPECIES: List[str] = list(DEX_NUMBERS)
+TOTAL_SPECIES = len(SPECIES)
+SPECIES_BITS: Dict[str, int] = {species: 1 << i for i, species in enumerate(SPECIES)}
+ALL_SPECIES = (1 << TOTAL_SPECIES) - 1
+
+
+def species_bitset(names: Iterable[str]) -> int:
+    bitset = 0
+    for name in names:
+        bitset |= SPECIES_BITS.get(name, 0)
+    return bitset
+
+
+def species_list(bitset: int) -> List[str]:
+    """The species set in `bitset`, in dex order."""
+    names = []
+    while bitset:
+        low = bitset & -bitset
+        names.append(SPECIES[low.bit_length() - 1])
+        bitset ^= low
+    return names
+
+
+def count_species(bitset: int) -> int:
+    return bitset.bit_count()
+
+
+def missing_species(bitset: int) -> List[str]:
+    return species_list(ALL_SPECIES & ~bitset)
@@ -0,0 +1,795 @@
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import bson
+from pymongo.errors import OperationFailure
+
+from cobblemon_academy_tracker_api.academy import METRICS, AcademyMetrics
+from cobblemon_academy_tracker_api.cache import SingleFlightCache
+from cobblemon_academy_tracker_api.database import get_collection
+from cobblemon_academy_tracker_api.species import species_bitset
+
+logger = logging.getLogger("uvicorn")
+
+STATS_REFRESH_INTERVAL_SECONDS = 10
+SOURCE_TIMEOUT_SECONDS = 30
+
+# Server-side fingerprint of every source document. Only {uuid, fingerprint}
+# travels over the wire, metrics are recomputed for changed players only.
+FINGERPRINT_PIPELINE = [
+    {"$match": {"uuid": {"$exists": True}}},
+    {
+        "$project": {
+            "_id": 0,
+            "uuid": 1,
+            "fingerprint": {"$toHashedIndexKey": "$$ROOT"},
+        }
+    },
+]
+
+
+@dataclass(slots=True)
+class PlayerStats:
+    """
+    Materialized metrics for one player, every one of them filled in by the
+    single pass over its source collection. A field is None when the player
+    has no document in that collection.
+    """
+
+    uuid: str
+    # PokeDexCollection
+    pokedex: Optional[int] = None
+    seen: Optional[int] = None
+    # Species bitsets over the catalogue, see species.py
+    caught_species: Optional[int] = None
+    seen_species: Optional[int] = None
+    shiny_species: Optional[int] = None
+    # PlayerPartyCollection, PCCollection
+    party_shiny: Optional[int] = None
+    pc_shiny: Optional[int] = None
+    # PlayerDataCollection
+    captures: Optional[int] = None
+    battles: Optional[int] = None
+    eggs: Optional[int] = None
+    aspects: Optional[int] = None
+    type_captures: Optional[Dict[str, int]] = None
+
+    @property
+    def shiny(self) -> Optional[int]:
+        if self.party_shiny is None and self.pc_shiny is None:
+            return None
+        return (self.party_shiny or 0) + (self.pc_shiny or 0)
+
+    def is_empty(self) -> bool:
+        return (
+            self.pokedex is None
+            and self.shiny is None
+            and self.battles is None
+            and self.eggs is None
+        )
+
+
+PLAYER_STATS: Dict[str, PlayerStats] = {}
+FINGERPRINTS: Dict[str, Dict[str, object]] = {}
+# version is bumped whenever a refresh changes the table. While live is set
+# a change feed keeps the table current, while scheduled the precompute
+# scheduler refreshes it; either way unforced refreshes are skipped. A
+# follower worker never reads the sources, it swaps in the leader's table.
+# task: refresh started in the background on behalf of a request.
+STATS_STATE: Dict = {
+    "refreshed_at": 0.0,
+    "lock": None,
+    "task": None,
+    "version": 0,
+    "live": False,
+    "scheduled": False,
+    "follower": False,
+    # ensure_player_stats() calls, so the scheduler can tell an idle server
+    "reads": 0,
+}
+# metric -> (stats version, players sorted by that metric)
+RANKINGS: Dict[str, Tuple[int, List[Tuple[str, float]]]] = {}
+# metric -> (stats version, uuid -> 1-based position in that ranking)
+RANK_POSITIONS: Dict[str, Tuple[int, Dict[str, int]]] = {}
+# collection -> outcome of its last refresh
+SOURCE_STATUS: Dict[str, Dict] = {}
+# Called with the uuids of every change applied to the table
+STATS_LISTENERS: List[Callable[[Set[str]], None]] = []
+
+
+# --- Per-document counters ---
+
+# Pokedex knowledge levels counted as caught / seen
+CAUGHT = ("CAUGHT",)
+SEEN = ("CAUGHT", "ENCOUNTERED")
+# Listed in a form's shinyStates once the player saw or caught it shiny
+SHINY_STATE = "shiny"
+
+
+def _count_species(doc: Dict, knowledge: Tuple[str, ...]) -> int:
+    count = 0
+    for species_data in doc.get("speciesRecords", {}).values():
+        form_records = species_data.get("formRecords", {})
+        for form_data in form_records.values():
+            if form_data.get("knowledge") in knowledge:
+                count += 1
+                break  # Count species only once even if several forms match
+    return count
+
+
+def count_caught_species(doc: Dict) -> int:
+    return _count_species(doc, CAUGHT)
+
+
+def count_seen_species(doc: Dict) -> int:
+    return _count_species(doc, SEEN)
+
+
+def _matching_species(doc: Dict, matches: Callable[[Dict], bool]) -> List[str]:
+    return [
+        species
+        for species, species_data in doc.get("speciesRecords", {}).items()
+        if any(matches(form) for form in species_data.get("formRecords", {}).values())
+    ]
+
+
+def caught_species_bitset(doc: Dict) -> int:
+    return species_bitset(
+        _matching_species(doc, lambda form: form.get("knowledge") in CAUGHT)
+    )
+
+
+def seen_species_bitset(doc: Dict) -> int:
+    return species_bitset(
+        _matching_species(doc, lambda form: form.get("knowledge") in SEEN)
+    )
+
+
+def shiny_species_bitset(doc: Dict) -> int:
+    return species_bitset(
+        _matching_species(
+            doc, lambda form: SHINY_STATE in (form.get("shinyStates") or ())
+        )
+    )
+
+
+def count_party_shinies(doc: Dict) -> int:
+    shiny_count = 0
+    for i in range(6):
+        slot = doc.get(f"Slot{i}")
+        if slot and slot.get("Shiny"):
+            shiny_count += 1
+    return shiny_count
+
+
+def count_pc_shinies(doc: Dict) -> int:
+    shiny_count = 0
+    for key, val in doc.items():
+        if key.startswith("Box") and isinstance(val, dict):
+            for slot, poke in val.items():
+                if slot.startswith("Slot") and isinstance(poke, dict):
+                    if poke.get("Shiny"):
+                        shiny_count += 1
+    return shiny_count
+
+
+def battle_victories(doc: Dict) -> int:
+    """Battle score using PvP + PvN (excluding PvW - wild battles)"""
+    advancement_data = doc.get("advancementData", {})
+    pvp_wins = advancement_data.get("totalPvPBattleVictoryCount") or 0
+    pvn_wins = advancement_data.get("totalPvNBattleVictoryCount") or 0
+    return pvp_wins + pvn_wins
+
+
+def total_captures(doc: Dict) -> int:
+    return doc.get("advancementData", {}).get("totalCaptureCount") or 0
+
+
+def eggs_hatched(doc: Dict) -> int:
+    return doc.get("advancementData", {}).get("totalEggsHatched") or 0
+
+
+def count_aspects(doc: Dict) -> int:
+    return len(doc.get("advancementData", {}).get("aspectsCollected") or {})
+
+
+def type_capture_counts(doc: Dict) -> Dict[str, int]:
+    return dict(doc.get("advancementData", {}).get("totalTypeCaptureCounts") or {})
+
+
+# --- Server-side counters ---
+#
+# Each expression mirrors the per-document counter above so that MongoDB
+# only ships {uuid, <metric>} rows instead of whole documents.
+
+
+def _species_filter_expr(form_cond: Dict) -> Dict:
+    """The {k: species, v: record} pairs with a form matching `form_cond`."""
+    return {
+        "$filter": {
+            "input": {"$objectToArray": {"$ifNull": ["$speciesRecords", {}]}},
+            "as": "species",
+            "cond": {
+                "$gt": [
+                    {
+                        "$size": {
+                            "$filter": {
+                                "input": {
+                                    "$objectToArray": {
+                                        "$ifNull": ["$$species.v.formRecords", {}]
+                                    }
+                                },
+                                "as": "form",
+                                "cond": form_cond,
+                            }
+                        }
+                    },
+                    0,
+                ]
+            },
+        }
+    }
+
+
+def _knowledge_cond(knowledge: Tuple[str, ...]) -> Dict:
+    return {"$in": ["$$form.v.knowledge", list(knowledge)]}
+
+
+def _species_count_expr(knowledge: Tuple[str, ...]) -> Dict:
+    return {"$size": _species_filter_expr(_knowledge_cond(knowledge))}
+
+
+def _species_names_expr(form_cond: Dict) -> Dict:
+    return {
+        "$map": {
+            "input": _species_filter_expr(form_cond),
+            "as": "species",
+            "in": "$$species.k",
+        }
+    }
+
+
+CAUGHT_SPECIES_EXPR = _species_count_expr(CAUGHT)
+SEEN_SPECIES_EXPR = _species_count_expr(SEEN)
+# Species names, turned into bitsets by SERVER_DECODERS
+CAUGHT_NAMES_EXPR = _species_names_expr(_knowledge_cond(CAUGHT))
+SEEN_NAMES_EXPR = _species_names_expr(_knowledge_cond(SEEN))
+SHINY_NAMES_EXPR = _species_names_expr(
+    {"$in": [SHINY_STATE, {"$ifNull": ["$$form.v.shinyStates", []]}]}
+)
+
+PARTY_SHINY_EXPR = {
+    "$size": {
+        "$filter": {
+            "input": {"$objectToArray": "$$ROOT"},
+            "as": "slot",
+            "cond": {
+                "$and": [
+                    {"$in": ["$$slot.k", [f"Slot{i}" for i in range(6)]]},
+                    {"$eq": ["$$slot.v.Shiny", True]},
+                ]
+            },
+        }
+    }
+}
+
+PC_SHINY_EXPR = {
+    "$sum": {
+        "$map": {
+            "input": {
+                "$filter": {
+                    "input": {"$objectToArray": "$$ROOT"},
+                    "as": "box",
+                    "cond": {
+                        "$and": [
+                            {"$regexMatch": {"input": "$$box.k", "regex": "^Box"}},
+                            {"$eq": [{"$type": "$$box.v"}, "object"]},
+                        ]
+                    },
+                }
+            },
+            "as": "box",
+            "in": {
+                "$size": {
+                    "$filter": {
+                        "input": {"$objectToArray": "$$box.v"},
+                        "as": "slot",
+                        "cond": {
+                            "$and": [
+                                {
+                                    "$regexMatch": {
+                                        "input": "$$slot.k",
+                                        "regex": "^Slot",
+                                    }
+                                },
+                                {"$eq": ["$$slot.v.Shiny", True]},
+                            ]
+                        },
+                    }
+                }
+            },
+        }
+    }
+}
+
+BATTLES_EXPR = {
+    "$add": [
+        {"$ifNull": ["$advancementData.totalPvPBattleVictoryCount", 0]},
+        {"$ifNull": ["$advancementData.totalPvNBattleVictoryCount", 0]},
+    ]
+}
+
+CAPTURES_EXPR = {"$ifNull": ["$advancementData.totalCaptureCount", 0]}
+
+EGGS_EXPR = {"$ifNull": ["$advancementData.totalEggsHatched", 0]}
+
+ASPECTS_EXPR = {
+    "$size": {"$objectToArray": {"$ifNull": ["$advancementData.aspectsCollected", {}]}}
+}
+
+TYPE_CAPTURES_EXPR = {"$ifNull": ["$advancementData.totalTypeCaptureCounts", {}]}
+
+
+# --- Source collections ---
+
+# collection -> {PlayerStats field: (aggregation expression, Python fallback)}.
+# Every field of a collection comes out of one pass over it, so a refresh
+# reads each collection once whatever the number of metrics.
+SOURCES: Dict[str, Dict[str, Tuple[Dict, Callable[[Dict], object]]]] = {
+    "PokeDexCollection": {
+        "pokedex": (CAUGHT_SPECIES_EXPR, count_caught_species),
+        "seen": (SEEN_SPECIES_EXPR, count_seen_species),
+        "caught_species": (CAUGHT_NAMES_EXPR, caught_species_bitset),
+        "seen_species": (SEEN_NAMES_EXPR, seen_species_bitset),
+        "shiny_species": (SHINY_NAMES_EXPR, shiny_species_bitset),
+    },
+    "PlayerPartyCollection": {
+        "party_shiny": (PARTY_SHINY_EXPR, count_party_shinies),
+    },
+    "PCCollection": {
+        "pc_shiny": (PC_SHINY_EXPR, count_pc_shinies),
+    },
+    "PlayerDataCollection": {
+        "captures": (CAPTURES_EXPR, total_captures),
+        "battles": (BATTLES_EXPR, battle_victories),
+        "eggs": (EGGS_EXPR, eggs_hatched),
+        "aspects": (ASPECTS_EXPR, count_aspects),
+        "type_captures": (TYPE_CAPTURES_EXPR, type_capture_counts),
+    },
+}
+
+
+# Fields whose aggregation result is converted in Python: MongoDB can't build
+# the species bitsets, it returns the species names
+SERVER_DECODERS: Dict[str, Callable[[object], object]] = {
+    "caught_species": species_bitset,
+    "seen_species": species_bitset,
+    "shiny_species": species_bitset,
+}
+
+
+def _decode(field: str, value: object) -> object:
+    decode = SERVER_DECODERS.get(field)
+    return value if decode is None else decode(value or ())
+
+
+def metric_pipeline(
+    name: str, uuids: Optional[List[str]] = None, fingerprint: bool = False
+) -> List[Dict]:
+    """
+    Per-player metrics of one source, with each document's fingerprint as
+    well when asked, so a first load reads the collection only once.
+    """
+    match = (
+        {"uuid": {"$in": uuids}} if uuids is not None else {"uuid": {"$exists": True}}
+    )
+    fields = {field: expr for field, (expr, _) in SOURCES[name].items()}
+    if fingerprint:
+        fields["fingerprint"] = {"$toHashedIndexKey": "$$ROOT"}
+    return [{"$match": match}, {"$project": {"_id": 0, "uuid": 1, **fields}}]
+
+
+def compute_metrics(name: str, doc: Dict) -> Dict[str, float]:
+    """Pure-Python equivalent of metric_pipeline for a single document."""
+    return {field: fallback(doc) for field, (_, fallback) in SOURCES[name].items()}
+
+
+def _metric_row(name: str, doc: Dict) -> Dict[str, float]:
+    return {field: _decode(field, doc.get(field, 0)) for field in SOURCES[name]}
+
+
+async def collect_metrics(
+    name: str, uuids: Optional[List[str]] = None
+) -> Dict[str, Dict[str, float]]:
+    """
+    Per-player metrics of one source collection, restricted to `uuids` when
+    given. Falls back to counting in Python when the server (or the test
+    mock) cannot evaluate the pipeline.
+    """
+    collection = get_collection(name, scan=True)
+    rows: Dict[str, Dict[str, float]] = {}
+
+    try:
+        async for doc in collection.aggregate(metric_pipeline(name, uuids)):
+            rows[doc["uuid"]] = _metric_row(name, doc)
+    except OperationFailure as e:
+        logger.warning(f"Metric pipeline failed on {name}, counting in Python: {e}")
+        rows.clear()
+        query = {"uuid": {"$in": uuids}} if uuids is not None else {}
+        async for doc in collection.find(query):
+            uuid = doc.get("uuid")
+            if uuid:
+                rows[uuid] = compute_metrics(name, doc)
+
+    return rows
+
+
+def _fingerprint(doc: Dict) -> bytes:
+    return hashlib.blake2b(bson.encode(doc), digest_size=8).digest()
+
+
+def _updated(
+    rows: Dict[str, PlayerStats], uuid: str, values: Dict[str, object]
+) -> PlayerStats:
+    """A new row for the player with `values` set, the table's row is left as is."""
+    stats = rows.get(uuid) or PLAYER_STATS.get(uuid)
+    if stats is None:
+        return PlayerStats(uuid=uuid, **values)
+    return replace(stats, **values)
+
+
+@dataclass
+class SourceChanges:
+    """What one source refresh found, applied to the table only as a whole."""
+
+    rows: Dict[str, Dict[str, float]]
+    dropped: Set[str]
+    # None keeps the known fingerprints (a change feed event)
+    fingerprints: Optional[Dict[str, object]] = None
+
+    @property
+    def touched(self) -> Set[str]:
+        return self.rows.keys() | self.dropped
+
+
+async def _scan_source(name: str) -> SourceChanges:
+    """
+    First load of a source: metrics and fingerprints from a single read of
+    the collection, hashed client-side when $toHashedIndexKey is unavailable.
+    """
+    collection = get_collection(name, scan=True)
+    rows: Dict[str, Dict[str, float]] = {}
+    current: Dict[str, object] = {}
+
+    try:
+        pipeline = metric_pipeline(name, fingerprint=True)
+        async for doc in collection.aggregate(pipeline):
+            rows[doc["uuid"]] = _metric_row(name, doc)
+            current[doc["uuid"]] = doc.get("fingerprint")
+    except OperationFailure:
+        rows.clear()
+        current.clear()
+        async for doc in collection.find({"uuid": {"$exists": True}}):
+            uuid = doc["uuid"]
+            rows[uuid] = compute_metrics(name, doc)
+            current[uuid] = _fingerprint(doc)
+
+    return SourceChanges(rows, set(), current)
+
+
+async def _refresh_source(name: str) -> SourceChanges:
+    """
+    Collect the changes of one source collection since the previous refresh:
+    metrics of the players whose document changed and the players whose
+    document is gone. Nothing is applied here, see _commit.
+    """
+    known = FINGERPRINTS.get(name)
+    if known is None:
+        return await _scan_source(name)
+
+    collection = get_collection(name, scan=True)
+    current: Dict[str, object] = {}
+    rows: Dict[str, Dict[str, float]] = {}
+
+    try:
+        async for doc in collection.aggregate(FINGERPRINT_PIPELINE):
+            current[doc["uuid"]] = doc.get("fingerprint")
+    except OperationFailure:
+        # $toHashedIndexKey is unavailable, hash the documents client-side
+        current.clear()
+        async for doc in collection.find({"uuid": {"$exists": True}}):
+            uuid = doc["uuid"]
+            current[uuid] = _fingerprint(doc)
+            if known.get(uuid) != current[uuid]:
+                rows[uuid] = compute_metrics(name, doc)
+    else:
+        stale = [
+            uuid
+            for uuid, fingerprint in current.items()
+            if known.get(uuid) != fingerprint
+        ]
+        if stale:
+            rows = await collect_metrics(name, stale)
+
+    return SourceChanges(rows, known.keys() - current.keys(), current)
+
+
+def _commit(changes: Dict[str, SourceChanges]) -> Set[str]:
+    """
+    Apply the changes of one or more sources. The new rows are built off to
+    the side and swapped in without yielding to the event loop, so readers
+    see the table before or after the refresh, never in between. Returns the
+    uuids that were touched.
+    """
+    rows: Dict[str, PlayerStats] = {}
+    for name, source in changes.items():
+        for uuid, values in source.rows.items():
+            rows[uuid] = _updated(rows, uuid, values)
+        cleared = dict.fromkeys(SOURCES[name])
+        for uuid in source.dropped:
+            if uuid in rows or uuid in PLAYER_STATS:
+                rows[uuid] = _updated(rows, uuid, cleared)
+
+    for uuid, stats in rows.items():
+        if stats.is_empty():
+            PLAYER_STATS.pop(uuid, None)
+        else:
+            PLAYER_STATS[uuid] = stats
+    for name, source in changes.items():
+        if source.fingerprints is not None:
+            FINGERPRINTS[name] = source.fingerprints
+    return {uuid for source in changes.values() for uuid in source.touched}
+
+
+async def _timed_refresh(name: str) -> SourceChanges:
+    started = time.monotonic()
+    # A source that never loaded has no previous values to fall back on
+    timeout = SOURCE_TIMEOUT_SECONDS if name in FINGERPRINTS else None
+    try:
+        changes = await asyncio.wait_for(_refresh_source(name), timeout)
+    except Exception as e:
+        SOURCE_STATUS[name] = {
+            "ok": False,
+            "seconds": time.monotonic() - started,
+            "error": repr(e),
+        }
+        raise
+    SOURCE_STATUS[name] = {"ok": True, "seconds": time.monotonic() - started}
+    return changes
+
+
+def _changed(uuids: Set[str]) -> None:
+    STATS_STATE["version"] += 1
+    for listener in STATS_LISTENERS:
+        try:
+            listener(uuids)
+        except Exception as e:
+            logger.error(f"Stats listener failed: {e!r}")
+
+
+def _lock() -> asyncio.Lock:
+    if STATS_STATE["lock"] is None:
+        STATS_STATE["lock"] = asyncio.Lock()
+    return STATS_STATE["lock"]
+
+
+def _refresh_due(force: bool) -> bool:
+    if force:
+        return True
+    if STATS_STATE["follower"]:
+        return False
+    elapsed = time.monotonic() - STATS_STATE["refreshed_at"]
+    if elapsed < STATS_REFRESH_INTERVAL_SECONDS:
+        return False
+    background = STATS_STATE["live"] or STATS_STATE["scheduled"]
+    return not (background and STATS_STATE["refreshed_at"])
+
+
+async def refresh_player_stats(force: bool = False) -> Set[str]:
+    """
+    Bring the stats table up to date with MongoDB. Calls within
+    STATS_REFRESH_INTERVAL_SECONDS of the last refresh are free, and so are
+    all unforced calls while a live change feed or the precompute scheduler
+    keeps the table current, or while another worker computes it. Free calls
+    return without waiting for a refresh in progress.
+
+    Source collections are refreshed concurrently and their changes swapped
+    in together once all of them finished. A source that fails or exceeds
+    SOURCE_TIMEOUT_SECONDS keeps its previous values and is retried on the
+    next refresh.
+    """
+    if not _refresh_due(force):
+        return set()
+    async with _lock():
+        # Another caller may have refreshed while this one waited
+        if not _refresh_due(force):
+            return set()
+
+        results = await asyncio.gather(
+            *(_timed_refresh(name) for name in SOURCES), return_exceptions=True
+        )
+
+        staged: Dict[str, SourceChanges] = {}
+        for name, result in zip(SOURCES, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Stats refresh failed for {name}: {result!r}")
+            else:
+                staged[name] = result
+
+        changed = _commit(staged)
+        STATS_STATE["refreshed_at"] = time.monotonic()
+        if changed:
+            _changed(changed)
+            logger.info(f"Refreshed stats for {len(changed)} players")
+        return changed
+
+
+async def _background_refresh() -> None:
+    try:
+        await refresh_player_stats()
+    except Exception as e:
+        logger.error(f"Background stats refresh failed: {e!r}")
+
+
+async def ensure_player_stats() -> None:
+    """
+    For request handlers: wait for the table only until it was loaded once.
+    After that a due refresh is started in the background and the current
+    table is served, a request never waits on a recompute.
+    """
+    STATS_STATE["reads"] += 1
+    if not STATS_STATE["refreshed_at"]:
+        await refresh_player_stats()
+        return
+    task = STATS_STATE["task"]
+    if _refresh_due(False) and not _lock().locked() and (task is None or task.done()):
+        STATS_STATE["task"] = asyncio.create_task(_background_refresh())
+
+
+async def resync_source(name: str) -> Set[str]:
+    """Fingerprint refresh of a single source, for changes a feed can't attribute."""
+    async with _lock():
+        changed = _commit({name: await _timed_refresh(name)})
+        if changed:
+            _changed(changed)
+        return changed
+
+
+def apply_change(name: str, uuid: str, doc: Optional[Dict]) -> None:
+    """
+    Apply one source document as reported by a change feed, or drop the
+    player's values for that source when `doc` is None.
+    """
+    if doc is None:
+        changes = SourceChanges({}, {uuid})
+    else:
+        changes = SourceChanges({uuid: compute_metrics(name, doc)}, set())
+    _commit({name: changes})
+    _changed({uuid})
+
+
+def replace_table(
+    rows: Dict[str, PlayerStats],
+    fingerprints: Dict[str, Dict[str, object]],
+    changed: Optional[Set[str]] = None,
+) -> Set[str]:
+    """
+    Swap in a table computed elsewhere (a snapshot) in one step, as far as
+    readers are concerned. Listeners are told about the players whose stats
+    differ, which are returned; rows are only compared when the caller does
+    not know them as `changed`.
+    """
+    if changed is None:
+        changed = {
+            uuid
+            for uuid in PLAYER_STATS.keys() | rows.keys()
+            if PLAYER_STATS.get(uuid) != rows.get(uuid)
+        }
+    # Table order decides ties, a reordered table needs new rankings too
+    reordered = list(PLAYER_STATS) != list(rows)
+
+    PLAYER_STATS.clear()
+    PLAYER_STATS.update(rows)
+    FINGERPRINTS.clear()
+    FINGERPRINTS.update(fingerprints)
+    STATS_STATE["refreshed_at"] = time.monotonic()
+    if changed:
+        _changed(changed)
+    elif reordered:
+        STATS_STATE["version"] += 1
+    return changed
+
+
+# --- Readers ---
+
+
+def metric_total(metric: str) -> float:
+    return sum(metric_scores(metric).values())
+
+
+def metric_scores(metric: str) -> Dict[str, float]:
+    """Every player that has a value for the metric, in table order."""
+    scores = {}
+    for uuid, stats in PLAYER_STATS.items():
+        value = getattr(stats, metric)
+        if value is not None:
+            scores[uuid] = value
+    return scores
+
+
+def species_union(field: str) -> int:
+    """Bitwise OR of one species bitset over every player."""
+    union = 0
+    for stats in PLAYER_STATS.values():
+        union |= getattr(stats, field) or 0
+    return union
+
+
+def player_metrics(uuid: str) -> Optional[Dict[str, Optional[float]]]:
+    """The player's derived metrics, or None when they have no data at all."""
+    stats = PLAYER_STATS.get(uuid)
+    if stats is None:
+        return None
+    return {
+        "pokedex": stats.pokedex,
+        "seen": stats.seen,
+        "shiny": stats.shiny,
+        "captures": stats.captures,
+        "battles": stats.battles,
+        "eggs": stats.eggs,
+        "aspects": stats.aspects,
+        "types": stats.type_captures,
+    }
+
+
+def ranked_players(metric: str) -> List[Tuple[str, float]]:
+    """
+    Players sorted by the metric, highest first. The ordering is cached until
+    the next refresh that changes the table, so any page is a plain slice.
+    """
+    version = STATS_STATE["version"]
+    cached = RANKINGS.get(metric)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    ranking = sorted(metric_scores(metric).items(), key=lambda x: x[1], reverse=True)
+    RANKINGS[metric] = (version, ranking)
+    return ranking
+
+
+def ranked_position(metric: str, uuid: str) -> Optional[int]:
+    """The player's rank on the metric's leaderboard, None when not on it."""
+    version = STATS_STATE["version"]
+    cached = RANK_POSITIONS.get(metric)
+    if cached is None or cached[0] != version:
+        positions = {u: i for i, (u, _) in enumerate(ranked_players(metric), start=1)}
+        cached = RANK_POSITIONS[metric] = (version, positions)
+    return cached[1].get(uuid)
+
+
+# --- Academy ---
+
+ACADEMY_CACHE_TTL_SECONDS = 60
+
+# Stats version the cached AcademyMetrics were computed from
+ACADEMY_STATE: Dict[str, Optional[int]] = {"version": None}
+
+
+async def calculate_academy_metrics() -> AcademyMetrics:
+    await ensure_player_stats()
+    version = STATS_STATE["version"]
+    if ACADEMY_CACHE.value is not None and ACADEMY_STATE["version"] == version:
+        # Unchanged table: keep the same object so weighted snapshots stay valid
+        return ACADEMY_CACHE.value
+    metrics = AcademyMetrics({metric: metric_scores(metric) for metric in METRICS})
+    ACADEMY_STATE["version"] = version
+    return metrics
+
+
+ACADEMY_CACHE = SingleFlightCache(
+    "academy", calculate_academy_metrics, ttl_seconds=ACADEMY_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,125 @@
+"""
+Leader election between the worker processes of one deployment (uvicorn
+--workers N), so only one of them reads MongoDB to compute leaderboards.
+
+The leader holds an exclusive flock on WORKER_LOCK_PATH and runs the change
+feed and the precompute scheduler as a single worker would, writing every
+new table to the snapshot file. Followers never refresh from the source
+collections: each scheduler cycle they read the snapshot the leader last
+wrote, if it holds a newer table, and they try the lock again, so one of
+them takes over when the leader exits.
+"""
+
+import logging
+import os
+import time
+from typing import Dict
+
+try:
+    import fcntl
+except ImportError:  # Windows: every worker computes on its own
+    fcntl = None
+
+from cobblemon_academy_tracker_api.live import announce, start_live_updates
+from cobblemon_academy_tracker_api.scheduler import JOBS, PRECOMPUTE_INTERVAL_SECONDS
+from cobblemon_academy_tracker_api.snapshots import (
+    SNAPSHOT_PATH,
+    SNAPSHOT_STATE,
+    reload_snapshot,
+)
+from cobblemon_academy_tracker_api.stats import STATS_STATE
+
+logger = logging.getLogger("uvicorn")
+
+# uvicorn's default --workers. A single worker never elects: it stays
+# "single" and saves snapshots on the SNAPSHOT_INTERVAL_SECONDS throttle.
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", "1"))
+WORKER_LOCK_PATH = os.environ.get(
+    "WORKER_LOCK_PATH",
+    f"{SNAPSHOT_PATH}.lock" if SNAPSHOT_PATH and WEB_CONCURRENCY > 1 else "",
+)
+
+# role: "single" (no election), "leader" or "follower"
+WORKER_STATE: Dict = {"role": "single", "fd": None, "since": None, "swaps": 0}
+
+
+def _try_lock() -> bool:
+    fd = WORKER_STATE["fd"]
+    if fd is None:
+        fd = WORKER_STATE["fd"] = os.open(WORKER_LOCK_PATH, os.O_RDWR | os.O_CREAT)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def _become(role: str) -> None:
+    WORKER_STATE["role"] = role
+    WORKER_STATE["since"] = time.time()
+    STATS_STATE["follower"] = role == "follower"
+    SNAPSHOT_STATE["shared"] = role == "leader"
+    logger.info(f"Worker {os.getpid()} is the {role}")
+
+
+def elect_leader() -> str:
+    """
+    Take the lock if no other worker holds it. Needs a lock path (set, or
+    derived from the snapshot file with several workers) and the scheduler;
+    without them every worker stays "single" and computes its own
+    leaderboards.
+    """
+    if fcntl is None or not WORKER_LOCK_PATH or PRECOMPUTE_INTERVAL_SECONDS <= 0:
+        return WORKER_STATE["role"]
+    try:
+        leader = _try_lock()
+    except OSError as e:
+        logger.error(f"Could not open worker lock {WORKER_LOCK_PATH}: {e}")
+        return WORKER_STATE["role"]
+    _become("leader" if leader else "follower")
+    return WORKER_STATE["role"]
+
+
+def release_leadership() -> None:
+    fd = WORKER_STATE["fd"]
+    if fd is None:
+        return
+    # Closing the descriptor drops the lock, a follower takes over
+    os.close(fd)
+    WORKER_STATE["fd"] = None
+    STATS_STATE["follower"] = False
+    SNAPSHOT_STATE["shared"] = False
+
+
+async def follow_leader_job() -> None:
+    if WORKER_STATE["role"] != "follower":
+        return
+    if _try_lock():
+        # The leader exited. The stats job that follows refreshes the table
+        # incrementally from the fingerprints of its last snapshot.
+        _become("leader")
+        start_live_updates()
+        return
+    changed = await reload_snapshot()
+    if changed is not None:
+        WORKER_STATE["swaps"] += 1
+        if changed:
+            announce(changed)
+
+
+# Before the stats refresh, so a newly elected leader refreshes right away
+JOBS.insert(0, ("workers", follow_leader_job))
+
+
+def worker_status() -> Dict:
+    return {
+        "pid": os.getpid(),
+        "role": WORKER_STATE["role"],
+        "since": WORKER_STATE["since"],
+        "lockPath": WORKER_LOCK_PATH or None,
+        "snapshotPath": SNAPSHOT_PATH or None,
+        "snapshotSwaps": WORKER_STATE["swaps"],
+        "snapshotSkips": SNAPSHOT_STATE["skipped"],
+        "snapshotLoadedAt": SNAPSHOT_STATE["loaded_at"],
+        "snapshotSavedAt": SNAPSHOT_STATE["saved_at"],
+    }
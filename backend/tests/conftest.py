@@ -3,8 +3,14 @@ import json
 import os
 from unittest.mock import MagicMock, AsyncMock
 from httpx import AsyncClient, ASGITransport
+from pymongo.errors import OperationFailure
 from cobblemon_academy_tracker_api.main import app
 from cobblemon_academy_tracker_api import database
+from cobblemon_academy_tracker_api.live import (
+    LocalEventSource,
+    start_live_updates,
+    stop_live_updates,
+)
 
 # Load sample data
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
@@ -26,19 +32,70 @@ def load_json(filename):
 
 MOCK_DB = {name: load_json(file) for name, file in DATA_FILES.items()}
 
+# Expression operators the mock cannot evaluate. Pipelines using them fail
+# like an old MongoDB server would, so callers take their Python fallback.
+UNSUPPORTED_OPERATORS = ("$filter", "$map", "$reduce", "$toHashedIndexKey")
+
+
+# $type names of the values in tests, bool before its int superclass
+BSON_TYPES = [
+    (bool, "bool"),
+    (int, "int"),
+    (float, "double"),
+    (str, "string"),
+    (dict, "object"),
+    (list, "array"),
+    (type(None), "null"),
+]
+
+
+@pytest.fixture
+def mongomock_db(monkeypatch):
+    # A database that really evaluates pipelines, with mongomock (optional);
+    # it lacks the $type expression and $sum over an array, added here
+    mongomock = pytest.importorskip("mongomock")
+    aggregate = pytest.importorskip("mongomock.aggregate")
+    handle_type_operator = aggregate._Parser._handle_type_operator
+    handle_project_operator = aggregate._Parser._handle_project_operator
+
+    def handle_type(self, operator, values):
+        if operator != "$type":
+            return handle_type_operator(self, operator, values)
+        try:
+            value = self.parse(values)
+        except KeyError:
+            return "missing"
+        types = (name for kind, name in BSON_TYPES if isinstance(value, kind))
+        return next(types, "other")
+
+    def handle_project(self, operator, values):
+        if operator == "$sum" and isinstance(values, dict):
+            # A single expression resolving to an array sums its elements
+            value = self.parse(values)
+            if isinstance(value, list):
+                return sum(v for v in value if isinstance(v, (int, float)))
+        return handle_project_operator(self, operator, values)
+
+    monkeypatch.setattr(
+        aggregate, "type_operators", [*aggregate.type_operators, "$type"]
+    )
+    monkeypatch.setattr(aggregate._Parser, "_handle_type_operator", handle_type)
+    monkeypatch.setattr(aggregate._Parser, "_handle_project_operator", handle_project)
+    return mongomock.MongoClient().db
+
 
 @pytest.fixture
 def mock_mongo():
     # Create a mock for the database functionality
     mock_get_collection = MagicMock()
 
-    def side_effect(collection_name):
+    def side_effect(collection_name, scan=False):
         mock_collection = AsyncMock()
 
         data = MOCK_DB.get(collection_name, [])
 
         # Mock find_one
-        async def find_one(query):
+        async def find_one(query, projection=None):
             # Simple exact match for uuid if present
             target_uuid = query.get("uuid")
             if target_uuid:
@@ -49,6 +106,18 @@ def mock_mongo():
 
         mock_collection.find_one = find_one
 
+        def matches(doc, query):
+            for key, cond in query.items():
+                value = doc.get(key)
+                if isinstance(cond, dict):
+                    if "$in" in cond and value not in cond["$in"]:
+                        return False
+                    if "$exists" in cond and (key in doc) != cond["$exists"]:
+                        return False
+                elif value != cond:
+                    return False
+            return True
+
         # Mock aggregate (for leaderboards)
         # We need to simulate the pipeline logic slightly to return meaningful data
         # or just return the data sorted by the field requested.
@@ -68,10 +137,24 @@ def mock_mongo():
                     return item
                 raise StopAsyncIteration
 
+        def find(query=None, projection=None):
+            return MockCursor([doc for doc in data if matches(doc, query or {})])
+
+        mock_collection.find = find
+
+        async def estimated_document_count():
+            return len(data)
+
+        mock_collection.estimated_document_count = estimated_document_count
+
         def aggregate(pipeline):
             # Very basic extraction of sort field from pipeline
             # Pipeline is usually [ {$sort: ...}, {$limit: ...}, {$project: ...} ]
 
+            serialized = json.dumps(pipeline)
+            if any(op in serialized for op in UNSUPPORTED_OPERATORS):
+                raise OperationFailure("Unsupported pipeline in mock")
+
             dataset = data[:]
 
             # 1. Sort
@@ -94,7 +177,11 @@ def mock_mongo():
 
                 dataset.sort(key=lambda x: get_val(x, field), reverse=descending)
 
-            # 2. Limit
+            # 2. Skip / Limit
+            skip_stage = next((s for s in pipeline if "$skip" in s), None)
+            if skip_stage:
+                dataset = dataset[skip_stage["$skip"] :]
+
             limit_stage = next((s for s in pipeline if "$limit" in s), None)
             if limit_stage:
                 limit = limit_stage["$limit"]
@@ -141,3 +228,13 @@ async def client(mock_mongo, monkeypatch):
         transport=ASGITransport(app=app), base_url="http://test"
     ) as ac:
         yield ac
+
+
+@pytest.fixture
+async def live_events():
+    # Feed the live updater from a local queue instead of a change stream;
+    # tests publish() document changes on the returned source
+    source = LocalEventSource()
+    start_live_updates(make_source=lambda: source)
+    yield source
+    await stop_live_updates()
@@ -0,0 +1,68 @@
+import pytest
+
+from cobblemon_academy_tracker_api.academy import (
+    MAX_METRIC_VALUE,
+    METRICS,
+    AcademyMetrics,
+    AcademyRankEngine,
+    CountIndex,
+)
+
+
+def test_count_index_rejects_negative_values():
+    index = CountIndex(8)
+    with pytest.raises(ValueError):
+        index.add(-1)
+    assert index.total == 0
+    assert index.count_above(0) == 0
+
+
+def test_engine_clamps_out_of_range_values():
+    scores = {
+        "pokedex": {"a": 10, "corrupt": 5, "huge": 3},
+        "shiny": {"a": 1},
+        "battles": {"a": 4, "corrupt": -1, "huge": 10**12},
+        "eggs": {"a": 2, "corrupt": -7},
+    }
+    engine = AcademyRankEngine(scores)
+
+    # Negative counters count as 0, huge ones are indexed at the cap
+    assert engine.values["corrupt"] == (5, 0, 0, 0)
+    assert engine.values["huge"][2] == MAX_METRIC_VALUE
+    assert engine.indexes["battles"].size <= 2 * MAX_METRIC_VALUE
+    assert engine.rank("huge", "battles") == 1
+    assert engine.rank("corrupt", "battles") == 3
+    assert engine.normalized("corrupt", "eggs") == 0.0
+
+    engine.update("a", {"pokedex": 10, "shiny": -3, "battles": 10**15, "eggs": 2})
+    assert engine.values["a"] == (10, 0, MAX_METRIC_VALUE, 2)
+    assert engine.rank("a", "battles") == 1
+    assert engine.rank("huge", "battles") == 1
+
+
+def test_joins_settle_to_a_full_rerank():
+    scores = {
+        "pokedex": {"a": 10, "b": 4, "c": 7},
+        "shiny": {"a": 1, "c": 2},
+        "battles": {"b": 9, "c": 3},
+        "eggs": {"a": 2},
+    }
+    engine = AcademyRankEngine(scores)
+
+    # Joining changes everyone's normalization: the board waits for settle()
+    assert engine.update("d", {"pokedex": 12, "shiny": 0, "battles": 1}) is None
+    assert engine.update("b", None) is None
+    assert engine.pending
+
+    for metric, value in {"pokedex": 12, "shiny": 0, "battles": 1}.items():
+        scores[metric]["d"] = value
+    for metric in METRICS:
+        scores[metric].pop("b", None)
+    expected = {e.uuid: e for e in AcademyMetrics(scores).weigh(engine.weights)}
+
+    entry = engine.entry("d")
+    assert not engine.pending
+    assert engine.scores == {uuid: e.academyScore for uuid, e in expected.items()}
+    assert entry.academyRank == expected["d"].academyRank
+    assert entry.ranks == expected["d"].ranks
+    assert entry.totalPlayers == 3
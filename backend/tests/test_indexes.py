@@ -0,0 +1,77 @@
+from pymongo.errors import OperationFailure
+
+from cobblemon_academy_tracker_api import indexes
+from cobblemon_academy_tracker_api.indexes import _plan_stages, verify_query_plans
+
+IXSCAN = {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "uuid"}}
+COLLSCAN = {"stage": "COLLSCAN", "direction": "forward"}
+# A blocking sort over an index scan, as nested by newer servers
+IN_MEMORY_SORT = {
+    "queryPlan": {
+        "stage": "LIMIT",
+        "inputStage": {"stage": "SORT", "inputStage": IXSCAN},
+    }
+}
+
+
+class ExplainCursor:
+    def __init__(self, plan):
+        self.plan = plan
+
+    def limit(self, n):
+        return self
+
+    def sort(self, sort):
+        return self
+
+    async def explain(self):
+        if isinstance(self.plan, Exception):
+            raise self.plan
+        return {"queryPlanner": {"winningPlan": self.plan}}
+
+
+def explained_collections(monkeypatch, plans):
+    # Collections whose hot query gets the given plan, IXSCAN by default
+    class Collection:
+        def __init__(self, name):
+            self.name = name
+
+        def find(self, query, projection=None):
+            return ExplainCursor(plans.get(self.name, IXSCAN))
+
+    monkeypatch.setattr(indexes, "get_collection", Collection)
+
+
+def test_plan_stages_walks_nested_plans():
+    assert _plan_stages(IXSCAN) == ["FETCH", "IXSCAN"]
+    assert _plan_stages(IN_MEMORY_SORT) == ["LIMIT", "SORT", "FETCH", "IXSCAN"]
+    assert _plan_stages({"stage": "OR", "inputStages": [IXSCAN, COLLSCAN]}) == [
+        "OR",
+        "FETCH",
+        "IXSCAN",
+        "COLLSCAN",
+    ]
+
+
+async def test_index_backed_queries_pass(monkeypatch):
+    explained_collections(monkeypatch, {})
+    assert await verify_query_plans() == []
+
+
+async def test_collection_scans_and_memory_sorts_are_reported(monkeypatch, caplog):
+    explained_collections(
+        monkeypatch,
+        {
+            "PCCollection": COLLSCAN,
+            "UserCache": IN_MEMORY_SORT,
+            "PokeDexCollection": OperationFailure("not authorized"),
+        },
+    )
+
+    problems = await verify_query_plans()
+
+    # A query that cannot be explained is logged, not reported as a problem
+    assert problems == ["PCCollection by uuid", "UserCache by uuids"]
+    assert "uses a COLLSCAN" in caplog.text
+    assert "sorts in memory" in caplog.text
+    assert "Could not explain PokeDexCollection by uuid" in caplog.text
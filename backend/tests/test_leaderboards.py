@@ -0,0 +1,71 @@
+import pytest
+
+from cobblemon_academy_tracker_api import services, stats
+from cobblemon_academy_tracker_api.routers import leaderboards
+from tests.conftest import MOCK_DB
+
+PLAYER = "00000000-0000-0000-0000-000000000001"
+OTHER = "00000000-0000-0000-0000-000000000002"
+
+
+def player_doc(uuid, captures):
+    return {"uuid": uuid, "advancementData": {"totalCaptureCount": captures}}
+
+
+@pytest.fixture
+def board(client, mock_mongo, monkeypatch):
+    # An empty stats table over two players, usernames never looked up
+    monkeypatch.setattr(stats, "get_collection", mock_mongo)
+    monkeypatch.setattr(services, "get_collection", mock_mongo)
+    for name in stats.SOURCES:
+        monkeypatch.setitem(MOCK_DB, name, [])
+    monkeypatch.setitem(MOCK_DB, "UserCache", [])
+    MOCK_DB["PlayerDataCollection"].extend(
+        [player_doc(PLAYER, 10), player_doc(OTHER, 5)]
+    )
+    stats.PLAYER_STATS.clear()
+    stats.FINGERPRINTS.clear()
+    stats.RANKINGS.clear()
+    leaderboards.LEADERBOARD_RESPONSES.clear()
+    monkeypatch.setitem(stats.STATS_STATE, "refreshed_at", 0.0)
+    monkeypatch.setitem(stats.STATS_STATE, "lock", None)
+    monkeypatch.setitem(stats.STATS_STATE, "task", None)
+    monkeypatch.setitem(services.RESOLVER_STATE, "disabled", True)
+    yield client
+    stats.PLAYER_STATS.clear()
+    stats.FINGERPRINTS.clear()
+    leaderboards.LEADERBOARD_RESPONSES.clear()
+
+
+async def test_matching_etag_gets_304(board):
+    first = await board.get("/leaderboards/captures")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert [e["uuid"] for e in first.json()["entries"]] == [PLAYER, OTHER]
+
+    for if_none_match in (etag, f"W/{etag}", f'"other", {etag}'):
+        cached = await board.get(
+            "/leaderboards/captures", headers={"If-None-Match": if_none_match}
+        )
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
+
+    other = await board.get("/leaderboards/captures", headers={"If-None-Match": '"x"'})
+    assert other.status_code == 200
+    assert other.content == first.content
+
+
+async def test_stats_version_change_invalidates_etag(board):
+    first = await board.get("/leaderboards/captures")
+    etag = first.headers["etag"]
+    version = stats.STATS_STATE["version"]
+
+    MOCK_DB["PlayerDataCollection"][1] = player_doc(OTHER, 50)
+    await stats.refresh_player_stats(force=True)
+    assert stats.STATS_STATE["version"] > version
+
+    fresh = await board.get("/leaderboards/captures", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["etag"] != etag
+    assert [e["uuid"] for e in fresh.json()["entries"]] == [OTHER, PLAYER]
@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from cobblemon_academy_tracker_api import live, stats
+from cobblemon_academy_tracker_api.routers import live as live_router
+from tests.conftest import MOCK_DB
+
+PLAYER = "00000000-0000-0000-0000-000000000001"
+OTHER = "00000000-0000-0000-0000-000000000002"
+
+
+def player_doc(uuid, captures):
+    return {
+        "uuid": uuid,
+        "advancementData": {
+            "totalCaptureCount": captures,
+            "totalPvPBattleVictoryCount": 1,
+            "totalEggsHatched": 2,
+        },
+    }
+
+
+async def wait_until(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+async def next_event(queue, event):
+    while True:
+        message = await asyncio.wait_for(queue.get(), 2.0)
+        if message["event"] == event:
+            return message["data"]
+
+
+@pytest.fixture
+def sources(mock_mongo, monkeypatch):
+    # The stats table reads the mock collections; every test starts from an
+    # empty table and live state
+    monkeypatch.setattr(stats, "get_collection", mock_mongo)
+    for name in stats.SOURCES:
+        monkeypatch.setitem(MOCK_DB, name, [])
+    MOCK_DB["PlayerDataCollection"].extend(
+        [player_doc(PLAYER, 10), player_doc(OTHER, 5)]
+    )
+    stats.PLAYER_STATS.clear()
+    stats.FINGERPRINTS.clear()
+    stats.RANKINGS.clear()
+    monkeypatch.setitem(stats.STATS_STATE, "refreshed_at", 0.0)
+    monkeypatch.setitem(stats.STATS_STATE, "lock", None)
+    monkeypatch.setitem(stats.STATS_STATE, "task", None)
+    yield MOCK_DB
+    stats.PLAYER_STATS.clear()
+    stats.FINGERPRINTS.clear()
+    live.SUBSCRIBERS.clear()
+
+
+async def test_local_events_update_stats_and_subscribers(sources, live_events):
+    await wait_until(lambda: PLAYER in stats.PLAYER_STATS)
+    assert stats.PLAYER_STATS[PLAYER].captures == 10
+    queue = live.subscribe()
+
+    live_events.publish("PlayerDataCollection", PLAYER, player_doc(PLAYER, 42))
+
+    delta = await next_event(queue, "player")
+    assert delta["uuid"] == PLAYER
+    assert delta["captures"] == 42
+    assert stats.PLAYER_STATS[PLAYER].captures == 42
+    assert stats.PLAYER_STATS[OTHER].captures == 5
+    board = await next_event(queue, "leaderboards")
+    assert board == {"version": stats.STATS_STATE["version"], "players": 1}
+    assert [uuid for uuid, _ in stats.ranked_players("captures")] == [PLAYER, OTHER]
+
+
+async def test_local_delete_removes_player(sources, live_events):
+    await wait_until(lambda: OTHER in stats.PLAYER_STATS)
+    queue = live.subscribe()
+
+    live_events.publish("PlayerDataCollection", OTHER, None)
+
+    assert await next_event(queue, "player") == {"uuid": OTHER, "removed": True}
+    assert OTHER not in stats.PLAYER_STATS
+
+
+async def test_polling_source_catches_up(sources):
+    live.start_live_updates(make_source=lambda: live.PollingSource(interval=0.01))
+    try:
+        await wait_until(lambda: PLAYER in stats.PLAYER_STATS)
+        assert live.LIVE_STATE["mode"] == "poll"
+        queue = live.subscribe()
+
+        # Written behind the updater's back, as on a server without change
+        # streams: the next fingerprint pass picks up both changes
+        sources["PlayerDataCollection"][0] = player_doc(PLAYER, 7)
+        sources["PlayerDataCollection"].append(player_doc("new-player", 3))
+
+        board = await next_event(queue, "leaderboards")
+        assert board["players"] == 2
+        assert stats.PLAYER_STATS[PLAYER].captures == 7
+        assert stats.PLAYER_STATS["new-player"].captures == 3
+    finally:
+        await live.stop_live_updates()
+
+
+async def test_sse_stream_filters_player_events(sources, live_events):
+    await wait_until(lambda: PLAYER in stats.PLAYER_STATS)
+    response = await live_router.live_events(uuid=PLAYER)
+    stream = response.body_iterator
+    try:
+        assert await anext(stream) == "retry: 5000\n\n"
+
+        live_events.publish("PlayerDataCollection", OTHER, player_doc(OTHER, 6))
+        live_events.publish("PlayerDataCollection", PLAYER, player_doc(PLAYER, 11))
+
+        messages = [await asyncio.wait_for(anext(stream), 2.0) for _ in range(2)]
+        player = next(m for m in messages if m.startswith("event: player"))
+        assert f'"uuid": "{PLAYER}"' in player
+        assert '"captures": 11' in player
+        assert any(m.startswith("event: leaderboards") for m in messages)
+        assert OTHER not in "".join(messages)
+    finally:
+        await stream.aclose()
+    assert not live.SUBSCRIBERS
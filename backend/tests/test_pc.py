@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+from cobblemon_academy_tracker_api.pc import (
+    _index_slots,
+    index_pc_document,
+    pc_index_pipeline,
+    pc_page_from_document,
+)
+
+UUID = "00000000-0000-0000-0000-000000000001"
+
+
+@pytest.fixture
+def pc_collection(mongomock_db):
+    return mongomock_db.PCCollection
+
+
+def pokemon(species, shiny=False, **fields):
+    return {
+        "Species": species,
+        "Level": 5,
+        "Experience": 0,
+        "Gender": "MALE",
+        "Shiny": shiny,
+        "Nature": "cobblemon:hardy",
+        "Ability": {"AbilityName": "static"},
+        "IVs": {},
+        "EVs": {},
+        "Health": 20,
+        "Friendship": 50,
+        "CaughtBall": "cobblemon:poke_ball",
+        **fields,
+    }
+
+
+def random_slot(rnd):
+    return rnd.choice(
+        [
+            pokemon("cobblemon:pikachu"),
+            pokemon("cobblemon:pikachu", shiny=True),
+            pokemon("cobblemon:Charmander", shiny=None),
+            pokemon("cobblemon:eevee", shiny=1),
+            pokemon(42),
+            {"Species": "cobblemon:mew"},
+            {"Shiny": True},
+            "corrupt",
+            None,
+            [],
+        ]
+    )
+
+
+def random_pc(rnd):
+    doc = {"uuid": UUID, "BoxCount": rnd.randint(1, 4)}
+    for box in range(rnd.randint(0, 5)):
+        slots = {f"Slot{i}": random_slot(rnd) for i in rnd.sample(range(30), 8)}
+        slots["NotASlot"] = pokemon("cobblemon:ditto")
+        doc[f"Box{box}"] = rnd.choice([slots, slots, "corrupt"])
+    return doc
+
+
+@pytest.mark.parametrize("shiny", [None, True, False])
+@pytest.mark.parametrize("species", [None, "PIKA", "char", "mew", "a.b"])
+def test_index_pipeline_matches_python_fallback(pc_collection, shiny, species):
+    rnd = random.Random(f"{shiny}{species}")
+    for _ in range(30):
+        doc = random_pc(rnd)
+        pc_collection.delete_many({})
+        pc_collection.insert_one(dict(doc))
+
+        (index,) = pc_collection.aggregate(pc_index_pipeline(UUID, shiny, species))
+        assert index["BoxCount"] == doc["BoxCount"]
+        assert _index_slots(index) == index_pc_document(doc, shiny, species)
+
+
+def test_invalid_slots_keep_their_page_position():
+    box = {
+        "Slot0": pokemon("cobblemon:pikachu"),
+        "Slot1": {"Species": "cobblemon:mew"},
+        "Slot2": pokemon("cobblemon:eevee"),
+        "Slot3": "corrupt",
+    }
+    doc = {"uuid": UUID, "BoxCount": 1, "Box0": box}
+
+    first = pc_page_from_document(doc, page=1, limit=2)
+    second = pc_page_from_document(doc, page=2, limit=2)
+
+    assert [(p.Species, p.slotIndex) for p in first] == [("cobblemon:pikachu", 0)]
+    assert [(p.Species, p.slotIndex) for p in second] == [("cobblemon:eevee", 2)]
@@ -0,0 +1,21 @@
+from cobblemon_academy_tracker_api.routers.players import build_pokedex_stats
+from cobblemon_academy_tracker_api.species import SPECIES, TOTAL_SPECIES, species_bitset
+from cobblemon_academy_tracker_api.stats import PlayerStats
+
+
+def test_pokedex_stats_count_catalogue_and_addon_species_apart():
+    caught = [SPECIES[0], SPECIES[1], "addon:fakemon"]
+    stats = PlayerStats(
+        uuid="player",
+        pokedex=len(caught),
+        seen=len(caught),
+        caught_species=species_bitset(caught),
+    )
+
+    pokedex = build_pokedex_stats(stats)
+
+    assert pokedex.total_caught == 3
+    assert pokedex.catalogue_caught == 2
+    assert pokedex.catalogue_size == TOTAL_SPECIES
+    assert pokedex.completion_percentage == round(2 / TOTAL_SPECIES * 100, 2)
+    assert len(pokedex.missing_species) == TOTAL_SPECIES - 2
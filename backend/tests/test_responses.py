@@ -0,0 +1,115 @@
+from typing import List
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from cobblemon_academy_tracker_api.responses import ModelResponse
+from cobblemon_academy_tracker_api.schemas import (
+    AcademyRankEntry,
+    PlayerProfile,
+    PlayerSummary,
+    PokedexStats,
+    Pokemon,
+)
+
+UUID = "00000000-0000-0000-0000-000000000001"
+
+
+def pokemon(species, **fields):
+    return Pokemon(
+        Species=species,
+        Level=36,
+        Experience=4200,
+        Gender="FEMALE",
+        Shiny=True,
+        Nature="cobblemon:modest",
+        Ability={"AbilityName": "blaze", "AbilityIndex": 1},
+        IVs={"cobblemon:hp": 31, "cobblemon:special_attack": 30},
+        EVs={"cobblemon:speed": 252},
+        MoveSet=[{"MoveName": "ember", "MovePP": 25, "RaisedPPStages": 0}],
+        Health=97,
+        Friendship=255,
+        CaughtBall="cobblemon:ultra_ball",
+        ScaleModifier=0.85,
+        PokemonOriginalTrainer="Ash",
+        **fields,
+    )
+
+
+PARTY = [pokemon("cobblemon:charmeleon"), pokemon("cobblemon:flabébé")]
+PC = [pokemon("cobblemon:vulpix", boxIndex=2, slotIndex=17)]
+PROFILE = PlayerProfile(
+    summary=PlayerSummary(
+        uuid=UUID,
+        username="Sérénä",
+        advancementData={
+            "totalCaptureCount": 12,
+            "totalTypeCaptureCounts": {"fire": 7},
+            "aspectsCollected": {"cobblemon:vulpix": ["alolan"]},
+        },
+    ),
+    pokedex=PokedexStats(
+        total_seen=40,
+        total_caught=21,
+        catalogue_caught=20,
+        catalogue_size=1025,
+        completion_percentage=1.95,
+        missing_species=["cobblemon:mew"],
+    ),
+    party=PARTY,
+    rank=AcademyRankEntry(
+        uuid=UUID,
+        username="Sérénä",
+        academyRank=3,
+        academyScore=0.1 + 0.2,
+        ranks={"pokedex": 2, "shiny": 1},
+        normalized={"pokedex": 2 / 3, "shiny": 1.0},
+        totalPlayers=7,
+    ),
+    capturesRank=4,
+    pc=PC,
+)
+
+app = FastAPI()
+
+
+@app.get("/old/profile", response_model=PlayerProfile)
+async def old_profile():
+    return PROFILE
+
+
+@app.get("/new/profile", response_model=PlayerProfile)
+async def new_profile():
+    return ModelResponse(PROFILE)
+
+
+@app.get("/old/pc", response_model=List[Pokemon])
+async def old_pc():
+    return PARTY + PC
+
+
+@app.get("/new/pc", response_model=List[Pokemon])
+async def new_pc():
+    return ModelResponse(PARTY + PC, List[Pokemon])
+
+
+@pytest.mark.parametrize("path", ["profile", "pc"])
+async def test_model_response_matches_response_model(path):
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        old = await client.get(f"/old/{path}")
+        new = await client.get(f"/new/{path}")
+
+    assert new.status_code == old.status_code == 200
+    assert new.headers["content-type"] == old.headers["content-type"]
+    assert new.json() == old.json()
+    assert new.content == old.content
+
+
+def test_model_response_uses_aliases():
+    body = ModelResponse(PARTY[0]).body.decode()
+    assert '"cobblemon:hp":31' in body
+    assert '"PokemonOriginalTrainer":"Ash"' in body
+    assert "OriginalTrainer" not in body.replace("PokemonOriginalTrainer", "")
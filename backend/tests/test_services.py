@@ -0,0 +1,112 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import pytest
+
+from cobblemon_academy_tracker_api import services
+from cobblemon_academy_tracker_api.services import (
+    BREAKER_THRESHOLD,
+    RESOLVER_STATE,
+    UNKNOWN_USERNAME,
+    USERNAME_CACHE,
+    ResolverError,
+    StaticResolver,
+    resolve_usernames,
+    start_username_worker,
+    stop_username_worker,
+    wait_for_usernames,
+)
+from tests.conftest import MOCK_DB
+
+
+class FailingResolver:
+    name = "failing"
+
+    async def resolve(self, uuid):
+        raise ResolverError("unreachable")
+
+
+@pytest.fixture
+async def resolver_state(mock_mongo, monkeypatch):
+    monkeypatch.setattr(services, "get_collection", mock_mongo)
+    monkeypatch.setitem(MOCK_DB, "UserCache", [])
+    for key, value in {
+        "pending": set(),
+        "retry": OrderedDict(),
+        "failures": 0,
+        "open_until": 0.0,
+        "cooldown": services.BREAKER_COOLDOWN_SECONDS,
+        "trips": 0,
+        "resolved": 0,
+        "not_found": 0,
+        "errors": 0,
+    }.items():
+        monkeypatch.setitem(RESOLVER_STATE, key, value)
+    USERNAME_CACHE.clear()
+    yield RESOLVER_STATE
+    await stop_username_worker()
+    USERNAME_CACHE.clear()
+
+
+async def test_unknown_names_are_placeholders_until_resolved(resolver_state):
+    start_username_worker(StaticResolver({"known": "Ash"}))
+
+    first = await resolve_usernames(["known", "ghost"])
+    assert first == {"known": UNKNOWN_USERNAME, "ghost": UNKNOWN_USERNAME}
+
+    await wait_for_usernames()
+    assert resolver_state["resolved"] == 1
+    assert resolver_state["not_found"] == 1
+
+    # The name is served from memory, the miss is asked again later
+    second = await resolve_usernames(["known", "ghost"])
+    assert second == {"known": "Ash", "ghost": UNKNOWN_USERNAME}
+
+
+async def test_fresh_misses_are_not_looked_up_again(resolver_state, monkeypatch):
+    monkeypatch.setitem(
+        MOCK_DB,
+        "UserCache",
+        [
+            {
+                "uuid": "ghost",
+                "not_found": True,
+                "updated_at": datetime.now(timezone.utc),
+            }
+        ],
+    )
+    start_username_worker(StaticResolver({"ghost": "Misty"}))
+
+    assert await resolve_usernames(["ghost"]) == {"ghost": UNKNOWN_USERNAME}
+    await wait_for_usernames()
+
+    assert resolver_state["resolved"] == 0
+    assert USERNAME_CACHE["ghost"][0] == UNKNOWN_USERNAME
+
+
+async def test_breaker_opens_after_repeated_failures(resolver_state):
+    for i in range(BREAKER_THRESHOLD):
+        await services._lookup(FailingResolver(), f"player-{i}")
+
+    status = services.resolver_status()
+    assert status["circuitOpen"]
+    assert status["trips"] == 1
+    assert status["backingOff"] == BREAKER_THRESHOLD
+
+    # One answer closes the circuit again
+    await services._lookup(StaticResolver({"player-0": "Brock"}), "player-0")
+    status = services.resolver_status()
+    assert not status["circuitOpen"]
+    assert status["consecutiveFailures"] == 0
+    assert status["backingOff"] == BREAKER_THRESHOLD - 1
+
+
+async def test_backoff_tracks_a_bounded_number_of_uuids(resolver_state, monkeypatch):
+    monkeypatch.setattr(services, "RETRY_TRACK_SIZE", 2)
+
+    for uuid in ("a", "b", "a", "c"):
+        await services._lookup(FailingResolver(), uuid)
+
+    # "b" failed least recently and is forgotten first
+    assert list(resolver_state["retry"]) == ["a", "c"]
+    assert resolver_state["retry"]["a"][0] == 2
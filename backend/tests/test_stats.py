@@ -0,0 +1,89 @@
+import pytest
+
+from cobblemon_academy_tracker_api import stats
+from cobblemon_academy_tracker_api.species import SPECIES
+from cobblemon_academy_tracker_api.stats import (
+    SOURCES,
+    _metric_row,
+    collect_metrics,
+    metric_pipeline,
+)
+from tests import conftest
+from tests.conftest import MOCK_DB
+
+
+def form(knowledge, *shiny_states):
+    return {"knowledge": knowledge, "shinyStates": list(shiny_states)}
+
+
+DOCUMENTS = {
+    "PokeDexCollection": [
+        {
+            "uuid": "a",
+            "speciesRecords": {
+                SPECIES[0]: {"formRecords": {"normal": form("CAUGHT", "shiny")}},
+                SPECIES[1]: {
+                    "formRecords": {
+                        "normal": form("ENCOUNTERED"),
+                        "alolan": form("CAUGHT"),
+                    }
+                },
+                SPECIES[2]: {"formRecords": {"normal": form("ENCOUNTERED", "shiny")}},
+                "addon:fakemon": {"formRecords": {"normal": form("CAUGHT")}},
+            },
+        },
+        {"uuid": "b", "speciesRecords": {SPECIES[3]: {"formRecords": {}}}},
+        {"uuid": "c"},
+    ],
+    "PlayerPartyCollection": [
+        {"uuid": "a", "Slot0": {"Shiny": True}, "Slot2": {"Shiny": False}},
+        {"uuid": "b", "Slot1": {"Shiny": True}, "Slot5": {"Shiny": True}},
+        {"uuid": "c"},
+    ],
+    "PCCollection": [
+        {
+            "uuid": "a",
+            "BoxCount": 2,
+            "Box0": {"Slot0": {"Shiny": True}, "Slot3": {"Shiny": False}},
+            "Box1": {"Slot1": {"Shiny": True}, "Other": {"Shiny": True}},
+            "Boxes": "not a box",
+        },
+        {"uuid": "b", "Box0": {}},
+        {"uuid": "c"},
+    ],
+    "PlayerDataCollection": [
+        {
+            "uuid": "a",
+            "advancementData": {
+                "totalCaptureCount": 12,
+                "totalPvPBattleVictoryCount": 3,
+                "totalPvNBattleVictoryCount": 4,
+                "totalEggsHatched": 2,
+                "aspectsCollected": {"shiny": 1, "alolan": 1},
+                "totalTypeCaptureCounts": {"fire": 5, "water": 7},
+            },
+        },
+        {"uuid": "b", "advancementData": {"totalPvPBattleVictoryCount": 1}},
+        {"uuid": "c"},
+    ],
+}
+
+
+@pytest.mark.parametrize("name", list(SOURCES))
+async def test_pipeline_and_fallback_return_the_same_metrics(
+    name, mongomock_db, mock_mongo, monkeypatch
+):
+    mongomock_db[name].insert_many([dict(doc) for doc in DOCUMENTS[name]])
+    pipeline = {
+        doc["uuid"]: _metric_row(name, doc)
+        for doc in mongomock_db[name].aggregate(metric_pipeline(name))
+    }
+
+    # The conftest mock rejects every metric pipeline, so this counts in Python
+    monkeypatch.setattr(conftest, "UNSUPPORTED_OPERATORS", ("$project",))
+    monkeypatch.setattr(stats, "get_collection", mock_mongo)
+    monkeypatch.setitem(MOCK_DB, name, DOCUMENTS[name])
+    fallback = await collect_metrics(name)
+
+    assert pipeline == fallback
+    assert set(fallback) == {"a", "b", "c"}
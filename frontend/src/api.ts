@@ -9,6 +9,9 @@ export interface PlayerSummary {
     battlesWon: number;
     pokedexCompletion: number;
     pokedexCount: number;
+    // Caught species of the catalogue the completion is counted against
+    pokedexCatalogueCount: number;
+    pokedexCatalogueSize: number;
 }
 
 export interface Pokemon {
@@ -41,6 +44,23 @@ interface BackendLeaderboardEntry {
     rank: number;
 }
 
+interface BackendLeaderboardResponse {
+    category: string;
+    totalPlayers: number;
+    limit: number;
+    offset: number;
+    entries: BackendLeaderboardEntry[];
+}
+
+interface BackendAcademyRankResponse {
+    category: string;
+    totalPlayers: number;
+    limit: number;
+    offset: number;
+    weights: Record<string, number>;
+    entries: AcademyRankEntry[];
+}
+
 interface BackendPlayerSummary {
     uuid: string;
     username: string;
@@ -51,6 +71,30 @@ interface BackendPlayerSummary {
     };
 }
 
+interface BackendPokedexStats {
+    total_seen: number;
+    total_caught: number;
+    catalogue_caught: number;
+    catalogue_size: number;
+    completion_percentage: number;
+}
+
+interface BackendPlayerProfile {
+    summary: BackendPlayerSummary;
+    pokedex: BackendPokedexStats;
+    party: BackendPokemon[];
+    rank: AcademyRankEntry | null;
+    capturesRank: number | null;
+    pc: BackendPokemon[];
+}
+
+export interface PlayerProfileData {
+    summary: PlayerSummary;
+    party: PlayerPartyMember[];
+    pc: Pokemon[];
+    rank: AcademyRankEntry | null;
+}
+
 interface BackendPokemon {
     Species: string;
     Level: number;
@@ -62,13 +106,13 @@ interface BackendPokemon {
 }
 
 export const api = {
-    getLeaderboard: async (category: "shiny" | "captures" | "battles" | "pokedex"): Promise<LeaderboardEntry[]> => {
+    getLeaderboard: async (category: "shiny" | "captures" | "battles" | "pokedex", limit = 10, offset = 0): Promise<LeaderboardEntry[]> => {
         try {
-            const res = await fetch(`${BASE_URL}/leaderboards/${category}`);
+            const res = await fetch(`${BASE_URL}/leaderboards/${category}?limit=${limit}&offset=${offset}`);
             if (!res.ok) throw new Error("Failed to fetch leaderboard");
-            const data: BackendLeaderboardEntry[] = await res.json();
+            const data: BackendLeaderboardResponse = await res.json();
 
-            return data.map(entry => ({
+            return data.entries.map(entry => ({
                 uuid: entry.uuid,
                 name: entry.username || "Unknown",
                 value: entry.value,
@@ -81,11 +125,12 @@ export const api = {
         }
     },
 
-    getAcademyLeaderboard: async (limit = 100): Promise<AcademyRankEntry[]> => {
+    getAcademyLeaderboard: async (limit = 100, offset = 0): Promise<AcademyRankEntry[]> => {
         try {
-            const res = await fetch(`${BASE_URL}/leaderboards/academy?limit=${limit}`);
+            const res = await fetch(`${BASE_URL}/leaderboards/academy?limit=${limit}&offset=${offset}`);
             if (!res.ok) return [];
-            return await res.json();
+            const data: BackendAcademyRankResponse = await res.json();
+            return data.entries;
         } catch (error) {
             console.error(error);
             return [];
@@ -103,6 +148,24 @@ export const api = {
         }
     },
 
+    getPlayerProfile: async (uuid: string): Promise<PlayerProfileData | null> => {
+        try {
+            const res = await fetch(`${BASE_URL}/players/${uuid}/profile`);
+            if (!res.ok) return null;
+            const data: BackendPlayerProfile = await res.json();
+
+            return {
+                summary: transformBackendSummary(data.summary, data.pokedex, data.capturesRank ?? 0),
+                party: data.party.map(p => transformBackendPokemon(p)),
+                pc: data.pc.map(p => transformBackendPokemon(p)),
+                rank: data.rank,
+            };
+        } catch (error) {
+            console.error(error);
+            return null;
+        }
+    },
+
     getPlayer: async (uuid: string): Promise<PlayerSummary | null> => {
         try {
             const [summaryRes, leaderboard, pokedexRes] = await Promise.all([
@@ -117,24 +180,9 @@ export const api = {
             const rankEntry = leaderboard.find(e => e.uuid === uuid);
             const rank = rankEntry ? rankEntry.rank : 0;
 
-            let pokedexCompletion = 0;
-            let pokedexCount = 0;
-            if (pokedexRes.ok) {
-                const pokedexData = await pokedexRes.json();
-                pokedexCompletion = pokedexData.completion_percentage ?? 0;
-                pokedexCount = pokedexData.total_caught ?? 0;
-            }
+            const pokedexData: BackendPokedexStats | null = pokedexRes.ok ? await pokedexRes.json() : null;
 
-            return {
-                uuid: data.uuid,
-                name: data.username || "Unknown",
-                rank: rank,
-                totalCaptures: data.advancementData?.totalCaptureCount ?? 0,
-                shinyCount: data.advancementData?.totalShinyCaptureCount ?? 0,
-                battlesWon: data.advancementData?.totalBattleVictoryCount ?? 0,
-                pokedexCompletion: pokedexCompletion,
-                pokedexCount: pokedexCount,
-            };
+            return transformBackendSummary(data, pokedexData, rank);
         } catch (error) {
             console.error(error);
             return null;
@@ -173,23 +221,36 @@ export const api = {
         }
     },
 
-    getServerStats: async () => {
+    subscribeToLive: (handlers: LiveHandlers, uuid?: string): (() => void) => {
+        if (typeof EventSource === "undefined") return () => {};
+        const params = uuid ? `?uuid=${encodeURIComponent(uuid)}` : "";
+        const source = new EventSource(`${BASE_URL}/live/events${params}`);
+
+        if (handlers.onPlayer) {
+            const onPlayer = handlers.onPlayer;
+            source.addEventListener("player", (e) => onPlayer(JSON.parse((e as MessageEvent).data)));
+        }
+        if (handlers.onLeaderboards) {
+            const onLeaderboards = handlers.onLeaderboards;
+            source.addEventListener("leaderboards", (e) => onLeaderboards(JSON.parse((e as MessageEvent).data).version));
+        }
+        if (handlers.onAcademy) {
+            const onAcademy = handlers.onAcademy;
+            source.addEventListener("academy", (e) => onAcademy(JSON.parse((e as MessageEvent).data)));
+        }
+
+        return () => source.close();
+    },
+
+    getServerStats: async (): Promise<ServerStats> => {
         try {
-            const [captures, shiny, battles, academy] = await Promise.all([
-                api.getLeaderboard("captures"),
-                api.getLeaderboard("shiny"),
-                api.getLeaderboard("battles"),
-                api.getAcademyLeaderboard(10)
+            const [totalsRes, shiny, academy] = await Promise.all([
+                fetch(`${BASE_URL}/stats/server`),
+                api.getLeaderboard("shiny", 5),
+                api.getAcademyLeaderboard(5)
             ]);
-
-            const totalCaptures = captures.reduce((acc, curr) => acc + curr.value, 0);
-            const totalShinies = shiny.reduce((acc, curr) => acc + curr.value, 0);
-            const totalBattles = battles.reduce((acc, curr) => acc + curr.value, 0);
-            const activeTrainers = new Set([
-                ...captures.map(e => e.uuid),
-                ...shiny.map(e => e.uuid),
-                ...battles.map(e => e.uuid)
-            ]).size;
+            if (!totalsRes.ok) throw new Error("Failed to fetch server stats");
+            const totals: BackendServerStats = await totalsRes.json();
 
             const featuredTrainers: LeaderboardEntry[] = academy.map(entry => ({
                 uuid: entry.uuid,
@@ -200,11 +261,8 @@ export const api = {
             }));
 
             return {
-                totalCaptures,
-                totalShinies,
-                totalBattles,
-                activeTrainers,
-                topShinies: shiny.slice(0, 5),
+                ...totals,
+                topShinies: shiny,
                 recentTrainers: featuredTrainers,
             };
         } catch (error) {
@@ -213,6 +271,7 @@ export const api = {
                 totalCaptures: 0,
                 totalShinies: 0,
                 totalBattles: 0,
+                totalEggs: 0,
                 activeTrainers: 0,
                 topShinies: [],
                 recentTrainers: [],
@@ -221,11 +280,40 @@ export const api = {
     }
 };
 
-export interface ServerStats {
+export interface LivePlayerDelta {
+    uuid: string;
+    pokedex?: number | null;
+    seen?: number | null;
+    shiny?: number | null;
+    captures?: number | null;
+    battles?: number | null;
+    eggs?: number | null;
+    aspects?: number | null;
+    types?: Record<string, number> | null;
+    removed?: boolean;
+}
+
+export interface LiveAcademyDelta {
+    players: number;
+    // New academy scores by uuid, null when too many players were rescored
+    scores: Record<string, number> | null;
+}
+
+export interface LiveHandlers {
+    onPlayer?: (delta: LivePlayerDelta) => void;
+    onLeaderboards?: (version: number) => void;
+    onAcademy?: (delta: LiveAcademyDelta) => void;
+}
+
+interface BackendServerStats {
     totalCaptures: number;
     totalShinies: number;
     totalBattles: number;
+    totalEggs: number;
     activeTrainers: number;
+}
+
+export interface ServerStats extends BackendServerStats {
     topShinies: LeaderboardEntry[];
     recentTrainers: LeaderboardEntry[];
 }
@@ -275,6 +363,21 @@ const NAME_EXCEPTIONS: Record<string, string> = {
     "mrmime": "mr-mime",
 };
 
+function transformBackendSummary(data: BackendPlayerSummary, pokedex: BackendPokedexStats | null, rank: number): PlayerSummary {
+    return {
+        uuid: data.uuid,
+        name: data.username || "Unknown",
+        rank: rank,
+        totalCaptures: data.advancementData?.totalCaptureCount ?? 0,
+        shinyCount: data.advancementData?.totalShinyCaptureCount ?? 0,
+        battlesWon: data.advancementData?.totalBattleVictoryCount ?? 0,
+        pokedexCompletion: pokedex?.completion_percentage ?? 0,
+        pokedexCount: pokedex?.total_caught ?? 0,
+        pokedexCatalogueCount: pokedex?.catalogue_caught ?? 0,
+        pokedexCatalogueSize: pokedex?.catalogue_size ?? 722,
+    };
+}
+
 function transformBackendPokemon(p: BackendPokemon): Pokemon {
     const rawSpecies = stripPrefix(p.Species);
     const displaySpecies = rawSpecies.charAt(0).toUpperCase() + rawSpecies.slice(1);
@@ -1,4 +1,4 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { Tabs, TabsList, TabsTrigger, TabsContent } from "@/components/ui/tabs";
 import { Badge } from "@/components/ui/badge";
 import { api, type LeaderboardEntry, type AcademyRankEntry } from "../api";
@@ -19,6 +19,9 @@ const categories = {
 
 type CategoryKey = keyof typeof categories;
 
+// Live leaderboard notices are coalesced into at most one refetch per window
+const LIVE_REFRESH_MS = 5000;
+
 export default function Leaderboards() {
     const [searchParams, setSearchParams] = useSearchParams();
     const tabParam = searchParams.get("tab") as CategoryKey | null;
@@ -28,6 +31,25 @@ export default function Leaderboards() {
     const [data, setData] = useState<LeaderboardEntry[]>([]);
     const [academyData, setAcademyData] = useState<AcademyRankEntry[]>([]);
     const [loading, setLoading] = useState(true);
+    const [liveVersion, setLiveVersion] = useState(0);
+    const loadedCategory = useRef<CategoryKey | null>(null);
+
+    useEffect(() => {
+        let timer: ReturnType<typeof setTimeout> | null = null;
+        const unsubscribe = api.subscribeToLive({
+            onLeaderboards: () => {
+                if (timer) return;
+                timer = setTimeout(() => {
+                    timer = null;
+                    setLiveVersion(v => v + 1);
+                }, LIVE_REFRESH_MS);
+            },
+        });
+        return () => {
+            if (timer) clearTimeout(timer);
+            unsubscribe();
+        };
+    }, []);
 
     useEffect(() => {
         if (tabParam && tabParam in categories && tabParam !== category) {
@@ -43,21 +65,27 @@ export default function Leaderboards() {
 
     useEffect(() => {
         let ignore = false;
+        // Live refreshes of the current tab update it in place
+        const silent = loadedCategory.current === category;
         const fetchData = async () => {
-            setLoading(true);
-            setData([]);
+            if (!silent) {
+                setLoading(true);
+                setData([]);
+            }
             try {
                 if (category === "academy") {
                     const res = await api.getAcademyLeaderboard();
                     if (!ignore) {
                         setAcademyData(res);
                         setLoading(false);
+                        loadedCategory.current = category;
                     }
                 } else {
                     const res = await api.getLeaderboard(category as Exclude<CategoryKey, "academy">);
                     if (!ignore) {
                         setData(res.filter(entry => entry.value > 0));
                         setLoading(false);
+                        loadedCategory.current = category;
                     }
                 }
             } catch {
@@ -70,7 +98,7 @@ export default function Leaderboards() {
         return () => {
             ignore = true;
         };
-    }, [category]);
+    }, [category, liveVersion]);
 
     const top3 = data.slice(0, 3);
     const rest = data.slice(3, 10);
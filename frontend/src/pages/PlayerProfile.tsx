@@ -45,26 +45,16 @@ export default function PlayerProfile() {
     }, [searchQuery]);
 
     const [rankData, setRankData] = useState<AcademyRankEntry | null>(null);
-
-    useEffect(() => {
-        const fetchRank = async () => {
-            if (!uuid) return;
-            const data = await api.getPlayerRank(uuid);
-            setRankData(data);
-        };
-        fetchRank();
-    }, [uuid]);
+    const [firstPcPage, setFirstPcPage] = useState<Pokemon[] | null>(null);
 
     useEffect(() => {
         const fetchBaseData = async () => {
             if (!uuid) return;
             setLoading(true);
-            const [sum, par] = await Promise.all([
-                api.getPlayer(uuid),
-                api.getPlayerParty(uuid)
-            ]);
+            setFirstPcPage(null);
+            const profile = await api.getPlayerProfile(uuid);
 
-            if (!sum) {
+            if (!profile) {
                 setSummary({
                     uuid: uuid,
                     name: "Trainer " + uuid.slice(0, 4),
@@ -73,26 +63,56 @@ export default function PlayerProfile() {
                     shinyCount: 12,
                     battlesWon: 156,
                     pokedexCompletion: 0,
-                    pokedexCount: 0
+                    pokedexCount: 0,
+                    pokedexCatalogueCount: 0,
+                    pokedexCatalogueSize: 722
                 });
                 setParty([]);
+                setRankData(null);
+                setFirstPcPage([]);
             } else {
-                setSummary(sum);
-                setParty(par);
+                setSummary(profile.summary);
+                setParty(profile.party);
+                setRankData(profile.rank);
+                setFirstPcPage(profile.pc);
             }
             setLoading(false);
         };
         fetchBaseData();
     }, [uuid]);
 
+    useEffect(() => {
+        if (!uuid) return;
+        // Pushed by the backend whenever this trainer's data changes
+        return api.subscribeToLive({
+            onPlayer: async () => {
+                const profile = await api.getPlayerProfile(uuid);
+                if (!profile) return;
+                setSummary(profile.summary);
+                setParty(profile.party);
+                setRankData(profile.rank);
+            },
+            // Other trainers' progress moves this trainer's academy score too
+            onAcademy: async (delta) => {
+                if (delta.scores && !(uuid in delta.scores)) return;
+                setRankData(await api.getPlayerRank(uuid));
+            },
+        }, uuid);
+    }, [uuid]);
+
     useEffect(() => {
         const fetchPC = async () => {
-            if (!uuid) return;
+            if (!uuid || firstPcPage === null) return;
+            // The unfiltered first page already came with the profile
+            if (pcPage === 1 && !debouncedSearch && !isShinyFilter) {
+                setPc(firstPcPage);
+                return;
+            }
             const pcData = await api.getPlayerPC(uuid, pcPage, debouncedSearch, { shiny: isShinyFilter ? true : undefined });
             setPc(pcData);
         };
         fetchPC();
-    }, [uuid, pcPage, debouncedSearch, isShinyFilter]);
+    }, [uuid, pcPage, debouncedSearch, isShinyFilter, firstPcPage]);
 
     const playerTitleData: PlayerTitleData = useMemo(() => ({
         totalCaptures: summary?.totalCaptures ?? 0,
@@ -275,7 +295,7 @@ export default function PlayerProfile() {
                                                 {summary?.pokedexCompletion?.toFixed(1) ?? 0}%
                                             </div>
                                             <Badge variant="secondary" className="text-xs">
-                                                {summary?.pokedexCount ?? 0} / 722 species
+                                                {summary?.pokedexCatalogueCount ?? 0} / {summary?.pokedexCatalogueSize ?? 722} species
                                             </Badge>
                                         </div>
                                         <div className="h-3 w-full bg-muted rounded-full overflow-hidden">